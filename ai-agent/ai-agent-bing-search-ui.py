@@ -1,29 +1,30 @@
 import os
+import sys
 import streamlit as st
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects.models import BingGroundingTool
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.azure_resources import begin_rerun, get_connection_id, get_project_client, rerun_report
+from common.grounding_pool import GroundingAgentPool
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Create an Azure AI Client
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(),
-    conn_str=os.getenv("PROJECT_CONNECTION_STRING"),
-)
+# The credential, Azure AI Client and Bing connection ID are built once per process and reused by every rerun.
+begin_rerun()
+project_client = get_project_client()
+bing_connection_id = get_connection_id(os.getenv("BING_CONNECTION_NAME"))
 
-bing_connection = project_client.connections.get(
-    connection_name=os.getenv("BING_CONNECTION_NAME")
-)
-conn_id = bing_connection.id
+# The pool of Bing grounding agents is kept in the resource cache for the same reason.
+@st.cache_resource
+def get_grounding_pool(connection_id):
+    return GroundingAgentPool(project_client, connection_id)
 
-# Initialize agent bing tool and add the connection id
-bing = BingGroundingTool(connection_id=conn_id)
+grounding_pool = get_grounding_pool(bing_connection_id)
 
 # Streamlit UI setup
 st.set_page_config(page_title="Bing Search Agent Demo", page_icon=":mag:")
+st.sidebar.caption(rerun_report())
 
 # Construct the path to the logo.png file
 logo_path = os.path.join(os.path.dirname(__file__), 'logo.png')
@@ -44,61 +45,40 @@ if 'messages' not in st.session_state:
 
 user_input = st.text_input("You: ", "")
 if st.button("Send"):
-    # Create agent with the bing tool and process assistant run
-    with project_client:
-        agent = project_client.agents.create_agent(
-            model="gpt-4o",
-            name="search-assistant",
-            instructions="You are a helpful assistant",
-            tools=bing.definitions,
-            headers={"x-ms-enable-preview": "true"}
-        )
-        st.sidebar.write(f"Created agent, ID: {agent.id}")
-
-        # Create thread for communication
-        thread = project_client.agents.create_thread()
-        st.sidebar.write(f"Created thread, ID: {thread.id}")
-
-        # Create message to thread
-        message = project_client.agents.create_message(
-            thread_id=thread.id,
-            role="user",
-            content=user_input,
-        )
-        st.sidebar.write(f"Created message, ID: {message.id}")
-
-        # Create and process agent run in thread with tools
-        run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-        st.sidebar.write(f"Run finished with status: {run.status}")
-
-        # Retrieve run step details to get Bing Search query link
-        run_steps = project_client.agents.list_run_steps(run_id=run.id, thread_id=thread.id)
-        run_steps_data = run_steps['data']
-
-        if run.status == "failed":
-            st.sidebar.write(f"Run failed: {run.last_error}")
-
-        # Fetch and log all messages in chronological order
-        messages_response = project_client.agents.list_messages(thread_id=thread.id)
-        messages_data = messages_response["data"]
-
-        # Sort messages by creation time (ascending)
-        sorted_messages = sorted(messages_data, key=lambda x: x["created_at"])
-
-        for msg in sorted_messages:
-            role = msg["role"].upper()
-            content_blocks = msg.get("content", [])
-            text_value = ""
-            if content_blocks and content_blocks[0]["type"] == "text":
-                text_value = content_blocks[0]["text"]["value"]
-            if role == "USER":
-                st.session_state.messages.append({"role": "user", "content": text_value})
-            else:
-                st.session_state.messages.append({"role": "assistant", "content": text_value})
-
-        # Delete the assistant when done
-        project_client.agents.delete_agent(agent.id)
-        st.sidebar.write("Deleted agent")
+    # Reuse the pooled agent with the bing tool and process the run on a fresh thread
+    grounding_pool.reset_stats()
+    agent = grounding_pool.get_agent(name="search-assistant", instructions="You are a helpful assistant")
+    st.sidebar.write(f"Using pooled agent, ID: {agent.id}")
+
+    run, messages_response = grounding_pool.run(
+        name="search-assistant",
+        instructions="You are a helpful assistant",
+        content=user_input,
+    )
+    st.sidebar.write(f"Run finished with status: {run.status}")
+
+    if run.status == "failed":
+        st.sidebar.write(f"Run failed: {run.last_error}")
+
+    # Fetch and log all messages in chronological order
+    messages_data = messages_response["data"]
+
+    # Sort messages by creation time (ascending)
+    sorted_messages = sorted(messages_data, key=lambda x: x["created_at"])
+
+    for msg in sorted_messages:
+        role = msg["role"].upper()
+        content_blocks = msg.get("content", [])
+        text_value = ""
+        if content_blocks and content_blocks[0]["type"] == "text":
+            text_value = content_blocks[0]["text"]["value"]
+        if role == "USER":
+            st.session_state.messages.append({"role": "user", "content": text_value})
+        else:
+            st.session_state.messages.append({"role": "assistant", "content": text_value})
+
+    # The run's thread is already being deleted; the pooled agent is deleted when the process exits
+    st.sidebar.write(grounding_pool.report())
 
 # Display chat messages
 for msg in st.session_state.messages:
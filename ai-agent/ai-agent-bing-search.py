@@ -1,17 +1,19 @@
 import os
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
+import sys
 from azure.ai.projects.models import BingGroundingTool
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import span
+from common.azure_resources import get_project_client
+from common.run_poller import get_run_waiter
+from common.token_usage import get_ledger
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Create an Azure AI Client
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(),
-    conn_str=os.getenv("PROJECT_CONNECTION_STRING"),
-)
+# Create an Azure AI Client (the local emulator when AGENTS_EMULATOR is set)
+project_client = get_project_client()
 
 bing_connection = project_client.connections.get(
     connection_name=os.getenv("BING_CONNECTION_NAME")
@@ -22,7 +24,8 @@ conn_id = bing_connection.id
 bing = BingGroundingTool(connection_id=conn_id)
 
 # Create agent with the bing tool and process assistant run
-with project_client:
+# With AGENT_TRACE set, the whole run is one trace
+with project_client, span("ai_agent_bing_search"):
     agent = project_client.agents.create_agent(
         model=os.getenv("MODEL_DEPLOYMENT_NAME"),
         name="search-assistant",
@@ -45,7 +48,8 @@ with project_client:
     print(f"Created message, ID: {message.id}")
 
     # Create and process agent run in thread with tools
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
+    # Waits with the adaptive poller (AGENT_RUN_WAIT) instead of fixed 1 s polling
+    run = get_run_waiter().run(project_client.agents, thread.id, agent.id, key="search-assistant")
     print(f"Run finished with status: {run.status}")
 
     # Retrieve run step details to get Bing Search query link
@@ -73,4 +77,6 @@ with project_client:
         text_value = ""
         if content_blocks and content_blocks[0]["type"] == "text":
             text_value = content_blocks[0]["text"]["value"]
-        print(f"{role}: {text_value}")
\ No newline at end of file
+        print(f"{role}: {text_value}")
+
+    print(get_ledger().report())
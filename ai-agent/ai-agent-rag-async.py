@@ -0,0 +1,146 @@
+import argparse
+import asyncio
+import os
+import sys
+from azure.ai.projects.models import FileSearchTool, FilePurpose
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import span
+from common.async_pipeline import Pipeline
+from common.azure_resources import get_async_project_client
+from common.run_poller import get_run_waiter
+from common.token_usage import get_ledger
+
+load_dotenv()
+
+# ai-agent-rag.py with the async client: the setup is a dependency graph, so the thread, the message, the
+# vector store and the agent are created while the file uploads and is indexed. The vector store starts
+# empty and the uploaded file is added to it, which lets the agent be created before ingestion finishes.
+#
+#   upload ──────────────┐
+#   vector_store ─┬──────┴─ index ─┐
+#                 └─ agent ────────┼─ run ─ messages
+#   thread ─ message ──────────────┘
+
+QUESTION = "Does Contoso University offer evening or weekend classes?"
+
+
+def build_pipeline(agents, sequential: bool) -> Pipeline:
+    pipeline = Pipeline("ai_agent_rag.pipeline", sequential=sequential, time_scale=getattr(agents, "time_scale", 1.0))
+
+    @pipeline.step("upload")
+    async def upload():
+        file = await agents.upload_file_and_poll(file_path='ContosoUniversityFAQ.pdf', purpose=FilePurpose.AGENTS)
+        print(f"Uploaded file, file ID: {file.id}")
+        return file
+
+    @pipeline.step("vector_store")
+    async def vector_store():
+        store = await agents.create_vector_store(name="agent_vectorstore")
+        print(f"Created vector store, vector store ID: {store.id}")
+        return store
+
+    @pipeline.step("index", "upload", "vector_store")
+    async def index(upload, vector_store):
+        indexed = await agents.create_vector_store_file_and_poll(vector_store_id=vector_store.id, file_id=upload.id)
+        print(f"Indexed file {upload.id} in vector store {vector_store.id}: {indexed.status}")
+        return indexed
+
+    @pipeline.step("agent", "vector_store")
+    async def agent(vector_store):
+        file_search_tool = FileSearchTool(vector_store_ids=[vector_store.id])
+        created = await agents.create_agent(
+            model=os.getenv('MODEL_DEPLOYMENT_NAME'),
+            name="file-search-agent",
+            instructions="You are a helpful agent which provides answer onlny from the search data.For other questions, please say 'I don't know'.",
+            tools=file_search_tool.definitions,
+            tool_resources=file_search_tool.resources,
+        )
+        print(f"Created agent, agent ID: {created.id}")
+        return created
+
+    @pipeline.step("thread")
+    async def thread():
+        created = await agents.create_thread()
+        print(f"Created thread, thread ID: {created.id}")
+        return created
+
+    @pipeline.step("message", "thread")
+    async def message(thread):
+        created = await agents.create_message(thread_id=thread.id, role="user", content=QUESTION, attachments=[])
+        print(f"Created message, message ID: {created.id}")
+        return created
+
+    # The run needs the file indexed, or file search finds nothing
+    @pipeline.step("run", "agent", "thread", "message", "index")
+    async def run(agent, thread, message, index):
+        # The adaptive waiter (AGENT_RUN_WAIT), awaiting instead of blocking
+        finished = await get_run_waiter().run_async(agents, thread.id, agent.id, key="file-search-agent")
+        print(f"Created run, run ID: {finished.id}")
+        return finished
+
+    @pipeline.step("messages", "thread", "run")
+    async def messages(thread, run):
+        return await agents.list_messages(thread_id=thread.id)
+
+    return pipeline
+
+
+async def clean_up(agents, results: dict):
+    """Delete whatever the pipeline created, concurrently, including after a failed step."""
+    deletes = []
+    for step, delete in (("agent", agents.delete_agent), ("thread", agents.delete_thread),
+                         ("vector_store", agents.delete_vector_store), ("upload", agents.delete_file)):
+        if step in results:
+            deletes.append(delete(results[step].id))
+    outcomes = await asyncio.gather(*deletes, return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            print(f"Clean-up failed: {outcome}")
+    print(f"Deleted {sum(not isinstance(outcome, Exception) for outcome in outcomes)} resources")
+
+
+def print_messages(messages):
+    # Sort messages by creation time (ascending)
+    sorted_messages = sorted(messages["data"], key=lambda x: x["created_at"])
+
+    print("\n--- Thread Messages (sorted) ---")
+    for msg in sorted_messages:
+        role = msg["role"].upper()
+        content_blocks = msg.get("content", [])
+        text_value = ""
+        if content_blocks and content_blocks[0]["type"] == "text":
+            text_value = content_blocks[0]["text"]["value"]
+        print(f"{role}: {text_value}")
+
+
+async def run_once(sequential: bool) -> Pipeline:
+    # PROJECT_CONNECTION_STRING, or the local emulator when AGENTS_EMULATOR is set
+    async with get_async_project_client() as project_client:
+        pipeline = build_pipeline(project_client.agents, sequential)
+        try:
+            results = await pipeline.run()
+            print_messages(results["messages"])
+        finally:
+            await clean_up(project_client.agents, pipeline.results)
+    return pipeline
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="RAG agent with the setup steps overlapped as a dependency graph.")
+    parser.add_argument("--sequential", action="store_true", help="run the same steps one at a time")
+    parser.add_argument("--compare", action="store_true", help="run sequentially first, then pipelined, and compare")
+    args = parser.parse_args()
+
+    # With AGENT_TRACE set, the whole run is one trace
+    with span("ai_agent_rag_async"):
+        baseline = (await run_once(sequential=True)).timings if args.compare else None
+        pipeline = await run_once(sequential=args.sequential and not args.compare)
+    print()
+    print(pipeline.report(baseline))
+    print(get_ledger().report())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,20 +1,24 @@
 import os
+import sys
 import streamlit as st
-from azure.ai.projects import AIProjectClient
 from azure.ai.projects.models import FileSearchTool, MessageAttachment, FilePurpose
-from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.azure_resources import begin_rerun, get_project_client, rerun_report
+from common.resource_tracker import release, scope, tracker_for
+from common.run_poller import get_run_waiter
+
 load_dotenv()
 
-# Initialize project client
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(), conn_str=os.getenv('PROJECT_CONNECTION_STRING')
-)
+# Initialize project client once per process; Streamlit reruns reuse it and its cached token
+begin_rerun()
+project_client = get_project_client()
 
 # Streamlit UI
 st.title("AI Agent File Search Tool")
 st.sidebar.title("Agent Steps")
+st.sidebar.caption(rerun_report())
 
 # File upload
 uploaded_file = st.sidebar.file_uploader("Upload a PDF file", type="pdf")
@@ -24,24 +28,38 @@ if uploaded_file:
         f.write(uploaded_file.getbuffer())
     st.sidebar.write(f"Uploaded file: {uploaded_file.name}")
 
-    with project_client:
-        # Upload the file and create vector store
+    # Index each uploaded file once per session instead of on every rerun, and drop the previous file's index.
+    # Reruns count as use of both the file and its vector store; the sweeper deletes the indexes of sessions idle
+    # for an hour, so rebuild one it took any part of.
+    tracker = tracker_for(project_client)
+    index = st.session_state.get("index")
+    file_key = (uploaded_file.name, uploaded_file.size)
+    parts = (("vector_store", index["vector_store_id"]), ("file", index["file_id"])) if index is not None else ()
+    if index is None or index["key"] != file_key or not all(tracker.alive(resource_id) for _, resource_id in parts):
+        for kind, resource_id in parts:
+            if tracker.alive(resource_id):
+                release(project_client, kind, resource_id)
         file = project_client.agents.upload_file_and_poll(file_path=file_path, purpose=FilePurpose.AGENTS)
-        st.sidebar.write(f"Uploaded file, file ID: {file.id}")
-
         vector_store = project_client.agents.create_vector_store_and_poll(file_ids=[file.id], name="agent_vectorstore")
-        st.sidebar.write(f"Created vector store, vector store ID: {vector_store.id}")
-
-        # Create a file search tool
-        file_search_tool = FileSearchTool(vector_store_ids=[vector_store.id])
-
-        # Chat interface
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-
-        user_input = st.text_input("Ask a question:")
-        if st.button("Send"):
-            if user_input:
+        index = st.session_state["index"] = {"key": file_key, "file_id": file.id, "vector_store_id": vector_store.id}
+    st.sidebar.write(f"Uploaded file, file ID: {index['file_id']}")
+    st.sidebar.write(f"Created vector store, vector store ID: {index['vector_store_id']}")
+    tracker.touch(index["vector_store_id"])
+    tracker.touch(index["file_id"])
+    tracker.start_sweeper()
+
+    # Create a file search tool
+    file_search_tool = FileSearchTool(vector_store_ids=[index["vector_store_id"]])
+
+    # Chat interface
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+
+    user_input = st.text_input("Ask a question:")
+    if st.button("Send"):
+        if user_input:
+            # The agent and thread live for this question only; the scope deletes both on exit, even if the run raises
+            with scope():
                 # Create an agent
                 agent = project_client.agents.create_agent(
                     model=os.getenv('MODEL_DEPLOYMENT_NAME'),
@@ -64,7 +82,8 @@ if uploaded_file:
                 st.sidebar.write(f"Created message, message ID: {message.id}")
 
                 # Process the run
-                run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
+                # Waits with the adaptive poller (AGENT_RUN_WAIT) instead of fixed 1 s polling
+                run = get_run_waiter().run(project_client.agents, thread.id, agent.id, key="file-search-agent")
                 st.sidebar.write(f"Created run, run ID: {run.id}")
 
                 # Retrieve and display messages
@@ -80,16 +99,11 @@ if uploaded_file:
                         text_value = content_blocks[0]["text"]["value"]
                     if role == "ASSISTANT":
                         st.session_state.messages.append({"role": "assistant", "content": text_value})
-
-                # Clean up resources
-                project_client.agents.delete_vector_store(vector_store.id)
-                st.sidebar.write("Deleted vector store")
-                project_client.agents.delete_agent(agent.id)
-                st.sidebar.write("Deleted agent")
-
-        # Display chat messages
-        for msg in st.session_state.messages:
-            if msg["role"] == "user":
-                st.write(f"**You:** {msg['content']}")
-            else:
-                st.write(f"**Assistant:** {msg['content']}")
\ No newline at end of file
+            st.sidebar.write("Deleted agent and thread")
+
+    # Display chat messages
+    for msg in st.session_state.messages:
+        if msg["role"] == "user":
+            st.write(f"**You:** {msg['content']}")
+        else:
+            st.write(f"**Assistant:** {msg['content']}")
\ No newline at end of file
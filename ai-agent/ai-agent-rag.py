@@ -1,16 +1,21 @@
 import os
-from azure.ai.projects import AIProjectClient
+import sys
 from azure.ai.projects.models import FileSearchTool, MessageAttachment, FilePurpose
-from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import span
+from common.azure_resources import get_project_client
+from common.run_poller import get_run_waiter
+from common.token_usage import get_ledger
+
 load_dotenv()
 
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(), conn_str=os.getenv('PROJECT_CONNECTION_STRING')
-)
+# PROJECT_CONNECTION_STRING, or the local emulator when AGENTS_EMULATOR is set
+project_client = get_project_client()
 
-with project_client:
+# With AGENT_TRACE set, the whole run is one trace
+with project_client, span("ai_agent_rag"):
     # upload a local file and store it in vector database managed by MS
 
     #upload a file
@@ -45,7 +50,8 @@ with project_client:
     )
     print(f"Created message, message ID: {message.id}")
 
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
+    # Waits with the adaptive poller (AGENT_RUN_WAIT) instead of fixed 1 s polling
+    run = get_run_waiter().run(project_client.agents, thread.id, agent.id, key="file-search-agent")
     print(f"Created run, run ID: {run.id}")
 
     project_client.agents.delete_vector_store(vector_store.id)
@@ -70,4 +76,6 @@ with project_client:
         text_value = ""
         if content_blocks and content_blocks[0]["type"] == "text":
             text_value = content_blocks[0]["text"]["value"]
-        print(f"{role}: {text_value}")
\ No newline at end of file
+        print(f"{role}: {text_value}")
+
+    print(get_ledger().report())
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from azure.ai.projects.models import BingGroundingTool
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import instrument
+from common.agents_emulator import EmulatedProjectClient, EmulatorConfig
+from common.grounding_pool import GroundingAgentPool
+
+# Throughput and latency of our Agents service client code against the local emulator, so it runs on a laptop.
+# Compares the original per-call pattern (create agent, thread, message, run, list, delete agent) with
+# GroundingAgentPool under concurrent callers. Emulated service time is multiplied by --time-scale; latencies
+# are reported unscaled (divided by it), as they would be against Azure.
+
+TOOLS = {
+    "search_resources_tool_agent": "Search for educational resources related to the topic in the user's request.",
+    "design_activities_tool_agent": "Design classroom activities and assessments for the topic in the user's request.",
+    "optimize_engagement_tool_agent": "Suggest engagement strategies for the topic in the user's request.",
+}
+CONTROL_PLANE = ("create_agent", "delete_agent", "create_thread", "delete_thread")
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def per_call(client, connection_id: str):
+    """The original tool implementation: a fresh agent for every call, deleted afterwards (the thread leaks)."""
+    bing = BingGroundingTool(connection_id=connection_id)
+
+    def ask(name: str, instructions: str, content: str) -> str:
+        agent = client.agents.create_agent(
+            model="gpt-4o", name=name, instructions=instructions,
+            tools=bing.definitions, headers={"x-ms-enable-preview": "true"},
+        )
+        thread = client.agents.create_thread()
+        client.agents.create_message(thread_id=thread.id, role="user", content=content)
+        client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
+        client.agents.delete_agent(agent.id)
+        messages = client.agents.list_messages(thread_id=thread.id)
+        return messages["data"][0]["content"][0]["text"]["value"]
+
+    return ask, lambda: None
+
+
+def pooled(client, connection_id: str):
+    pool = GroundingAgentPool(client, connection_id)
+    return pool.ask, pool.close
+
+
+STRATEGIES = {
+    "per-call": per_call,
+    "pool": pooled,
+}
+
+
+def benchmark(name: str, config: EmulatorConfig, calls: int, workers: int) -> dict:
+    # Traced when AGENT_TRACE is set; the emulator's stats stay reachable through the wrapper
+    client = instrument(EmulatedProjectClient(config))
+    connection_id = client.connections.get(connection_name="bing").id
+    ask, close = STRATEGIES[name](client, connection_id)
+    names = list(TOOLS)
+    latencies, errors, first_error = [], 0, None
+
+    def one(i: int):
+        tool = names[i % len(names)]
+        started = time.perf_counter()
+        ask(name=tool, instructions=TOOLS[tool], content=f"Retrieve educational resources for topic {i % 10}.")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(one, i) for i in range(calls)]:
+            try:
+                latencies.append(future.result() / config.time_scale)
+            except Exception as exc:
+                errors += 1
+                first_error = first_error or exc
+    elapsed = (time.perf_counter() - started) / config.time_scale
+    close()
+    if first_error is not None:
+        if not latencies:
+            raise RuntimeError(f"{name}: all {calls} calls failed") from first_error
+        print(f"{name}: {errors} of {calls} calls failed; first error: {first_error!r}")
+
+    latencies.sort()
+    requests = client.stats.requests
+    return {
+        "strategy": name,
+        "calls": calls,
+        "errors": errors,
+        "calls_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "latency_p99_s": percentile(latencies, 99),
+        "requests": sum(requests.values()),
+        "control_plane_requests": sum(requests[op] for op in CONTROL_PLANE),
+        "leaked_threads": len(client.emulator.threads),
+        "emulator": client.stats.report(),
+    }
+
+
+def print_table(results):
+    header = f"{'strategy':<14} {'calls':>6} {'err':>4} {'calls/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'requests':>9} {'ctl-plane':>9} {'leaked':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['strategy']:<14} {r['calls']:>6} {r['errors']:>4} {r['calls_per_second']:>8.2f} "
+            f"{r['latency_p50_s']:>7.2f} {r['latency_p95_s']:>7.2f} {r['latency_p99_s']:>7.2f} "
+            f"{r['requests']:>9} {r['control_plane_requests']:>9} {r['leaked_threads']:>7}"
+        )
+    for r in results:
+        print(f"{r['strategy']}: {r['emulator']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the grounding-agent client code against the local Agents emulator.")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--calls", type=int, default=60, help="grounded tool calls per strategy")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--config", help="emulator JSON config (same format as AGENTS_EMULATOR)")
+    parser.add_argument("--time-scale", type=float, help="multiply emulated service time by this (default 0.02)")
+    parser.add_argument("--throttle-rate", type=float, help="share of requests answered with 429")
+    parser.add_argument("--failure-rate", type=float, help="share of requests answered with 500")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    settings = {"time_scale": 0.02}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            settings.update(json.load(f))
+    for key in ("time_scale", "throttle_rate", "failure_rate", "seed"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+
+    # A fresh emulator per strategy, built from the same config, so every strategy sees the same service
+    results = [benchmark(name, EmulatorConfig.from_dict(settings), args.calls, args.workers) for name in args.strategies]
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
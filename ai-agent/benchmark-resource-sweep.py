@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agents_emulator import EmulatedProjectClient, EmulatorConfig
+from common.resource_tracker import ResourceLedger, ResourceTracker
+
+# Time to garbage-collect leaked Agents service resources against the local emulator. Every run leaks --leaks
+# sets of the resources a demo creates per question (agent, thread, uploaded file, vector store), half of
+# them tagged with another demo, then sweeps this demo's with 1 delete worker (one call after another, as the
+# demos' cleanup code did) and with --workers. Emulated service time is multiplied by --time-scale; the
+# sweep time is reported unscaled (divided by it), as it would be against Azure.
+
+
+def leak(client, tracker: ResourceTracker, count: int):
+    agents = client.agents
+    for i in range(count):
+        # Resources of two demos share the ledger; the sweep takes only its own
+        demo = "ai-agent/ai-agent-rag-ui" if i % 2 == 0 else "connected-agents/main"
+        tags = {"demo": demo}
+        agent = agents.create_agent(model="gpt-4o", name="file-search-agent", metadata=tags)
+        thread = agents.create_thread(metadata=tags)
+        file = agents.upload_file(file_path="ContosoUniversityFAQ.pdf", purpose="assistants")
+        store = agents.create_vector_store(file_ids=[file.id], name="agent_vectorstore")
+        for kind, resource in (("agent", agent), ("thread", thread), ("file", file), ("vector_store", store)):
+            tracker.record(kind, resource.id, tags=tags)
+
+
+def benchmark(workers: int, config: EmulatorConfig, leaks: int) -> dict:
+    emulated = EmulatedProjectClient(config)
+    tracker = ResourceTracker(emulated, namespace="benchmark", ledger=ResourceLedger(), workers=workers,
+                              delete_on_exit=False)
+    leak(emulated, tracker, leaks)
+    time.sleep(0.01)
+    before = emulated.stats.requests.copy()
+
+    started = time.perf_counter()
+    swept = tracker.sweep(max_idle=0.0, tags={"demo": "ai-agent/ai-agent-rag-ui"})
+    elapsed = (time.perf_counter() - started) / config.time_scale
+
+    requests = emulated.stats.requests - before
+    service = emulated.emulator
+    left = len(service.agents) + len(service.threads) + len(service.files) + len(service.vector_stores)
+    return {
+        "workers": workers,
+        "swept": len(swept),
+        "delete_requests": sum(requests.values()),
+        "sweep_s": elapsed,
+        "deletes_per_second": len(swept) / elapsed if elapsed else 0.0,
+        "left_other_demo": left,
+        "failed": tracker.stats.failed,
+        "tracker": tracker.report(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs. concurrent sweeping of leaked agent resources.")
+    parser.add_argument("--leaks", type=int, default=50, help="leaked resource sets (agent, thread, file, vector store)")
+    parser.add_argument("--workers", type=int, default=8, help="delete workers of the concurrent sweep")
+    parser.add_argument("--time-scale", type=float, default=0.02, help="multiply emulated service time by this")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    settings = {"time_scale": args.time_scale, "seed": args.seed}
+    results = [benchmark(workers, EmulatorConfig.from_dict(settings), args.leaks) for workers in (1, args.workers)]
+    header = f"{'workers':>7} {'swept':>6} {'requests':>9} {'sweep s':>8} {'deletes/s':>10} {'kept':>5} {'failed':>6}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['workers']:>7} {r['swept']:>6} {r['delete_requests']:>9} {r['sweep_s']:>8.1f} "
+              f"{r['deletes_per_second']:>10.1f} {r['left_other_demo']:>5} {r['failed']:>6}")
+    for r in results:
+        print(f"{r['workers']} workers: {r['tracker']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
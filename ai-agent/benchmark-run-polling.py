@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import instrument
+from common.agents_emulator import EmulatedProjectClient, EmulatorConfig
+from common.run_poller import make_waiter
+
+# Status requests and added latency of each run-waiting strategy in common.run_poller against the local emulator.
+# "fixed" is what create_and_process_run does (a get_run every second). The first --warmup runs of each strategy
+# teach the adaptive ones the run durations and are left out of the "steady" columns.
+
+KINDS = ("fixed", "adaptive", "shared", "stream")
+
+
+def benchmark(kind: str, config: EmulatorConfig, runs: int, workers: int, warmup: int) -> dict:
+    client = instrument(EmulatedProjectClient(config))
+    agent = client.agents.create_agent(model="gpt-4o", name="file-search-agent", instructions="Answer from the files.")
+    waiter = make_waiter(kind)
+
+    def one(i: int):
+        thread = client.agents.create_thread()
+        client.agents.create_message(thread_id=thread.id, role="user", content=f"Question {i}")
+        return waiter.run(client.agents, thread.id, agent.id, key=agent.name).status
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(one, range(runs)))
+    if hasattr(waiter, "close"):
+        waiter.close()
+
+    stats = waiter.stats
+    steady = stats.gaps[warmup:] or stats.gaps
+    return {
+        "strategy": kind,
+        "runs": runs,
+        "completed": statuses.count("completed"),
+        "status_requests": stats.status_requests,
+        "get_run_requests": client.stats.requests["get_run"],
+        "added_latency_ms": sum(stats.gaps) / 2 / max(1, len(stats.gaps)) * 1000,
+        "steady_added_latency_ms": sum(steady) / 2 / max(1, len(steady)) * 1000,
+        "report": stats.report(),
+    }
+
+
+def print_table(results):
+    header = f"{'strategy':<10} {'runs':>5} {'done':>5} {'status req':>11} {'get_run':>8} {'added ms':>9} {'steady ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['strategy']:<10} {r['runs']:>5} {r['completed']:>5} {r['status_requests']:>11} "
+            f"{r['get_run_requests']:>8} {r['added_latency_ms']:>9.0f} {r['steady_added_latency_ms']:>10.0f}"
+        )
+    for r in results:
+        print(f"{r['strategy']}: {r['report']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare run-waiting strategies against the local Agents emulator.")
+    parser.add_argument("--strategies", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--runs", type=int, default=80, help="runs per strategy")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent callers")
+    parser.add_argument("--warmup", type=int, default=20, help="runs excluded from the steady-state latency")
+    parser.add_argument("--run-median", type=float, default=8.0, help="median emulated run duration in seconds")
+    parser.add_argument("--run-sigma", type=float, default=0.5, help="log-normal spread of run durations")
+    parser.add_argument("--config", help="emulator JSON config (same format as AGENTS_EMULATOR)")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="multiply emulated service time by this")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    settings = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            settings.update(json.load(f))
+    settings["time_scale"] = args.time_scale
+    if args.seed is not None:
+        settings["seed"] = args.seed
+    operations = settings.setdefault("operations", {})
+    operations["run_execution"] = {"median_ms": args.run_median * 1000, "sigma": args.run_sigma}
+
+    # Each strategy starts cold, with its own history and a fresh emulator built from the same config
+    results = [
+        benchmark(kind, EmulatorConfig.from_dict(settings), args.runs, args.workers, args.warmup)
+        for kind in args.strategies
+    ]
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,27 @@ from autogen_agentchat.agents import AssistantAgent
 from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermination
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import BingGroundingTool
-import asyncio
 from dotenv import load_dotenv
+import asyncio
 import os
+import sys
 import re
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.autogen_budget import BudgetTermination
+from common.azure_resources import begin_rerun, get_connection_id, get_project_client, rerun_report, resources
+from common.autogen_context import PolicyChatCompletionContext
+from common.autogen_usage import metered_stream
+from common.budget import RunBudget
+from common.checkpoint import CheckpointStore, checkpointed_stream, run_key_for
+from common.compaction import Compactor
+from common.context_policy import ContextMeter, LastK, TokenBudget
+from common.grounding_pool import GroundingAgentPool
+from common.jobs import DONE, get_job_runner
+from common.plan_store import PlanStore
+from common.rate_limit import async_http_client
+from common.token_usage import get_ledger, scope
 
 load_dotenv()
 
@@ -21,112 +35,102 @@ MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME")
 MODEL_API_VERSION = os.getenv("MODEL_API_VERSION")
 AOAI_ENDPOINT = os.getenv("AOAI_ENDPOINT")
 
-# Initiate Azure Open AI Client
-az_model_client = AzureOpenAIChatCompletionClient(
+# Azure Open AI Client, Azure AI Project Client and the Bing connection ID are built once per process
+# and reused by every rerun. Every run uses the model client on the one job loop, so sharing its pool is safe.
+begin_rerun()
+az_model_client = resources.get("autogen_model_client", lambda: AzureOpenAIChatCompletionClient(
     azure_deployment=MODEL_DEPLOYMENT_NAME,
     model=MODEL_DEPLOYMENT_NAME,
     api_version=MODEL_API_VERSION,
     azure_endpoint=AOAI_ENDPOINT,
-    api_key=AOAI_API_KEY
-)
+    api_key=AOAI_API_KEY,
+    # Requests queue for the deployment's quota (AGENT_RATE_LIMITS) instead of failing with 429
+    http_client=async_http_client(),
+))
+project_client = get_project_client(PROJECT_CONNECTION_STRING)
+conn_id = get_connection_id(BING_CONNECTION_NAME, PROJECT_CONNECTION_STRING)
 
-# Initiate Azure AI Project Client
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(),
-    conn_str=PROJECT_CONNECTION_STRING,
-)
+# Grounding agents are created once per process and reused by every tool call.
+# Streamlit re-executes this script on every interaction, so keep the pool in the resource cache.
+@st.cache_resource
+def get_grounding_pool(_project_client, connection_id):
+    return GroundingAgentPool(_project_client, connection_id)
+
+grounding_pool = get_grounding_pool(project_client, conn_id)
 
-# Retrieve the Bing connection
-bing_connection = project_client.connections.get(connection_name=BING_CONNECTION_NAME)
-conn_id = bing_connection.id
+# Grounded answers are compacted before they enter the group chat, where every agent re-reads them each turn
+tool_compactor = Compactor(max_tokens=400)
 
-# Creating Bing Grounding Tools 
+# Creating Bing Grounding Tools. The grounding run blocks on HTTP and polling, so it runs in a worker
+# thread: the tools share the one job loop with every other session's job.
 async def search_resources_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on searching educational resources for 'topic'.
     """
     print(f"[search_resources_tool] Fetching educational resources for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(await asyncio.to_thread(
+        grounding_pool.ask,
         name="search_resources_tool_agent",
-        instructions=f"Search for educational resources related to {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Search for educational resources related to the topic in the user's request.",
         content=f"Retrieve educational resources for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-    project_client.agents.delete_agent(agent.id)
-    return messages["data"][0]["content"][0]["text"]["value"]
+    ))
 
 async def design_activities_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on designing classroom activities for 'topic'.
     """
     print(f"[design_activities_tool] Designing classroom activities for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(await asyncio.to_thread(
+        grounding_pool.ask,
         name="design_activities_tool_agent",
-        instructions=f"Design classroom activities and assessments for {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Design classroom activities and assessments for the topic in the user's request.",
         content=f"Suggest classroom activities and assessments for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-    project_client.agents.delete_agent(agent.id)
-    return messages["data"][0]["content"][0]["text"]["value"]
+    ))
 
 async def optimize_engagement_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on optimizing classroom engagement for 'topic'.
     """
     print(f"[optimize_engagement_tool] Optimizing classroom engagement for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(await asyncio.to_thread(
+        grounding_pool.ask,
         name="optimize_engagement_tool_agent",
-        instructions=f"Provide strategies to boost student engagement for {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Provide strategies to boost student engagement for the topic in the user's request.",
         content=f"Provide strategies to boost student engagement for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-    project_client.agents.delete_agent(agent.id)
-    return messages["data"][0]["content"][0]["text"]["value"]
+    ))
+
+# Team state and completed tool calls are checkpointed per topic so an interrupted run resumes
+@st.cache_resource
+def get_checkpoint_store():
+    return CheckpointStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints.sqlite3"))
+
+checkpoints = get_checkpoint_store()
 
 # Creating AI Agent functions
+@checkpoints.cached_tool
 async def search_resources_agent(topic: str) -> str:
     return await search_resources_tool(topic)
 
+@checkpoints.cached_tool
 async def design_activities_agent(topic: str) -> str:
     return await design_activities_tool(topic)
 
+@checkpoints.cached_tool
 async def optimize_engagement_agent(topic: str) -> str:
     return await optimize_engagement_tool(topic)
 
+# Per-agent context policies: the specialists only need the task and the latest turns,
+# the Decision Agent sees everything that fits its token budget plus a summary of the rest.
+context_meter = ContextMeter()
+
+def windowed_context(agent_name, policy):
+    return PolicyChatCompletionContext(agent_name, policy, meter=context_meter)
+
 # Defining AI Agents/Assistants
 curriculum_content_curator_assistant = AssistantAgent(
     name="curriculum_content_curator",
     model_client=az_model_client,
+    model_context=windowed_context("curriculum_content_curator", LastK(4)),
     tools=[search_resources_agent],
     system_message=(
         "You are the Curriculum Content Curator. You search and curate educational resources (e.g., articles, videos, interactive simulations) "
@@ -136,6 +140,7 @@ curriculum_content_curator_assistant = AssistantAgent(
 activity_assessment_designer_assistant = AssistantAgent(
     name="activity_assessment_designer",
     model_client=az_model_client,
+    model_context=windowed_context("activity_assessment_designer", LastK(4)),
     tools=[design_activities_agent],
     system_message=(
         "You are the Activity and Assessment Designer. You suggest classroom activities and assessments tailored to different learning styles "
@@ -145,6 +150,7 @@ activity_assessment_designer_assistant = AssistantAgent(
 classroom_engagement_optimizer_assistant = AssistantAgent(
     name="classroom_engagement_optimizer",
     model_client=az_model_client,
+    model_context=windowed_context("classroom_engagement_optimizer", LastK(4)),
     tools=[optimize_engagement_agent],
     system_message=(
         "You are the Classroom Engagement Optimizer. You provide strategies and ideas to boost student engagement, including interactive techniques "
@@ -154,6 +160,7 @@ classroom_engagement_optimizer_assistant = AssistantAgent(
 decision_agent_assistant = AssistantAgent(
     name="decision_agent",
     model_client=az_model_client,
+    model_context=windowed_context("decision_agent", TokenBudget(4000)),
     system_message=(
         "You are the Decision Agent. After reviewing the educational resources, activities, and engagement strategies from the other agents, "
         "you generate a cohesive lesson plan and adjust recommendations based on teacher feedback and classroom constraints. "
@@ -164,7 +171,10 @@ decision_agent_assistant = AssistantAgent(
 # Defining Termination Conditions and teams
 text_termination = TextMentionTermination("Lesson Plan Finalized")
 max_message_termination = MaxMessageTermination(10)
-termination = text_termination | max_message_termination
+# Also stop on a wall-clock deadline, a cumulative token budget, or once the Decision Agent's drafts stop changing
+run_budget = RunBudget(deadline_seconds=300, max_tokens=80000, convergence_source="decision_agent")
+budget_termination = BudgetTermination(run_budget)
+termination = text_termination | max_message_termination | budget_termination
 
 lesson_planning_team = RoundRobinGroupChat(
     [
@@ -180,41 +190,103 @@ lesson_planning_team = RoundRobinGroupChat(
 st.title("Multi-Agent Lesson Planner")
 topic = st.text_input("Enter the topic for lesson planning:", "Photosynthesis")
 
+regenerate = st.checkbox("Regenerate (ignore stored plan)")
+
+# Plans already generated for a topic (or a near duplicate of it) are served from the local plan store unless regenerated
+@st.cache_resource
+def get_plan_store():
+    return PlanStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans.sqlite3"), min_similarity=0.75)
+
+plan_store = get_plan_store()
+
 # Create sidebar on page load
 with st.sidebar:
     st.title("Steps Taken by Agents")
+    st.caption(rerun_report())
     log_container = st.empty()
 
+# Runs the team on the background job loop. It must not call st.*; progress goes through job.log
+# and the page polls the job on every rerun.
+async def run_lesson_planning(job, topic: str):
+    # The pool and compactor are shared with concurrent jobs, so count this job's calls separately
+    with grounding_pool.job_stats() as pool_stats, tool_compactor.job_stats() as compaction_stats:
+        return await plan_lesson(job, topic, pool_stats, compaction_stats)
+
+async def plan_lesson(job, topic: str, pool_stats, compaction_stats):
+    context_meter.reset()
+    run_budget.start()
+    started = time.perf_counter()
+
+    # Messages from an interrupted earlier attempt are not replayed, so start from its transcript
+    previous = checkpoints.load(run_key_for(topic))
+    for text in (previous.transcript if previous and previous.status != "complete" else []):
+        job.log(text)
+    final_result = "".join(job.progress)
+    # Token usage of the team's model calls and the grounding runs, per agent and for this run
+    with scope(run=True) as usage_tags:
+        async for task in metered_stream(checkpointed_stream(
+            lesson_planning_team,
+            checkpoints,
+            topic,
+            task=f"Search and curate educational resources, design activities and assessments, "
+                 f"and provide engagement strategies for the topic {topic}. "
+                 f"Then generate a cohesive lesson plan."
+        ), MODEL_DEPLOYMENT_NAME):
+            if hasattr(task, "stop_reason"):
+                # Final TaskResult: report why the team stopped and what it cost so far
+                job.log(run_budget.report(task.stop_reason))
+                job.log(f"Token usage this run: {get_ledger().run_usage(usage_tags['run']).describe()}")
+                continue
+            current = task.content if hasattr(task, "content") else str(task)
+            current_text = (
+                "".join([str(item) for item in current])
+                if isinstance(current, list)
+                else str(current)
+            )
+            final_result += current_text
+            job.log(current_text)  # Log progress in sidebar
+
+    job.log(grounding_pool.report(pool_stats))
+    job.log(tool_compactor.report(compaction_stats))
+    job.log(context_meter.report())
+    job.log(checkpoints.report())
+
+    # Extract only the lesson plan between the header and the marker
+    match = re.search(r'(### Lesson Plan:.*?Lesson Plan Finalized)', final_result, re.DOTALL)
+    lesson_plan = match.group(1) if match else final_result
+    version = plan_store.save(topic, "autogen", lesson_plan, time.perf_counter() - started, run_budget.tokens)
+    job.log(f"Stored plan v{version}")
+    job.log(plan_store.report("autogen"))
+    return lesson_plan
+
+runner = get_job_runner()
 submit_button = st.button("Submit", key="submit_btn")
 
 if submit_button:
+    stored = None if regenerate or not topic.strip() else plan_store.lookup(topic, framework="autogen")
     if not topic.strip():
         st.error("Please enter a topic before submitting.")
+    elif stored:
+        st.session_state.pop("job_id", None)
+        st.sidebar.caption(f"Served stored plan v{stored.version} for '{stored.topic}' ({stored.similarity:.0%} match)")
+        st.sidebar.caption(plan_store.report("autogen"))
+        st.markdown(stored.plan)
+        st.download_button("Download", data=stored.plan, file_name="lesson_plan.md", key="download_btn")
     else:
-        async def run_lesson_planning():
-            final_result = ""
-            progress_logs = []
-            async for task in lesson_planning_team.run_stream(
-                task=f"Search and curate educational resources, design activities and assessments, "
-                     f"and provide engagement strategies for the topic {topic}. "
-                     f"Then generate a cohesive lesson plan."
-            ):
-                current = task.content if hasattr(task, "content") else str(task)
-                current_text = (
-                    "".join([str(item) for item in current])
-                    if isinstance(current, list)
-                    else str(current)
-                )
-                progress_logs.append(current_text)
-                final_result += current_text
-                log_container.write("\n".join(progress_logs))  # Log progress in sidebar
-            return final_result
-
-        final_output = asyncio.run(run_lesson_planning())
-
-        # Extract only the lesson plan between the header and the marker
-        match = re.search(r'(### Lesson Plan:.*?Lesson Plan Finalized)', final_output, re.DOTALL)
-        lesson_plan = match.group(1) if match else final_output
+        st.session_state.job_id = runner.submit(run_lesson_planning, topic, name=f"Lesson plan: {topic}")
+
+# Poll the running job, if any.
+job = runner.get(st.session_state.job_id) if st.session_state.get("job_id") else None
+if job:
+    log_container.write("\n".join(job.progress))
+    if job.active:
+        st.info(f"Agents are planning... ({job.elapsed:.0f}s)")
+        if st.button("Cancel", key="cancel_btn"):
+            runner.cancel(job.id)
+        time.sleep(2)
+        st.rerun()
+    elif job.status == DONE:
+        lesson_plan = job.result
 
         # Show only the lesson plan markdown in the main area
         st.markdown(lesson_plan)
@@ -228,4 +300,6 @@ if submit_button:
                 # Clear the session state to reset the form and outputs
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
-                st.experimental_rerun()
\ No newline at end of file
+                st.experimental_rerun()
+    else:
+        st.error(f"Job {job.status}: {job.error}")
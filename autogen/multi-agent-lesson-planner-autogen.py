@@ -3,12 +3,23 @@ from autogen_agentchat.conditions import MaxMessageTermination, TextMentionTermi
 from autogen_agentchat.teams import RoundRobinGroupChat
 from autogen_agentchat.ui import Console
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from azure.identity import DefaultAzureCredential
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import BingGroundingTool
 import asyncio
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import rate_limit
+from common.autogen_budget import BudgetTermination
+from common.autogen_context import PolicyChatCompletionContext
+from common.autogen_usage import metered_stream
+from common.azure_resources import get_project_client
+from common.budget import RunBudget
+from common.checkpoint import CheckpointStore, checkpointed_stream
+from common.compaction import Compactor
+from common.context_policy import ContextMeter, LastK, TokenBudget
+from common.grounding_pool import GroundingAgentPool
+from common.token_usage import get_ledger, scope
 
 load_dotenv()
 
@@ -20,124 +31,94 @@ MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME")
 MODEL_API_VERSION = os.getenv("MODEL_API_VERSION")
 AOAI_ENDPOINT = os.getenv("AOAI_ENDPOINT")
 
-# Initiate Azure Open AI Client
+# Initiate Azure Open AI Client; its requests queue for the deployment's quota (AGENT_RATE_LIMITS)
 az_model_client = AzureOpenAIChatCompletionClient(
     azure_deployment=MODEL_DEPLOYMENT_NAME,
     model=MODEL_DEPLOYMENT_NAME,
     api_version=MODEL_API_VERSION,
     azure_endpoint=AOAI_ENDPOINT,
-    api_key=AOAI_API_KEY
+    api_key=AOAI_API_KEY,
+    http_client=rate_limit.async_http_client(),
 )
 
-# Initiate Azure AI Project Client
-project_client = AIProjectClient.from_connection_string(
-    credential=DefaultAzureCredential(),
-    conn_str=PROJECT_CONNECTION_STRING,
-)
+# Initiate Azure AI Project Client (the local emulator when AGENTS_EMULATOR is set)
+project_client = get_project_client(PROJECT_CONNECTION_STRING)
 
 # Retrieve the Grounding with Bing Search connection
 bing_connection = project_client.connections.get(connection_name=BING_CONNECTION_NAME)
 conn_id = bing_connection.id
 
+# Grounding agents are created once per process and reused by every tool call
+grounding_pool = GroundingAgentPool(project_client, conn_id)
+
+# Grounded answers are compacted before they enter the group chat, where every agent re-reads them each turn
+tool_compactor = Compactor(max_tokens=400)
+
 # Creating Bing Grounding Tools 
 async def search_resources_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on searching educational resources for 'topic'.
     """
     print(f"[search_resources_tool] Fetching educational resources for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(grounding_pool.ask(
         name="search_resources_tool_agent",
-        instructions=f"Search for educational resources related to {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Search for educational resources related to the topic in the user's request.",
         content=f"Retrieve educational resources for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-
-    project_client.agents.delete_agent(agent.id)
-
-    return messages["data"][0]["content"][0]["text"]["value"]
+    ))
 
 async def design_activities_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on designing classroom activities for 'topic'.
     """
     print(f"[design_activities_tool] Designing classroom activities for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(grounding_pool.ask(
         name="design_activities_tool_agent",
-        instructions=f"Design classroom activities and assessments for {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Design classroom activities and assessments for the topic in the user's request.",
         content=f"Suggest classroom activities and assessments for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-
-    project_client.agents.delete_agent(agent.id)
-
-    return messages["data"][0]["content"][0]["text"]["value"]
+    ))
 
 async def optimize_engagement_tool(topic: str) -> str:
     """
     A dedicated Bing call focusing on optimizing classroom engagement for 'topic'.
     """
     print(f"[optimize_engagement_tool] Optimizing classroom engagement for {topic}...")
-    bing = BingGroundingTool(connection_id=conn_id)
-    agent = project_client.agents.create_agent(
-        model="gpt-4o",
+    return tool_compactor.compact(grounding_pool.ask(
         name="optimize_engagement_tool_agent",
-        instructions=f"Provide strategies to boost student engagement for {topic}.",
-        tools=bing.definitions,
-        headers={"x-ms-enable-preview": "true"}
-    )
-
-    thread = project_client.agents.create_thread()
-    message = project_client.agents.create_message(
-        thread_id=thread.id,
-        role="user",
+        instructions="Provide strategies to boost student engagement for the topic in the user's request.",
         content=f"Provide strategies to boost student engagement for {topic}."
-    )
-    run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent.id)
-    messages = project_client.agents.list_messages(thread_id=thread.id)
-
-    project_client.agents.delete_agent(agent.id)
+    ))
 
-    return messages["data"][0]["content"][0]["text"]["value"]
+# Team state and completed tool calls are checkpointed per topic so an interrupted run resumes
+checkpoints = CheckpointStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints.sqlite3"))
 
 # Creating AI Agent functions
+@checkpoints.cached_tool
 async def search_resources_agent(topic: str) -> str:
     """Agent function for 'search resources', calls search_resources_tool."""
     return await search_resources_tool(topic)
 
+@checkpoints.cached_tool
 async def design_activities_agent(topic: str) -> str:
     """Agent function for 'design activities', calls design_activities_tool."""
     return await design_activities_tool(topic)
 
+@checkpoints.cached_tool
 async def optimize_engagement_agent(topic: str) -> str:
     """Agent function for 'optimize engagement', calls optimize_engagement_tool."""
     return await optimize_engagement_tool(topic)
 
+# Per-agent context policies: the specialists only need the task and the latest turns,
+# the Decision Agent sees everything that fits its token budget plus a summary of the rest.
+context_meter = ContextMeter()
+
+def windowed_context(agent_name, policy):
+    return PolicyChatCompletionContext(agent_name, policy, meter=context_meter)
+
 # Defining AI Agents/Assistants
 curriculum_content_curator_assistant = AssistantAgent(
     name="curriculum_content_curator",
     model_client=az_model_client,
+    model_context=windowed_context("curriculum_content_curator", LastK(4)),
     tools=[search_resources_agent],
     system_message=(
         "You are the Curriculum Content Curator. "
@@ -149,6 +130,7 @@ curriculum_content_curator_assistant = AssistantAgent(
 activity_assessment_designer_assistant = AssistantAgent(
     name="activity_assessment_designer",
     model_client=az_model_client,
+    model_context=windowed_context("activity_assessment_designer", LastK(4)),
     tools=[design_activities_agent],
     system_message=(
         "You are the Activity and Assessment Designer. "
@@ -160,6 +142,7 @@ activity_assessment_designer_assistant = AssistantAgent(
 classroom_engagement_optimizer_assistant = AssistantAgent(
     name="classroom_engagement_optimizer",
     model_client=az_model_client,
+    model_context=windowed_context("classroom_engagement_optimizer", LastK(4)),
     tools=[optimize_engagement_agent],
     system_message=(
         "You are the Classroom Engagement Optimizer. "
@@ -171,6 +154,7 @@ classroom_engagement_optimizer_assistant = AssistantAgent(
 decision_agent_assistant = AssistantAgent(
     name="decision_agent",
     model_client=az_model_client,
+    model_context=windowed_context("decision_agent", TokenBudget(4000)),
     system_message=(
         "You are the Decision Agent. After reviewing the educational resources, activities, and engagement strategies from the other agents, "
         "you generate a cohesive lesson plan and adjust recommendations based on teacher feedback and classroom constraints. "
@@ -181,7 +165,10 @@ decision_agent_assistant = AssistantAgent(
 # Defining Termination Conditions and teams
 text_termination = TextMentionTermination("Lesson Plan Finalized")
 max_message_termination = MaxMessageTermination(10)
-termination = text_termination | max_message_termination
+# Also stop on a wall-clock deadline, a cumulative token budget, or once the Decision Agent's drafts stop changing
+run_budget = RunBudget(deadline_seconds=300, max_tokens=80000, convergence_source="decision_agent")
+budget_termination = BudgetTermination(run_budget)
+termination = text_termination | max_message_termination | budget_termination
 
 lesson_planning_team = RoundRobinGroupChat(
     [
@@ -196,11 +183,32 @@ lesson_planning_team = RoundRobinGroupChat(
 # Main function to run the lesson planning
 async def main():
     topic = "Photosynthesis"
-    await Console(
-        lesson_planning_team.run_stream(
-            task=f"Search and curate educational resources, design activities and assessments, and provide engagement strategies for the topic {topic}. Then generate a cohesive lesson plan."
-        )
-    )
+    grounding_pool.reset_stats()
+    tool_compactor.reset_stats()
+    context_meter.reset()
+    run_budget.start()
+    # Token usage of the team's model calls and the grounding runs, per agent and for this run
+    with scope(run=True) as usage_tags:
+        result = await Console(metered_stream(
+            checkpointed_stream(
+                lesson_planning_team,
+                checkpoints,
+                topic,
+                task=f"Search and curate educational resources, design activities and assessments, and provide engagement strategies for the topic {topic}. Then generate a cohesive lesson plan."
+            ),
+            MODEL_DEPLOYMENT_NAME,
+        ))
+    print(run_budget.report(result.stop_reason if result else None))
+    print(f"This run: {get_ledger().run_usage(usage_tags['run']).describe()}")
+    print(get_ledger().report())
+    print(rate_limit.report())
+    print(grounding_pool.report())
+    print(tool_compactor.report())
+    print(context_meter.report())
+    print(checkpoints.report())
+
+    # Delete the pooled agents and their threads in one batch
+    grounding_pool.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Helpers shared by the demo folders.
+
+The demos are run from inside their own folder (``cd autogen && python ...``),
+so each script adds the repository root to ``sys.path`` before importing from
+this package.
+"""
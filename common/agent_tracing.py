@@ -0,0 +1,475 @@
+"""Tracing spans for Agents service operations.
+
+A grounded tool call or a RAG question is a chain of control-plane requests
+(``create_agent``, ``create_thread``, ``create_message``), a polled run and a
+``list_messages``, and none of it was visible: a slow answer could be the
+model, the polling interval or a throttled request. ``TracedProjectClient``
+wraps a project client (real or emulated) and records every agents and
+connections operation as a span with its duration, status, IDs and, for runs,
+token usage. ``create_and_process_run`` / ``runs.create_and_process`` are
+traced as their parts: the ``create_run``, each ``get_run`` poll and each
+``run.wait`` between polls.
+
+Spans nest through a ``ContextVar``: ``span("grounding_pool.run")`` around a
+tool call makes the operations inside it children of one trace. Finished spans
+are appended to a JSONL file, one OTLP/JSON ``ExportTraceServiceRequest`` per
+line (the format of the OpenTelemetry collector's file exporter), so the file
+can also be replayed into any OTLP backend.
+
+Set ``AGENT_TRACE=trace.jsonl`` and ``get_project_client`` returns a traced
+client. ``python -m common.agent_tracing trace.jsonl`` prints a per-phase
+latency breakdown and a flame-style tree for the recorded traces.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+TRACE_ENV_VAR = "AGENT_TRACE"
+SERVICE_NAME = "az-ai-agent-demos"
+POLL_STATUSES = ("queued", "in_progress", "cancelling")
+
+# Request keyword -> span attribute (OpenTelemetry GenAI names where one exists)
+_REQUEST_ATTRIBUTES = {
+    "thread_id": "gen_ai.thread.id",
+    "run_id": "gen_ai.thread.run.id",
+    "assistant_id": "gen_ai.agent.id",
+    "agent_id": "gen_ai.agent.id",
+    "model": "gen_ai.request.model",
+    "vector_store_id": "vector_store.id",
+    "file_id": "file.id",
+    "connection_name": "connection.name",
+}
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    status: str = "UNSET"
+    message: str = ""
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, **attributes):
+        """Add attributes; ``None`` values are skipped. Dotted names can be passed with ``**{...}``."""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def fail(self, message: str):
+        self.status = "ERROR"
+        self.message = message
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 3 if self.name.startswith(("agents.", "connections.")) else 1,  # CLIENT for service calls
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status], "message": self.message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+    @classmethod
+    def from_otlp(cls, span: Dict[str, Any]) -> "Span":
+        return cls(
+            name=span["name"],
+            trace_id=span["traceId"],
+            span_id=span["spanId"],
+            parent_id=span.get("parentSpanId") or None,
+            start_ns=int(span["startTimeUnixNano"]),
+            end_ns=int(span["endTimeUnixNano"]),
+            status={0: "UNSET", 1: "OK", 2: "ERROR"}[span.get("status", {}).get("code", 0)],
+            message=span.get("status", {}).get("message", ""),
+            attributes={item["key"]: next(iter(item["value"].values())) for item in span.get("attributes", [])},
+        )
+
+
+def _otlp_value(value) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": value}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class JsonlExporter:
+    """Appends each finished span to ``path`` as one OTLP/JSON line; safe to share between threads."""
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def export(self, span: Span):
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp()]}],
+            }]
+        })
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self._usage_reported = OrderedDict()
+        self._usage_lock = threading.Lock()
+
+    def claim_usage(self, trace_id: str, run_id: str) -> bool:
+        """True the first time a trace sees a run's usage, so each run's tokens land on exactly one span."""
+        key = (trace_id, run_id)
+        with self._usage_lock:
+            if key in self._usage_reported:
+                return False
+            self._usage_reported[key] = None
+            if len(self._usage_reported) > 10_000:
+                self._usage_reported.popitem(last=False)
+            return True
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """A child of the current span (or a new trace), exported when the block exits."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+        )
+        span.set(**attributes)
+        token = _current_span.set(span)
+        started = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as exc:
+            span.fail(f"{type(exc).__name__}: {exc}")
+            raise
+        else:
+            if span.status == "UNSET":
+                span.status = "OK"
+        finally:
+            span.end_ns = span.start_ns + time.perf_counter_ns() - started
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def fail(self, message: str):
+        pass
+
+
+_NOOP = _NoopSpan()
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    """The process tracer writing to ``AGENT_TRACE``, or ``None`` when tracing is off."""
+    global _tracer
+    path = os.getenv(TRACE_ENV_VAR)
+    if not path:
+        return None
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(JsonlExporter(path))
+        return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """``Tracer.span`` on the process tracer; a no-op span when tracing is off."""
+    tracer = get_tracer()
+    if tracer is None:
+        yield _NOOP
+        return
+    with tracer.span(name, **attributes) as current:
+        yield current
+
+
+def _describe(tracer: Tracer, current: Span, result):
+    """Span attributes from an SDK result: its ID, run status and error, token usage, list size."""
+    if result is None:
+        return
+    get = result.get if hasattr(result, "get") else lambda key, default=None: getattr(result, key, default)
+    current.set(**{"result.id": get("id"), "result.status": get("status")})
+    data = get("data")
+    if isinstance(data, list):
+        current.set(**{"result.count": len(data)})
+    usage = get("usage")
+    if usage and tracer.claim_usage(current.trace_id, get("id")):
+        usage_get = usage.get if hasattr(usage, "get") else lambda key: getattr(usage, key, None)
+        current.set(**{
+            "gen_ai.usage.input_tokens": usage_get("prompt_tokens"),
+            "gen_ai.usage.output_tokens": usage_get("completion_tokens"),
+        })
+    if get("status") == "failed":
+        current.fail(str(get("last_error")))
+
+
+class _TracedOperations:
+    """Proxy for an operations group (``client.agents``, ``client.agents.runs``, ...) that traces each call."""
+
+    def __init__(self, target, tracer: Tracer, prefix: str):
+        self._target = target
+        self._tracer = tracer
+        self._prefix = prefix
+        self._cache: Dict[str, Any] = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            return getattr(self._target, name)
+        if name in self._cache:
+            return self._cache[name]
+        attr = getattr(self._target, name)
+        if name in ("create_and_process_run", "create_and_process"):
+            wrapped = self._traced_run(name, attr)
+        elif callable(attr):
+            wrapped = self._traced(name, attr)
+        elif hasattr(attr, "__dict__"):
+            # A sub-client such as agents.threads or agents.runs.steps
+            wrapped = _TracedOperations(attr, self._tracer, f"{self._prefix}.{name}")
+        else:
+            return attr
+        self._cache[name] = wrapped
+        return wrapped
+
+    def _traced(self, name: str, method):
+        def call(*args, **kwargs):
+            attributes = {_REQUEST_ATTRIBUTES[key]: str(value) for key, value in kwargs.items() if key in _REQUEST_ATTRIBUTES}
+            with self._tracer.span(f"{self._prefix}.{name}", **attributes) as current:
+                result = method(*args, **kwargs)
+                if hasattr(result, "by_page"):
+                    # ItemPaged fetches on iteration; read it here so the requests fall inside the span
+                    result = list(result)
+                _describe(self._tracer, current, result)
+                return result
+
+        return call
+
+    def _traced_run(self, name: str, method):
+        new_api = name == "create_and_process"
+
+        def call(thread_id: str, *args, **kwargs):
+            if "toolset" in kwargs or args:
+                # Client-side tool calls are resolved inside the SDK helper; trace it as one span
+                return self._traced(name, method)(thread_id, *args, **kwargs)
+            agent_id = kwargs.pop("agent_id" if new_api else "assistant_id")
+            interval = kwargs.pop("polling_interval" if new_api else "sleep_interval", 1)
+            # The emulator scales its delays, including this interval; the SDK sleeps in real time
+            sleep = getattr(self._target, "sleep", time.sleep)
+            if new_api:
+                create = lambda: self.create(thread_id=thread_id, agent_id=agent_id, **kwargs)
+                get = lambda run_id: self.get(thread_id=thread_id, run_id=run_id)
+                cancel = lambda run_id: self.cancel(thread_id=thread_id, run_id=run_id)
+            else:
+                create = lambda: self.create_run(thread_id=thread_id, assistant_id=agent_id, **kwargs)
+                get = lambda run_id: self.get_run(thread_id=thread_id, run_id=run_id)
+                cancel = lambda run_id: self.cancel_run(thread_id=thread_id, run_id=run_id)
+
+            with self._tracer.span(f"{self._prefix}.{name}", **{"gen_ai.thread.id": thread_id, "gen_ai.agent.id": agent_id}) as current:
+                run = create()
+                polls = 0
+                while run.status in POLL_STATUSES + ("requires_action",):
+                    if run.status == "requires_action":
+                        # Same as the SDK without a toolset: the run cannot continue, so cancel it
+                        cancel(run.id)
+                    with self._tracer.span("run.wait", **{"poll.interval_s": interval}):
+                        sleep(interval)
+                    run = get(run.id)
+                    polls += 1
+                current.set(**{"run.polls": polls})
+                _describe(self._tracer, current, run)
+                return run
+
+        return call
+
+
+class TracedProjectClient:
+    """A project client whose ``agents`` and ``connections`` operations are recorded as spans."""
+
+    def __init__(self, client, tracer: Tracer):
+        self._client = client
+        self.agents = _TracedOperations(client.agents, tracer, "agents")
+        self.connections = _TracedOperations(client.connections, tracer, "connections")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._client.__exit__(*exc)
+
+
+def instrument(client, tracer: Optional[Tracer] = None):
+    """``client`` wrapped in a ``TracedProjectClient`` when tracing is on, else ``client`` itself."""
+    tracer = tracer or get_tracer()
+    return client if tracer is None else TracedProjectClient(client, tracer)
+
+
+# -- reporting ----------------------------------------------------------------
+
+
+def load_spans(path: str) -> List[Span]:
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in json.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    spans.extend(Span.from_otlp(span) for span in scope.get("spans", []))
+    return spans
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def _self_seconds(spans: List[Span]) -> Dict[str, float]:
+    """Each span's duration minus its children's: the time spent in that phase itself."""
+    children = defaultdict(float)
+    for s in spans:
+        if s.parent_id:
+            children[s.parent_id] += s.seconds
+    return {s.span_id: max(0.0, s.seconds - children[s.span_id]) for s in spans}
+
+
+def phase_report(spans: List[Span]) -> str:
+    ids = {s.span_id for s in spans}
+    roots = [s for s in spans if s.parent_id not in ids]
+    wall = sum(s.seconds for s in roots)
+    own = _self_seconds(spans)
+    phases = defaultdict(list)
+    for s in spans:
+        phases[s.name].append(s)
+
+    header = f"{'phase':<36} {'count':>6} {'total s':>9} {'self s':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'err':>4} {'self %':>7}"
+    lines = [header, "-" * len(header)]
+    for name, group in sorted(phases.items(), key=lambda item: -sum(own[s.span_id] for s in item[1])):
+        durations = sorted(s.seconds * 1000 for s in group)
+        self_total = sum(own[s.span_id] for s in group)
+        lines.append(
+            f"{name:<36} {len(group):>6} {sum(s.seconds for s in group):>9.2f} {self_total:>8.2f} "
+            f"{_percentile(durations, 50):>9.1f} {_percentile(durations, 95):>9.1f} {durations[-1]:>9.1f} "
+            f"{sum(s.status == 'ERROR' for s in group):>4} {self_total / wall * 100 if wall else 0:>6.1f}%"
+        )
+    return "\n".join(lines)
+
+
+def flame_report(spans: List[Span], width: int = 40) -> str:
+    """Spans merged by their path of names from the root, as an indented tree with time bars."""
+    by_id = {s.span_id: s for s in spans}
+    totals = defaultdict(lambda: [0, 0.0, 0, 0])  # count, seconds, input tokens, output tokens (inclusive)
+    children = defaultdict(set)
+
+    def path(s: Span) -> tuple:
+        names = [s.name]
+        while s.parent_id in by_id:
+            s = by_id[s.parent_id]
+            names.append(s.name)
+        return tuple(reversed(names))
+
+    for s in spans:
+        key = path(s)
+        totals[key][0] += 1
+        totals[key][1] += s.seconds
+        children[key[:-1]].add(key)
+        # Tokens are shown inclusive: a run's usage also counts for every span above it
+        for depth in range(1, len(key) + 1):
+            totals[key[:depth]][2] += s.attributes.get("gen_ai.usage.input_tokens", 0)
+            totals[key[:depth]][3] += s.attributes.get("gen_ai.usage.output_tokens", 0)
+
+    wall = sum(totals[key][1] for key in children[()])
+    lines = []
+
+    def walk(key: tuple, depth: int):
+        count, seconds, input_tokens, output_tokens = totals[key]
+        share = seconds / wall if wall else 0.0
+        label = ("  " * depth + key[-1] + (f" x{count}" if count > 1 else ""))[:48]
+        tokens = f"  {input_tokens}+{output_tokens} tok" if input_tokens or output_tokens else ""
+        lines.append(f"{label:<48} {seconds:>8.2f}s {share * 100:>5.1f}% {'#' * max(1, round(share * width))}{tokens}")
+        for child in sorted(children[key], key=lambda k: -totals[k][1]):
+            walk(child, depth + 1)
+
+    for root in sorted(children[()], key=lambda k: -totals[k][1]):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def summary(spans: List[Span]) -> str:
+    traces = {s.trace_id for s in spans}
+    input_tokens = sum(s.attributes.get("gen_ai.usage.input_tokens", 0) for s in spans)
+    output_tokens = sum(s.attributes.get("gen_ai.usage.output_tokens", 0) for s in spans)
+    errors = sum(s.status == "ERROR" for s in spans)
+    return f"{len(traces)} traces, {len(spans)} spans, {errors} errors, {input_tokens} input + {output_tokens} output tokens"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-phase latency breakdown and flame summary of an agent trace file.")
+    parser.add_argument("path", help="JSONL file written with AGENT_TRACE")
+    parser.add_argument("--trace", help="only this trace ID")
+    parser.add_argument("--last", type=int, help="only the last N traces")
+    parser.add_argument("--width", type=int, default=40, help="width of the flame bars")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path)
+    if args.trace:
+        spans = [s for s in spans if s.trace_id == args.trace]
+    if args.last:
+        started = {}
+        for s in spans:
+            started[s.trace_id] = min(s.start_ns, started.get(s.trace_id, s.start_ns))
+        keep = set(sorted(started, key=started.get)[-args.last:])
+        spans = [s for s in spans if s.trace_id in keep]
+    if not spans:
+        raise SystemExit("No spans found")
+    print(summary(spans))
+    print()
+    print(phase_report(spans))
+    print()
+    print(flame_report(spans, args.width))
@@ -0,0 +1,905 @@
+"""In-process emulator of the Azure AI Agents service.
+
+The ``ai-agent/``, ``connected-agents/`` and ``autogen/`` demos need a live
+Azure AI project, so their client code could not be exercised, profiled or
+benchmarked on a laptop. ``EmulatedProjectClient`` stands in for
+``AIProjectClient`` and implements the operations the demos call:
+
+* the beta API on ``client.agents``: agents, threads, messages, runs
+  (``create_run``/``get_run``/``create_and_process_run``), run steps, files
+  and vector stores, including the ``*_and_poll`` helpers;
+* the sub-client API used by ``connected-agents/main.py``
+  (``client.agents.threads``, ``.messages``, ``.runs`` and ``.runs.steps``);
+* ``client.connections.get``.
+
+``AsyncEmulatedProjectClient`` offers the same operations as coroutines, in
+place of the async client from ``azure.ai.projects.aio``.
+
+Every request sleeps for a latency drawn from a per-operation log-normal
+distribution and may fail with an injected 429 or 500. Injected faults are
+retried the way the SDK's retry policy does (honouring ``Retry-After`` on
+429s) and only reach the caller once ``retries`` is exhausted. Runs, file
+processing and vector-store indexing take simulated time and are observed by
+polling, as with the real service. Replies are either canned (the first
+configured ``match`` substring found in the last user message) or generated
+from a hash of the agent and the message, so IDs, timestamps and text are the
+same on every run with the same configuration.
+
+``get_project_client`` in ``common.azure_resources`` returns the emulator when
+``AGENTS_EMULATOR`` is set: ``1`` for the defaults, or the path of a JSON file
+with ``EmulatorConfig`` fields, e.g.::
+
+    {"seed": 7, "time_scale": 0.05, "throttle_rate": 0.02,
+     "operations": {"run_execution": {"median_ms": 4000, "sigma": 0.8}},
+     "responses": [{"match": "evening", "reply": "Yes, evening classes run Monday to Thursday."}],
+     "agents": [{"id": "asst_orchestrator", "name": "orchestrator"}]}
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, fields, replace
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+from common.tokens import count_tokens
+
+ENV_VAR = "AGENTS_EMULATOR"
+ACTIVE_RUN_STATUSES = ("queued", "in_progress", "requires_action", "cancelling")
+
+
+@dataclass
+class OperationProfile:
+    """Latency and injected faults of one operation.
+
+    Latency is log-normal around ``median_ms``; ``sigma`` is the spread of its
+    logarithm (0 gives a fixed latency, 0.5 puts p95 at ~2.3x the median).
+    """
+
+    median_ms: float = 100.0
+    sigma: float = 0.4
+    throttle_rate: Optional[float] = None
+    failure_rate: Optional[float] = None
+
+
+# Background work that is polled for rather than requested; it has no faults of its own.
+PROCESSING = ("run_execution", "file_processing", "vector_store_indexing")
+
+DEFAULT_OPERATIONS = {
+    "default": OperationProfile(100, 0.4),
+    "create_agent": OperationProfile(250, 0.4),
+    "delete_agent": OperationProfile(150, 0.4),
+    "create_thread": OperationProfile(120, 0.4),
+    "delete_thread": OperationProfile(150, 0.4),
+    "create_message": OperationProfile(100, 0.4),
+    "list_messages": OperationProfile(120, 0.4),
+    "create_run": OperationProfile(200, 0.4),
+    "get_run": OperationProfile(80, 0.4),
+    "list_run_steps": OperationProfile(120, 0.4),
+    "upload_file": OperationProfile(600, 0.5),
+    "create_vector_store": OperationProfile(300, 0.4),
+    "create_vector_store_file": OperationProfile(150, 0.4),
+    "get_connection": OperationProfile(200, 0.4),
+    "run_execution": OperationProfile(2500, 0.6),
+    "file_processing": OperationProfile(1500, 0.5),
+    "vector_store_indexing": OperationProfile(3000, 0.6),
+}
+
+
+@dataclass
+class EmulatorConfig:
+    """Emulator behaviour; every field can be set from the ``AGENTS_EMULATOR`` JSON file.
+
+    ``time_scale`` multiplies every emulated delay, including the SDK-style
+    polling interval, so 0.01 runs a realistic workload 100x faster with the
+    same proportions. ``throttle_rate``/``failure_rate`` apply to every request
+    operation that does not set its own.
+    """
+
+    seed: int = 0
+    time_scale: float = 1.0
+    throttle_rate: float = 0.0
+    failure_rate: float = 0.0
+    run_failure_rate: float = 0.0
+    retries: int = 3
+    retry_after: float = 1.0
+    retry_backoff: float = 0.8
+    reply_words: int = 120
+    clock_start: int = 1_735_689_600
+    operations: Dict[str, OperationProfile] = field(default_factory=lambda: dict(DEFAULT_OPERATIONS))
+    responses: List[Dict[str, str]] = field(default_factory=list)
+    agents: List[Dict[str, Any]] = field(default_factory=list)
+    connections: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmulatorConfig":
+        data = dict(data)
+        unknown = set(data) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown emulator settings: {', '.join(sorted(unknown))}")
+        operations = dict(DEFAULT_OPERATIONS)
+        for name, values in data.pop("operations", {}).items():
+            operations[name] = replace(operations.get(name, operations["default"]), **values)
+        return cls(operations=operations, **data)
+
+    @classmethod
+    def from_env(cls) -> "EmulatorConfig":
+        value = os.getenv(ENV_VAR, "")
+        if value.lower() in ("1", "true", "yes", "on"):
+            return cls()
+        with open(value, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def profile(self, operation: str) -> OperationProfile:
+        profile = self.operations.get(operation) or self.operations["default"]
+        if operation in PROCESSING:
+            return profile
+        return replace(
+            profile,
+            throttle_rate=self.throttle_rate if profile.throttle_rate is None else profile.throttle_rate,
+            failure_rate=self.failure_rate if profile.failure_rate is None else profile.failure_rate,
+        )
+
+
+def enabled() -> bool:
+    """True when ``AGENTS_EMULATOR`` asks for the emulator instead of the real service."""
+    return os.getenv(ENV_VAR, "").lower() not in ("", "0", "false", "no", "off")
+
+
+class Record(dict):
+    """A JSON object readable the two ways SDK models are: ``run["status"]`` and ``run.status``."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return _plain(self)
+
+
+def _record(value):
+    # Builds new containers, so callers never share state with the emulator
+    if isinstance(value, dict):
+        return Record({key: _record(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_record(item) for item in value]
+    return value
+
+
+def _plain(value):
+    """SDK models (tool definitions, tool resources) and mappings as plain JSON values."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if hasattr(value, "as_dict"):
+        return _plain(value.as_dict())
+    return value
+
+
+class _Response:
+    """Just enough of an HTTP response for azure-core exceptions and ``Retry-After`` parsing."""
+
+    REASONS = {400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        self.status_code = status_code
+        self.reason = self.REASONS[status_code]
+        self.headers = {"retry-after": f"{retry_after:g}"} if retry_after is not None else {}
+        self._body = json.dumps({"error": {"code": self.reason.replace(" ", ""), "message": message}})
+
+    def text(self, encoding=None) -> str:
+        return self._body
+
+
+def _http_error(status_code: int, message: str, retry_after: Optional[float] = None) -> HttpResponseError:
+    error_type = ResourceNotFoundError if status_code == 404 else HttpResponseError
+    return error_type(message=message, response=_Response(status_code, message, retry_after))
+
+
+@dataclass
+class EmulatorStats:
+    requests: Counter = field(default_factory=Counter)
+    service_seconds: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    throttled: int = 0
+    failed: int = 0
+    retried: int = 0
+    raised: int = 0
+    runs: int = 0
+    runs_failed: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def report(self) -> str:
+        total = sum(self.requests.values())
+        busiest = ", ".join(
+            f"{name} {count} (~{self.service_seconds[name] / count * 1000:.0f} ms)"
+            for name, count in self.requests.most_common(4)
+        )
+        return (
+            f"Emulator: {total} requests ({self.throttled} throttled, {self.failed} failed, "
+            f"{self.retried} retried, {self.raised} raised) | {self.runs} runs ({self.runs_failed} failed), "
+            f"{self.prompt_tokens + self.completion_tokens} tokens | {busiest}"
+        )
+
+
+_VOCABULARY = (
+    "students learning course module lesson project assessment practice concept example review "
+    "schedule resource activity discussion feedback outcome skill reading exercise quiz topic "
+    "curriculum semester week lab workshop group rubric objective unit guide evaluate explore "
+    "apply compare design explain build analyse present summarise research"
+).split()
+
+
+class AgentsEmulator:
+    """State and behaviour of the emulated service; ``EmulatedProjectClient`` is the SDK-shaped facade.
+
+    All state sits behind one lock, but latency is slept outside it, so
+    concurrent callers overlap the way they do against the real service.
+    """
+
+    def __init__(self, config: Optional[EmulatorConfig] = None):
+        self.config = config or EmulatorConfig()
+        self.stats = EmulatorStats()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._ids = Counter()
+        self._clock = self.config.clock_start
+        self.agents: Dict[str, dict] = {}
+        self.threads: Dict[str, dict] = {}
+        self.messages: Dict[str, List[dict]] = {}
+        self.runs: Dict[str, dict] = {}
+        self.run_steps: Dict[str, List[dict]] = {}
+        self._thread_runs: Dict[str, List[str]] = defaultdict(list)
+        self.files: Dict[str, dict] = {}
+        self.vector_stores: Dict[str, dict] = {}
+        self._ready_at: Dict[str, float] = {}
+        self._doomed_runs = set()
+        for agent in self.config.agents:
+            self._create_agent(**agent)
+
+    # -- timing and faults --------------------------------------------------
+
+    @property
+    def time_scale(self) -> float:
+        return self.config.time_scale
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds * self.config.time_scale)
+
+    def _draw(self, profile: OperationProfile) -> float:
+        if not profile.sigma:
+            return profile.median_ms / 1000
+        return profile.median_ms / 1000 * math.exp(self._rng.gauss(0.0, profile.sigma))
+
+    def request(self, operation: str, action: Callable[[], Any]):
+        """Serve one request: latency, injected faults with SDK-style retries, then ``action`` under the lock."""
+        profile = self.config.profile(operation)
+        attempt = 0
+        while True:
+            with self._lock:
+                latency = self._draw(profile)
+                roll = self._rng.random()
+            self.sleep(latency)
+            status = None
+            if roll < profile.throttle_rate:
+                status = 429
+            elif roll < profile.throttle_rate + profile.failure_rate:
+                status = 500
+            with self._lock:
+                self.stats.requests[operation] += 1
+                self.stats.service_seconds[operation] += latency
+                if status is None:
+                    return _record(action())
+                if status == 429:
+                    self.stats.throttled += 1
+                else:
+                    self.stats.failed += 1
+                if attempt >= self.config.retries:
+                    self.stats.raised += 1
+                    raise _http_error(
+                        status,
+                        f"Emulated {status} on {operation}",
+                        self.config.retry_after if status == 429 else None,
+                    )
+                self.stats.retried += 1
+            attempt += 1
+            # azure-core's RetryPolicy: Retry-After when given, else exponential backoff
+            self.sleep(self.config.retry_after if status == 429 else self.config.retry_backoff * 2 ** (attempt - 1))
+
+    def _new_id(self, prefix: str) -> str:
+        self._ids[prefix] += 1
+        return f"{prefix}_emu{self._ids[prefix]:06d}"
+
+    def _now(self) -> int:
+        # A logical clock: strictly increasing, so sorting by created_at keeps creation order
+        self._clock += 1
+        return self._clock
+
+    def _processing_done_at(self, operation: str) -> float:
+        return time.monotonic() + self._draw(self.config.profile(operation)) * self.config.time_scale
+
+    def _get(self, table: Dict[str, dict], kind: str, object_id: str) -> dict:
+        try:
+            return table[object_id]
+        except KeyError:
+            raise _http_error(404, f"No {kind} found with id '{object_id}'.") from None
+
+    def _deleted(self, table: Dict[str, dict], kind: str, object_id: str, object_type: str) -> dict:
+        self._get(table, kind, object_id)
+        del table[object_id]
+        return {"id": object_id, "object": f"{object_type}.deleted", "deleted": True}
+
+    # -- agents and threads -------------------------------------------------
+
+    def _create_agent(self, model: str = "gpt-4o", name: Optional[str] = None, instructions: Optional[str] = None,
+                      tools=None, tool_resources=None, id: Optional[str] = None, metadata=None, **kwargs) -> dict:
+        agent = {
+            "id": id or self._new_id("asst"),
+            "object": "assistant",
+            "created_at": self._now(),
+            "name": name,
+            "model": model,
+            "instructions": instructions,
+            "tools": _plain(list(tools or [])),
+            "tool_resources": _plain(tool_resources) or {},
+            "metadata": metadata or {},
+        }
+        self.agents[agent["id"]] = agent
+        return agent
+
+    def create_agent(self, **kwargs):
+        kwargs.pop("headers", None)
+        return self.request("create_agent", lambda: self._create_agent(**kwargs))
+
+    def get_agent(self, agent_id: str):
+        return self.request("get_agent", lambda: self._get(self.agents, "assistant", agent_id))
+
+    def delete_agent(self, agent_id: str):
+        return self.request("delete_agent", lambda: self._deleted(self.agents, "assistant", agent_id, "assistant"))
+
+    def create_thread(self, messages=None, metadata=None, **kwargs):
+        def action():
+            thread = {"id": self._new_id("thread"), "object": "thread", "created_at": self._now(),
+                      "metadata": metadata or {}, "tool_resources": {}}
+            self.threads[thread["id"]] = thread
+            self.messages[thread["id"]] = []
+            for message in messages or []:
+                message = _plain(message)
+                self._create_message(thread["id"], message.get("role", "user"), message.get("content", ""))
+            return thread
+
+        return self.request("create_thread", action)
+
+    def delete_thread(self, thread_id: str):
+        def action():
+            result = self._deleted(self.threads, "thread", thread_id, "thread")
+            self.messages.pop(thread_id, None)
+            return result
+
+        return self.request("delete_thread", action)
+
+    # -- messages -----------------------------------------------------------
+
+    def _create_message(self, thread_id: str, role: str, content: str, attachments=None,
+                        assistant_id: Optional[str] = None, run_id: Optional[str] = None) -> dict:
+        message = {
+            "id": self._new_id("msg"),
+            "object": "thread.message",
+            "created_at": self._now(),
+            "thread_id": thread_id,
+            "role": str(getattr(role, "value", role)),
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+            "attachments": _plain(list(attachments or [])),
+            "assistant_id": assistant_id,
+            "run_id": run_id,
+            "metadata": {},
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+    def create_message(self, thread_id: str, role: str, content: str, attachments=None, **kwargs):
+        def action():
+            self._get(self.threads, "thread", thread_id)
+            self._settle_thread(thread_id)
+            if self._active_run(thread_id):
+                raise _http_error(400, f"Can't add messages to {thread_id} while a run is active.")
+            return self._create_message(thread_id, role, content, attachments)
+
+        return self.request("create_message", action)
+
+    def list_messages(self, thread_id: str, order: str = "desc", limit: int = 20, run_id: Optional[str] = None, **kwargs):
+        def action():
+            self._get(self.threads, "thread", thread_id)
+            self._settle_thread(thread_id)
+            messages = [m for m in self.messages[thread_id] if run_id is None or m["run_id"] == run_id]
+            if str(getattr(order, "value", order)).lower().startswith("desc"):
+                messages = messages[::-1]
+            page = messages[:limit]
+            return {
+                "object": "list",
+                "data": page,
+                "first_id": page[0]["id"] if page else None,
+                "last_id": page[-1]["id"] if page else None,
+                "has_more": len(messages) > limit,
+            }
+
+        return self.request("list_messages", action)
+
+    # -- runs ---------------------------------------------------------------
+
+    def create_run(self, thread_id: str, assistant_id: str, instructions: Optional[str] = None, **kwargs):
+        def action():
+            self._get(self.threads, "thread", thread_id)
+            agent = self._get(self.agents, "assistant", assistant_id)
+            self._settle_thread(thread_id)
+            if self._active_run(thread_id):
+                raise _http_error(400, f"Thread {thread_id} already has an active run.")
+            run = {
+                "id": self._new_id("run"),
+                "object": "thread.run",
+                "created_at": self._now(),
+                "thread_id": thread_id,
+                "assistant_id": assistant_id,
+                "status": "queued",
+                "model": agent["model"],
+                "instructions": instructions or agent["instructions"],
+                "tools": agent["tools"],
+                "started_at": None,
+                "completed_at": None,
+                "last_error": None,
+                "usage": None,
+            }
+            self.runs[run["id"]] = run
+            self._thread_runs[thread_id].append(run["id"])
+            self.run_steps[run["id"]] = []
+            self._ready_at[run["id"]] = self._processing_done_at("run_execution")
+            if self._rng.random() < self.config.run_failure_rate:
+                self._doomed_runs.add(run["id"])
+            self.stats.runs += 1
+            return run
+
+        return self.request("create_run", action)
+
+    def get_run(self, thread_id: str, run_id: str):
+        def action():
+            run = self._get(self.runs, "run", run_id)
+            self._settle_run(run)
+            return run
+
+        return self.request("get_run", action)
+
+    def cancel_run(self, thread_id: str, run_id: str):
+        def action():
+            run = self._get(self.runs, "run", run_id)
+            self._settle_run(run)
+            if run["status"] in ACTIVE_RUN_STATUSES:
+                run.update(status="cancelled", completed_at=self._now())
+            return run
+
+        return self.request("cancel_run", action)
+
+    def list_run_steps(self, thread_id: str, run_id: str, order: str = "desc", **kwargs):
+        def action():
+            run = self._get(self.runs, "run", run_id)
+            self._settle_run(run)
+            steps = list(self.run_steps[run_id])
+            if str(getattr(order, "value", order)).lower().startswith("desc"):
+                steps = steps[::-1]
+            return {"object": "list", "data": steps, "has_more": False}
+
+        return self.request("list_run_steps", action)
+
+    def stream_run(self, thread_id: str, assistant_id: str, **kwargs):
+        """Run events as the service streams them: the completion event arrives when the run ends, no polling."""
+        run = self.create_run(thread_id=thread_id, assistant_id=assistant_id, **kwargs)
+        yield "thread.run.created", run, None
+        with self._lock:
+            remaining = self._ready_at[run.id] - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        with self._lock:
+            state = self.runs[run.id]
+            self._settle_run(state)
+            final = _record(state)
+            message = next((_record(m) for m in reversed(self.messages.get(thread_id, [])) if m["run_id"] == run.id), None)
+        if message is not None:
+            yield "thread.message.completed", message, None
+        yield f"thread.run.{final.status}", final, None
+        yield "done", "[DONE]", None
+
+    def _settle_thread(self, thread_id: str):
+        for run_id in self._thread_runs.get(thread_id, ()):
+            self._settle_run(self.runs[run_id])
+
+    def _active_run(self, thread_id: str) -> bool:
+        return any(self.runs[run_id]["status"] in ACTIVE_RUN_STATUSES for run_id in self._thread_runs.get(thread_id, ()))
+
+    def _settle_run(self, run: dict):
+        """Advance ``run`` to the state it has reached by now; a finished run writes its reply and steps."""
+        if run["status"] not in ("queued", "in_progress"):
+            return
+        if run["started_at"] is None:
+            run.update(status="in_progress", started_at=self._now())
+        if time.monotonic() < self._ready_at[run["id"]]:
+            return
+        if run["id"] in self._doomed_runs:
+            run.update(status="failed", completed_at=self._now(),
+                       last_error={"code": "server_error", "message": "Emulated run failure"})
+            self.stats.runs_failed += 1
+            return
+
+        agent = self.agents.get(run["assistant_id"]) or {"name": None, "instructions": ""}
+        history = self.messages.get(run["thread_id"], [])
+        prompt = "\n".join([run["instructions"] or ""] + [m["content"][0]["text"]["value"] for m in history])
+        reply = self._reply(agent, history)
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(reply)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        self.stats.prompt_tokens += usage["prompt_tokens"]
+        self.stats.completion_tokens += usage["completion_tokens"]
+
+        tool_calls = []
+        for tool in run["tools"]:
+            call = {"id": self._new_id("call"), "type": tool.get("type")}
+            if tool.get("type") == "function":
+                call["function"] = {"name": tool.get("function", {}).get("name"), "arguments": "{}", "output": ""}
+            else:
+                call[tool.get("type")] = tool.get(tool.get("type"), {})
+            tool_calls.append(call)
+        if tool_calls:
+            self._add_step(run, "tool_calls", {"type": "tool_calls", "tool_calls": tool_calls})
+        message = self._create_message(run["thread_id"], "assistant", reply,
+                                       assistant_id=run["assistant_id"], run_id=run["id"])
+        self._add_step(run, "message_creation",
+                       {"type": "message_creation", "message_creation": {"message_id": message["id"]}})
+        run.update(status="completed", completed_at=self._now(), usage=usage)
+
+    def _add_step(self, run: dict, step_type: str, details: dict):
+        self.run_steps[run["id"]].append({
+            "id": self._new_id("step"),
+            "object": "thread.run.step",
+            "created_at": self._now(),
+            "run_id": run["id"],
+            "thread_id": run["thread_id"],
+            "assistant_id": run["assistant_id"],
+            "type": step_type,
+            "status": "completed",
+            "step_details": details,
+        })
+
+    def _reply(self, agent: dict, history: List[dict]) -> str:
+        question = next((m["content"][0]["text"]["value"] for m in reversed(history) if m["role"] == "user"), "")
+        for canned in self.config.responses:
+            if canned.get("match", "").lower() in question.lower():
+                return canned["reply"]
+        digest = hashlib.sha256(
+            f"{self.config.seed}|{agent.get('name')}|{agent.get('instructions')}|{question}".encode("utf-8")
+        ).hexdigest()
+        words = random.Random(digest).choices(_VOCABULARY, k=self.config.reply_words)
+        sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+        return f"[{agent.get('name') or 'agent'}, emulated] " + " ".join(sentences)
+
+    # -- files and vector stores --------------------------------------------
+
+    def upload_file(self, file_path: Optional[str] = None, purpose: str = "assistants", filename: Optional[str] = None, **kwargs):
+        def action():
+            name = filename or os.path.basename(file_path or "upload")
+            file = {
+                "id": self._new_id("assistant-file"),
+                "object": "file",
+                "created_at": self._now(),
+                "filename": name,
+                "bytes": os.path.getsize(file_path) if file_path and os.path.isfile(file_path) else 0,
+                "purpose": str(getattr(purpose, "value", purpose)),
+                "status": "uploaded",
+            }
+            self.files[file["id"]] = file
+            self._ready_at[file["id"]] = self._processing_done_at("file_processing")
+            return file
+
+        return self.request("upload_file", action)
+
+    def get_file(self, file_id: str):
+        def action():
+            file = self._get(self.files, "file", file_id)
+            if time.monotonic() >= self._ready_at[file_id]:
+                file["status"] = "processed"
+            return file
+
+        return self.request("get_file", action)
+
+    def delete_file(self, file_id: str):
+        return self.request("delete_file", lambda: self._deleted(self.files, "file", file_id, "file"))
+
+    def create_vector_store(self, file_ids: Optional[List[str]] = None, name: Optional[str] = None, **kwargs):
+        def action():
+            for file_id in file_ids or []:
+                self._get(self.files, "file", file_id)
+            store = {
+                "id": self._new_id("vs"),
+                "object": "vector_store",
+                "created_at": self._now(),
+                "name": name,
+                "status": "in_progress" if file_ids else "completed",
+                "file_ids": list(file_ids or []),
+                "file_counts": {"in_progress": len(file_ids or []), "completed": 0, "failed": 0,
+                                "cancelled": 0, "total": len(file_ids or [])},
+            }
+            self.vector_stores[store["id"]] = store
+            self._ready_at[store["id"]] = self._processing_done_at("vector_store_indexing") if file_ids else time.monotonic()
+            return store
+
+        return self.request("create_vector_store", action)
+
+    def get_vector_store(self, vector_store_id: str):
+        def action():
+            store = self._get(self.vector_stores, "vector store", vector_store_id)
+            if store["status"] == "in_progress" and time.monotonic() >= self._ready_at[vector_store_id]:
+                counts = store["file_counts"]
+                store["status"] = "completed"
+                counts["completed"], counts["in_progress"] = counts["total"], 0
+            return store
+
+        return self.request("get_vector_store", action)
+
+    def create_vector_store_file(self, vector_store_id: str, file_id: str, **kwargs):
+        """Add an uploaded file to a store; the store is in progress again until the file is indexed."""
+        def action():
+            store = self._get(self.vector_stores, "vector store", vector_store_id)
+            self._get(self.files, "file", file_id)
+            store["file_ids"].append(file_id)
+            store["file_counts"]["in_progress"] += 1
+            store["file_counts"]["total"] += 1
+            store["status"] = "in_progress"
+            ready_at = self._ready_at[f"{vector_store_id}/{file_id}"] = self._processing_done_at("vector_store_indexing")
+            self._ready_at[vector_store_id] = max(self._ready_at[vector_store_id], ready_at)
+            return self._vector_store_file(vector_store_id, file_id)
+
+        return self.request("create_vector_store_file", action)
+
+    def _vector_store_file(self, vector_store_id: str, file_id: str) -> dict:
+        done = time.monotonic() >= self._ready_at[f"{vector_store_id}/{file_id}"]
+        return {"id": file_id, "object": "vector_store.file", "vector_store_id": vector_store_id,
+                "status": "completed" if done else "in_progress"}
+
+    def get_vector_store_file(self, vector_store_id: str, file_id: str):
+        def action():
+            store = self._get(self.vector_stores, "vector store", vector_store_id)
+            if f"{vector_store_id}/{file_id}" not in self._ready_at or file_id not in store["file_ids"]:
+                raise _http_error(404, f"No file '{file_id}' in vector store '{vector_store_id}'.")
+            return self._vector_store_file(vector_store_id, file_id)
+
+        return self.request("get_vector_store_file", action)
+
+    def delete_vector_store(self, vector_store_id: str):
+        return self.request(
+            "delete_vector_store",
+            lambda: self._deleted(self.vector_stores, "vector store", vector_store_id, "vector_store"),
+        )
+
+    # -- connections --------------------------------------------------------
+
+    def get_connection(self, connection_name: str):
+        connection_id = self.config.connections.get(
+            connection_name,
+            f"/subscriptions/emulator/resourceGroups/emulator/providers/Microsoft.MachineLearningServices"
+            f"/workspaces/emulator/connections/{connection_name}",
+        )
+        return self.request("get_connection", lambda: {"id": connection_id, "name": connection_name})
+
+
+def _poll(emulator: AgentsEmulator, get: Callable[[], Record], pending: tuple, sleep_interval: float) -> Record:
+    # The SDK helpers poll on a fixed interval; emulated the same way so their cost is visible
+    current = get()
+    while current.status in pending:
+        emulator.sleep(sleep_interval)
+        current = get()
+    return current
+
+
+class _EventStream:
+    """Context manager over run events, iterated as ``(event_type, event_data, None)`` like the SDK stream."""
+
+    def __init__(self, events):
+        self._events = events
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._events.close()
+
+    def __iter__(self):
+        return self._events
+
+
+class AgentsOperations:
+    """``project_client.agents``: the beta API plus the ``threads``/``messages``/``runs`` sub-clients."""
+
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+        self.threads = _Threads(emulator)
+        self.messages = _Messages(emulator)
+        self.runs = _Runs(emulator)
+
+    def __getattr__(self, name):
+        # create_agent, create_thread, list_messages, delete_vector_store, ... map straight onto the emulator
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._emulator, name)
+
+    def create_and_process_run(self, thread_id: str, assistant_id: str, sleep_interval: float = 1, **kwargs):
+        run = self._emulator.create_run(thread_id=thread_id, assistant_id=assistant_id, **kwargs)
+        return _poll(self._emulator, lambda: self._emulator.get_run(thread_id, run.id), ACTIVE_RUN_STATUSES, sleep_interval)
+
+    def create_stream(self, thread_id: str, assistant_id: str, **kwargs):
+        return _EventStream(self._emulator.stream_run(thread_id, assistant_id, **kwargs))
+
+    def upload_file_and_poll(self, file_path: Optional[str] = None, purpose: str = "assistants", sleep_interval: float = 1, **kwargs):
+        file = self._emulator.upload_file(file_path=file_path, purpose=purpose, **kwargs)
+        return _poll(self._emulator, lambda: self._emulator.get_file(file.id), ("uploaded", "pending"), sleep_interval)
+
+    def create_vector_store_and_poll(self, file_ids: Optional[List[str]] = None, name: Optional[str] = None,
+                                     sleep_interval: float = 1, **kwargs):
+        store = self._emulator.create_vector_store(file_ids=file_ids, name=name, **kwargs)
+        return _poll(self._emulator, lambda: self._emulator.get_vector_store(store.id), ("in_progress",), sleep_interval)
+
+    def create_vector_store_file_and_poll(self, vector_store_id: str, file_id: Optional[str] = None,
+                                          sleep_interval: float = 1, **kwargs):
+        self._emulator.create_vector_store_file(vector_store_id=vector_store_id, file_id=file_id, **kwargs)
+        return _poll(self._emulator, lambda: self._emulator.get_vector_store_file(vector_store_id, file_id),
+                     ("in_progress",), sleep_interval)
+
+
+class _Threads:
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+
+    def create(self, **kwargs):
+        return self._emulator.create_thread(**kwargs)
+
+    def delete(self, thread_id: str):
+        return self._emulator.delete_thread(thread_id)
+
+
+class _Messages:
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+
+    def create(self, thread_id: str, role: str, content: str, **kwargs):
+        return self._emulator.create_message(thread_id=thread_id, role=role, content=content, **kwargs)
+
+    def list(self, thread_id: str, order: str = "desc", limit: int = 100, **kwargs):
+        page = self._emulator.list_messages(thread_id=thread_id, order=order, limit=limit, **kwargs)
+        for message in page.data:
+            # ThreadMessage.text_messages: the text content blocks
+            message["text_messages"] = [block for block in message.content if block.type == "text"]
+        return iter(page.data)
+
+
+class _RunSteps:
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+
+    def list(self, thread_id: str, run_id: str, **kwargs):
+        return iter(self._emulator.list_run_steps(thread_id=thread_id, run_id=run_id, **kwargs).data)
+
+
+class _Runs:
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+        self.steps = _RunSteps(emulator)
+        # Polling helpers wrapped around this client (tracing) sleep through this, so time_scale applies
+        self.sleep = emulator.sleep
+
+    def create(self, thread_id: str, agent_id: str, **kwargs):
+        return self._emulator.create_run(thread_id=thread_id, assistant_id=agent_id, **kwargs)
+
+    def get(self, thread_id: str, run_id: str):
+        return self._emulator.get_run(thread_id, run_id)
+
+    def cancel(self, thread_id: str, run_id: str):
+        return self._emulator.cancel_run(thread_id, run_id)
+
+    def stream(self, thread_id: str, agent_id: str, **kwargs):
+        return _EventStream(self._emulator.stream_run(thread_id, agent_id, **kwargs))
+
+    def create_and_process(self, thread_id: str, agent_id: str, polling_interval: float = 1, **kwargs):
+        run = self.create(thread_id=thread_id, agent_id=agent_id, **kwargs)
+        return _poll(self._emulator, lambda: self.get(thread_id, run.id), ACTIVE_RUN_STATUSES, polling_interval)
+
+
+class _Connections:
+    def __init__(self, emulator: AgentsEmulator):
+        self._emulator = emulator
+
+    def get(self, connection_name: str, **kwargs):
+        return self._emulator.get_connection(connection_name)
+
+
+class EmulatedProjectClient:
+    """Drop-in for ``AIProjectClient`` backed by an ``AgentsEmulator``."""
+
+    def __init__(self, config: Optional[EmulatorConfig] = None, emulator: Optional[AgentsEmulator] = None):
+        self.emulator = emulator or AgentsEmulator(config)
+        self.agents = AgentsOperations(self.emulator)
+        self.connections = _Connections(self.emulator)
+
+    @classmethod
+    def from_env(cls) -> "EmulatedProjectClient":
+        return cls(EmulatorConfig.from_env())
+
+    @property
+    def stats(self) -> EmulatorStats:
+        return self.emulator.stats
+
+    def close(self):
+        # Nothing to release; the client stays usable, like a cached real client
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _AsyncOperations:
+    """Async facade over an operations group: each call runs the sync operation in a worker thread.
+
+    Emulated latency is slept in that thread, so concurrently awaited calls
+    overlap the way concurrent requests from ``azure.ai.projects.aio`` do.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self._target, name)
+        if callable(attr):
+            async def call(*args, **kwargs):
+                return await asyncio.to_thread(attr, *args, **kwargs)
+
+            return call
+        if hasattr(attr, "__dict__"):
+            # A sub-client such as agents.threads or agents.runs.steps
+            return _AsyncOperations(attr)
+        return attr
+
+
+class AsyncEmulatedProjectClient:
+    """Drop-in for the async ``azure.ai.projects.aio.AIProjectClient`` backed by an ``AgentsEmulator``."""
+
+    def __init__(self, config: Optional[EmulatorConfig] = None, emulator: Optional[AgentsEmulator] = None):
+        self.emulator = emulator or AgentsEmulator(config)
+        self.agents = _AsyncOperations(AgentsOperations(self.emulator))
+        self.connections = _AsyncOperations(_Connections(self.emulator))
+
+    @classmethod
+    def from_env(cls) -> "AsyncEmulatedProjectClient":
+        return cls(EmulatorConfig.from_env())
+
+    @property
+    def stats(self) -> EmulatorStats:
+        return self.emulator.stats
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,163 @@
+"""Setup steps run as an async dependency graph, with a critical-path report.
+
+A demo's setup is usually a chain of service calls written one after
+another, although only some of them depend on each other.
+``ai-agent/ai-agent-rag.py`` uploads a file, indexes it, creates the agent,
+then the thread, then the message, and only then starts the run. Creating the
+thread and message needs nothing from ingestion, and creating the agent only
+needs the vector store's ID. ``Pipeline`` declares each step with the steps it
+needs and runs every step as soon as its inputs are ready:
+
+    pipeline = Pipeline("rag.setup")
+
+    @pipeline.step("thread")
+    async def thread():
+        return await agents.create_thread()
+
+    @pipeline.step("message", "thread")
+    async def message(thread):
+        return await agents.create_message(thread_id=thread.id, role="user", content=question)
+
+    results = await pipeline.run()
+
+Each step receives the results of the steps it names as keyword arguments and
+runs in its own agent_tracing span. If a step fails, steps that have not
+started are skipped. Steps already in flight finish, because a cancelled
+request may still have created its resource. The results of completed steps
+stay in ``pipeline.results``, so the caller can clean up. ``sequential=True`` runs the same steps one at a time
+in declaration order, as a baseline.
+
+``report()`` compares, from the measured step durations:
+
+* sequential: the sum of all steps, which is what the chained version waits;
+* critical path: the longest dependency chain, which bounds any schedule;
+* wall: what this run took.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from common.agent_tracing import span
+
+
+class StepSkipped(Exception):
+    """A step was not started because another step had failed."""
+
+
+@dataclass
+class StepTiming:
+    name: str
+    needs: Tuple[str, ...]
+    started: float = 0.0
+    finished: float = 0.0
+
+    @property
+    def seconds(self) -> float:
+        return self.finished - self.started
+
+
+@dataclass
+class PipelineTimings:
+    steps: Dict[str, StepTiming] = field(default_factory=dict)
+    wall: float = 0.0
+
+    @property
+    def sequential(self) -> float:
+        return sum(step.seconds for step in self.steps.values())
+
+    def critical_path(self) -> Tuple[float, List[str]]:
+        """Length and steps of the longest dependency chain, by measured duration."""
+        longest: Dict[str, Tuple[float, List[str]]] = {}
+        for name, step in self.steps.items():
+            # Steps are declared after the steps they need, so their chains are already known
+            before = max((longest[need] for need in step.needs if need in longest), default=(0.0, []))
+            longest[name] = (before[0] + step.seconds, before[1] + [name])
+        return max(longest.values(), default=(0.0, []))
+
+
+class Pipeline:
+    """Async steps with dependencies; independent steps run concurrently."""
+
+    def __init__(self, name: str, sequential: bool = False, time_scale: float = 1.0):
+        self.name = name
+        self.sequential = sequential
+        # With the local emulator, durations are divided by its time_scale to report service seconds
+        self.time_scale = time_scale
+        self.results: Dict[str, Any] = {}
+        self.timings = PipelineTimings()
+        self._steps: Dict[str, Tuple[Callable[..., Awaitable[Any]], Tuple[str, ...]]] = {}
+        self._failed = False
+
+    def step(self, name: str, *needs: str):
+        """Decorator registering an async step that needs the results of ``needs``."""
+        for need in needs:
+            if need not in self._steps:
+                raise ValueError(f"step {name!r} needs {need!r}, which is not declared before it")
+
+        def register(fn: Callable[..., Awaitable[Any]]):
+            self._steps[name] = (fn, needs)
+            return fn
+
+        return register
+
+    async def _run_step(self, name: str, origin: float, tasks: Optional[Dict[str, "asyncio.Task"]] = None):
+        fn, needs = self._steps[name]
+        if tasks is None:
+            inputs = {need: self.results[need] for need in needs}
+        else:
+            inputs = {need: await tasks[need] for need in needs}
+        if self._failed:
+            raise StepSkipped(name)
+        timing = self.timings.steps[name]
+        timing.started = (time.perf_counter() - origin) / self.time_scale
+        with span(f"{self.name}.{name}", **{"step.needs": ",".join(needs)}):
+            result = await fn(**inputs)
+        timing.finished = (time.perf_counter() - origin) / self.time_scale
+        self.results[name] = result
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step once and return the results by step name."""
+        self.results = {}
+        self._failed = False
+        self.timings = PipelineTimings({name: StepTiming(name, needs) for name, (_, needs) in self._steps.items()})
+        origin = time.perf_counter()
+        with span(self.name, **{"pipeline.sequential": self.sequential, "pipeline.steps": len(self._steps)}):
+            try:
+                if self.sequential:
+                    for name in self._steps:
+                        await self._run_step(name, origin)
+                else:
+                    await self._run_graph(origin)
+            finally:
+                self.timings.wall = (time.perf_counter() - origin) / self.time_scale
+        return self.results
+
+    async def _run_graph(self, origin: float):
+        tasks: Dict[str, asyncio.Task] = {}
+        for name in self._steps:
+            # Tasks copy the current context, so step spans nest under the pipeline span
+            tasks[name] = asyncio.ensure_future(self._run_step(name, origin, tasks))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            self._failed = True
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+    def report(self, baseline: Optional[PipelineTimings] = None) -> str:
+        """Sequential vs. critical-path latency of this run, and the wall time of ``baseline`` if given."""
+        t = self.timings
+        critical, path = t.critical_path()
+        sequential = t.sequential
+        parts = [
+            f"{self.name}: {len(t.steps)} steps, {sequential:.2f}s in sequence",
+            f"critical path {critical:.2f}s ({' -> '.join(path)}), "
+            f"{1 - critical / sequential if sequential else 0.0:.0%} shorter",
+            f"wall {t.wall:.2f}s" + (" (sequential run)" if self.sequential else ""),
+        ]
+        if baseline is not None and baseline.wall:
+            parts.append(f"vs. {baseline.wall:.2f}s sequential wall, {1 - t.wall / baseline.wall:.0%} less")
+        return " | ".join(parts)
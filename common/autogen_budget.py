@@ -0,0 +1,49 @@
+"""AutoGen termination condition backed by ``common.budget.RunBudget``."""
+
+from typing import Sequence
+
+from autogen_agentchat.base import TerminatedException, TerminationCondition
+from autogen_agentchat.messages import StopMessage
+
+from common.budget import RunBudget
+
+
+def _text(message) -> str:
+    content = getattr(message, "content", "")
+    if isinstance(content, list):
+        return "".join(str(item) for item in content)
+    return str(content)
+
+
+class BudgetTermination(TerminationCondition):
+    """Terminates a team on a wall-clock deadline, a token budget or plan convergence.
+
+    Combine it with the existing conditions, e.g.
+    ``TextMentionTermination(...) | MaxMessageTermination(10) | BudgetTermination(budget)``.
+    The budget is not cleared when the team resets the condition, so the cost
+    at the stopping point can still be reported afterwards; call
+    ``budget.start()`` before each run.
+    """
+
+    def __init__(self, budget: RunBudget):
+        self.budget = budget
+        self._terminated = False
+
+    @property
+    def terminated(self) -> bool:
+        return self._terminated
+
+    async def __call__(self, messages: Sequence) -> StopMessage | None:
+        if self._terminated:
+            raise TerminatedException("Termination condition has already been reached")
+        for message in messages:
+            usage = getattr(message, "models_usage", None)
+            tokens = (usage.prompt_tokens + usage.completion_tokens) if usage else 0
+            reason = self.budget.observe(getattr(message, "source", ""), _text(message), tokens)
+            if reason:
+                self._terminated = True
+                return StopMessage(content=f"Budget termination: {reason}", source="BudgetTermination")
+        return None
+
+    async def reset(self) -> None:
+        self._terminated = False
@@ -0,0 +1,64 @@
+"""AutoGen adapter for the context policies in ``common.context_policy``."""
+
+from typing import List, Optional
+
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import FunctionExecutionResultMessage, LLMMessage, SystemMessage, UserMessage
+
+from common.context_policy import ContextMessage, ContextMeter, ContextPolicy
+
+
+def _text(message: LLMMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return "\n".join(str(getattr(item, "content", None) or getattr(item, "arguments", None) or item) for item in content)
+    return str(content)
+
+
+def _to_units(messages: List[LLMMessage]) -> List[ContextMessage]:
+    # A tool call and its results must stay together, otherwise the model API rejects the prompt.
+    units = []
+    for message in messages:
+        if isinstance(message, FunctionExecutionResultMessage):
+            if units:
+                units[-1].original.append(message)
+                units[-1].text += "\n" + _text(message)
+            continue
+        source = getattr(message, "source", None) or "user"
+        units.append(ContextMessage(source=source, text=_text(message), original=[message]))
+    return units
+
+
+class PolicyChatCompletionContext(ChatCompletionContext):
+    """Model context that shows an ``AssistantAgent`` only the history its policy allows.
+
+    Pass it as ``AssistantAgent(model_context=...)``. The full history is still
+    stored, so team state saves and restores unchanged.
+    """
+
+    def __init__(
+        self,
+        agent_name: str,
+        policy: ContextPolicy,
+        meter: Optional[ContextMeter] = None,
+        initial_messages: Optional[List[LLMMessage]] = None,
+    ):
+        super().__init__(initial_messages)
+        self._agent_name = agent_name
+        self._policy = policy
+        self._meter = meter
+
+    async def get_messages(self) -> List[LLMMessage]:
+        system = [m for m in self._messages if isinstance(m, SystemMessage)]
+        units = _to_units([m for m in self._messages if not isinstance(m, SystemMessage)])
+        windowed = self._policy.apply(units)
+        if self._meter is not None:
+            self._meter.record(self._agent_name, units, windowed)
+
+        messages = list(system)
+        for unit in windowed:
+            if unit.original is None:
+                messages.append(UserMessage(content=unit.text, source=unit.source))
+            else:
+                messages.extend(unit.original)
+        return messages
@@ -0,0 +1,20 @@
+"""AutoGen team streams metered into ``common.token_usage``."""
+
+from typing import AsyncIterator, Optional
+
+from common import token_usage
+
+
+async def metered_stream(stream: AsyncIterator, model: str, ledger: Optional[token_usage.UsageLedger] = None):
+    """Yield every item of a ``run_stream`` unchanged, recording each message's ``models_usage``.
+
+    AutoGen reports usage per message (agent replies and tool-call requests)
+    without the model name, so ``model`` is the deployment the team's model
+    client calls. The final ``TaskResult`` has no usage of its own.
+    """
+    ledger = ledger or token_usage.get_ledger()
+    async for item in stream:
+        usage = getattr(item, "models_usage", None)
+        if usage is not None:
+            ledger.record(usage, model=model, agent=getattr(item, "source", None))
+        yield item
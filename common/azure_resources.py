@@ -0,0 +1,278 @@
+"""Process-wide Azure credentials, project clients and connection IDs.
+
+Streamlit re-executes a script on every interaction, and several demos built
+``DefaultAzureCredential()``, ``AIProjectClient.from_connection_string(...)``
+and ``project_client.connections.get(...)`` (a network call) at module level,
+so every click paid for credential discovery, a token request and a
+connection lookup. The getters here build each resource once per process:
+
+* ``get_credential`` wraps ``DefaultAzureCredential`` and caches tokens per
+  scope, refreshing them ``TOKEN_REFRESH_MARGIN`` seconds before expiry.
+* ``get_project_client`` returns one ``AIProjectClient`` per connection string
+  or endpoint, or the local emulator from ``common.agents_emulator`` when
+  ``AGENTS_EMULATOR`` is set, paced by the ``agents`` limiter from
+  ``common.rate_limit``, wrapped in tracing spans when ``AGENT_TRACE`` is set,
+  and tracked by ``common.resource_tracker`` so the agents, threads, vector
+  stores and files it creates are cleaned up.
+* ``get_async_project_client`` builds an async ``AIProjectClient``
+  (``azure.ai.projects.aio``) that shares the cached tokens. It builds a new
+  client per call, because async clients belong to one event loop.
+* ``get_connection_id`` caches connection IDs and re-validates them every
+  ``CONNECTION_CHECK_SECONDS``. If the lookup fails, the cached entry is
+  dropped and rebuilt on the next call.
+
+Each getter records what a cold build cost; ``begin_rerun`` and
+``rerun_report`` show the time the current rerun saved by reusing resources.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient as AsyncAIProjectClient
+from azure.core.credentials import AccessToken
+from azure.identity import DefaultAzureCredential
+
+from common import agent_tracing, agents_emulator, rate_limit, resource_tracker
+
+TOKEN_REFRESH_MARGIN = 300
+CONNECTION_CHECK_SECONDS = 3600
+
+
+class CachedTokenCredential:
+    """Token cache in front of another credential; one token request per scope until it nears expiry."""
+
+    def __init__(self, inner, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.inner = inner
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[tuple, AccessToken] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+
+    def get_token(self, *scopes, **kwargs) -> AccessToken:
+        key = (scopes, kwargs.get("tenant_id"), kwargs.get("claims"))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and token.expires_on - self.refresh_margin > time.time() and not kwargs.get("claims"):
+                self.hits += 1
+                return token
+        token = self.inner.get_token(*scopes, **kwargs)
+        with self._lock:
+            self.requests += 1
+            self._tokens[key] = token
+        return token
+
+    def close(self):
+        close = getattr(self.inner, "close", None)
+        if close:
+            close()
+
+
+class AsyncCachedTokenCredential:
+    """A ``CachedTokenCredential`` for async clients; cache misses are requested in a worker thread."""
+
+    def __init__(self, inner: CachedTokenCredential):
+        self.inner = inner
+
+    async def get_token(self, *scopes, **kwargs) -> AccessToken:
+        return await asyncio.to_thread(self.inner.get_token, *scopes, **kwargs)
+
+    async def close(self):
+        # The wrapped credential is shared with the sync clients
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    build_seconds: float
+    checked_at: float
+
+
+@dataclass
+class _RerunLedger:
+    reused: List[tuple] = field(default_factory=list)
+    built: List[tuple] = field(default_factory=list)
+
+
+class ResourceCache:
+    """Builds resources on first use and hands out the same object afterwards.
+
+    ``max_age``/``check`` give a health-checked refresh: after ``max_age``
+    seconds the entry is checked (or rebuilt when no check is given). A failing
+    check drops the entry and builds a fresh one.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        # Guards the dicts only; builds and checks run under the key's own lock
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, Any] = {}
+        self._ledger = threading.local()
+
+    def get(self, key: str, factory: Callable[[], Any], max_age: Optional[float] = None, check: Optional[Callable[[Any], None]] = None):
+        with self._lock:
+            entry = self._entries.get(key)
+            key_lock = self._key_locks.setdefault(key, threading.RLock())
+        if entry is not None and not self._expired(entry, max_age):
+            return self._reuse(key, entry)
+        # Building or re-checking can take seconds (credential discovery, connections.get), so it holds only
+        # this key's lock. While an existing entry is re-checked, other callers keep using it.
+        if entry is not None:
+            if not key_lock.acquire(blocking=False):
+                return self._reuse(key, entry)
+        else:
+            key_lock.acquire()
+        try:
+            with self._lock:
+                # Built or re-checked by whoever held the key lock before us
+                entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, max_age):
+                try:
+                    if check is None:
+                        raise LookupError("expired")
+                    check(entry.value)
+                    entry.checked_at = time.monotonic()
+                except Exception:
+                    entry = None
+                    with self._lock:
+                        self._entries.pop(key, None)
+            if entry is not None:
+                return self._reuse(key, entry)
+
+            started = time.perf_counter()
+            value = factory()
+            build_seconds = time.perf_counter() - started
+            with self._lock:
+                self._entries[key] = _Entry(value, build_seconds, time.monotonic())
+            self._record("built", key, build_seconds)
+            return value
+        finally:
+            key_lock.release()
+
+    def peek(self, key: str) -> Optional[Any]:
+        """The cached value for ``key``, or None; never builds, checks or counts as reuse."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    @staticmethod
+    def _expired(entry: _Entry, max_age: Optional[float]) -> bool:
+        return max_age is not None and time.monotonic() - entry.checked_at > max_age
+
+    def _reuse(self, key: str, entry: _Entry):
+        self._record("reused", key, entry.build_seconds)
+        return entry.value
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry (or all) so the next ``get`` rebuilds it, e.g. after a call failed with 401/404."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _record(self, kind: str, key: str, seconds: float):
+        ledger = getattr(self._ledger, "current", None)
+        if ledger is not None:
+            getattr(ledger, kind).append((key, seconds))
+
+    def begin_rerun(self):
+        """Start counting reuse for this script run (per thread, so concurrent sessions do not mix)."""
+        self._ledger.current = _RerunLedger()
+
+    def rerun_report(self) -> str:
+        """Time this run saved by reusing resources (their cold build cost) and what it had to build."""
+        ledger = getattr(self._ledger, "current", None)
+        if ledger is None:
+            return "Resource reuse not tracked for this run"
+        saved = sum(seconds for _, seconds in ledger.reused)
+        parts = [f"reused {len(ledger.reused)} resources, saved ~{saved * 1000:.0f} ms"]
+        if ledger.built:
+            built = sum(seconds for _, seconds in ledger.built)
+            parts.append(f"built {', '.join(key.split(':')[0] for key, _ in ledger.built)} in {built * 1000:.0f} ms")
+        return "; ".join(parts)
+
+
+resources = ResourceCache()
+begin_rerun = resources.begin_rerun
+
+
+def rerun_report() -> str:
+    report = resources.rerun_report()
+    credential = resources.peek("credential")
+    if credential is not None:
+        report += f"; tokens {credential.hits} served from cache, {credential.requests} requested"
+    return "Azure resources: " + report
+
+
+def get_credential() -> CachedTokenCredential:
+    return resources.get("credential", lambda: CachedTokenCredential(DefaultAzureCredential()))
+
+
+def get_project_client(conn_str: Optional[str] = None, endpoint: Optional[str] = None):
+    """The ``AIProjectClient`` for ``conn_str`` (default ``PROJECT_CONNECTION_STRING``), or for a project
+    ``endpoint`` with the newer SDK. With ``AGENTS_EMULATOR`` set, the emulated client instead. Agents calls
+    are rate limited (``AGENT_RATE_LIMITS``), with ``AGENT_TRACE`` set they are traced, and the resources they
+    create are tracked (``client.resource_tracker``). Do not close it.
+    """
+    if agents_emulator.enabled():
+        key, factory = "project_client:emulator", agents_emulator.EmulatedProjectClient.from_env
+    elif endpoint:
+        key, factory = f"project_client:{endpoint}", lambda: AIProjectClient(credential=get_credential(), endpoint=endpoint)
+    else:
+        conn_str = conn_str or os.getenv("PROJECT_CONNECTION_STRING")
+        key, factory = (
+            f"project_client:{conn_str}",
+            lambda: AIProjectClient.from_connection_string(credential=get_credential(), conn_str=conn_str),
+        )
+    return resources.get(
+        key,
+        lambda: resource_tracker.track(agent_tracing.instrument(rate_limit.limit_agents(factory())), namespace=key),
+    )
+
+
+def get_async_project_client(conn_str: Optional[str] = None, endpoint: Optional[str] = None):
+    """A new async ``AIProjectClient`` for ``conn_str`` (default ``PROJECT_CONNECTION_STRING``) or ``endpoint``,
+    or the async emulated client with ``AGENTS_EMULATOR`` set. Use it as ``async with`` inside the event loop
+    that calls it. It is not rate limited, traced per call or resource-tracked, so callers delete what they
+    create.
+    """
+    if agents_emulator.enabled():
+        return agents_emulator.AsyncEmulatedProjectClient.from_env()
+    credential = AsyncCachedTokenCredential(get_credential())
+    if endpoint:
+        return AsyncAIProjectClient(credential=credential, endpoint=endpoint)
+    return AsyncAIProjectClient.from_connection_string(
+        credential=credential, conn_str=conn_str or os.getenv("PROJECT_CONNECTION_STRING")
+    )
+
+
+def get_connection_id(connection_name: str, conn_str: Optional[str] = None) -> str:
+    """ID of a project connection such as the Bing grounding connection; re-validated hourly."""
+    project_client = get_project_client(conn_str)
+
+    def lookup():
+        return project_client.connections.get(connection_name=connection_name).id
+
+    def check(connection_id):
+        if lookup() != connection_id:
+            raise LookupError(f"connection {connection_name} changed")
+
+    return resources.get(
+        f"connection:{conn_str or os.getenv('PROJECT_CONNECTION_STRING')}:{connection_name}",
+        lookup,
+        max_age=CONNECTION_CHECK_SECONDS,
+        check=check,
+    )
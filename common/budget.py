@@ -0,0 +1,72 @@
+"""Wall-clock, token and convergence budgets for multi-agent runs.
+
+``RunBudget`` is framework neutral: the AutoGen termination condition in
+``autogen_budget`` and the Semantic Kernel termination strategy in
+``sk_budget`` feed it every message and stop the chat when it reports a reason.
+"""
+
+import time
+from typing import Optional
+
+from common.similarity import text_similarity
+
+
+class RunBudget:
+    """Stops a run on a deadline, a cumulative token budget, or when successive drafts converge.
+
+    Convergence compares each new message from ``convergence_source`` with the
+    previous one from the same agent; if less than ``convergence_threshold`` of
+    the text changed (1 - shingle similarity) the plan has stopped improving.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        convergence_source: Optional[str] = None,
+        convergence_threshold: float = 0.05,
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.max_tokens = max_tokens
+        self.convergence_source = convergence_source
+        self.convergence_threshold = convergence_threshold
+        self.start()
+
+    def start(self):
+        """Begin a new run: reset the clock, the counters and the stop reason."""
+        self.started = time.monotonic()
+        self.tokens = 0
+        self.messages = 0
+        self.last_change = None
+        self.stop_reason = None
+        self._last_draft = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def observe(self, source: str, text: str, tokens: int = 0) -> Optional[str]:
+        """Account for one message; return why the run should stop, or ``None`` to continue."""
+        self.messages += 1
+        self.tokens += tokens
+
+        if self.convergence_source and source == self.convergence_source and text:
+            if self._last_draft is not None:
+                self.last_change = 1.0 - text_similarity(self._last_draft, text)
+                if self.last_change < self.convergence_threshold:
+                    return self.stop(f"converged ({self.last_change:.1%} change between {source} drafts)")
+            self._last_draft = text
+
+        if self.max_tokens is not None and self.tokens >= self.max_tokens:
+            return self.stop(f"token budget reached ({self.tokens} >= {self.max_tokens} tokens)")
+        if self.deadline_seconds is not None and self.elapsed >= self.deadline_seconds:
+            return self.stop(f"deadline reached ({self.elapsed:.1f}s >= {self.deadline_seconds:.0f}s)")
+        return None
+
+    def stop(self, reason: str) -> str:
+        self.stop_reason = reason
+        return reason
+
+    def report(self, stop_reason: Optional[str] = None) -> str:
+        reason = stop_reason or self.stop_reason or "not stopped by budget"
+        return f"Stopped: {reason} | {self.elapsed:.1f}s elapsed, {self.tokens} tokens, {self.messages} messages"
@@ -0,0 +1,323 @@
+"""Checkpoint and resume for long AutoGen team runs.
+
+A lesson-planning run makes up to 10 LLM turns plus three Bing runs; if the
+process dies near the end everything used to be redone. ``CheckpointStore``
+keeps, per topic, the team state and transcript after every message plus the
+result of every completed tool call in a local SQLite file. A new run for the
+same topic loads the last checkpoint and continues from there, and tool calls
+that already finished are answered from the store instead of re-executed.
+
+SQLite runs in WAL mode with ``synchronous=NORMAL``: one small transaction per
+message, no fsync on the hot path, and a crash can lose at most the last
+checkpoint, never corrupt earlier ones. ``python -m common.checkpoint
+--crash-test`` kills a writer mid-stream repeatedly and verifies that.
+``--resume-test`` kills a run between tool calls and verifies that the resumed
+run does not execute the completed tools again.
+
+One store can serve concurrent jobs: the active run is kept in a context
+variable that ``begin`` sets for the calling task, so each job's tool calls
+read and write its own results.
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    status TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    state TEXT,
+    transcript TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tool_results (
+    run_key TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    args_key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (run_key, tool, args_key)
+);
+"""
+
+
+# Set by CheckpointStore.begin in the job's task; the tasks the team starts for tool calls inherit it
+_active_run_key: ContextVar[Optional[str]] = ContextVar("checkpoint_active_run_key", default=None)
+
+
+def run_key_for(topic: str, namespace: str = "") -> str:
+    normalized = re.sub(r"\s+", " ", topic.strip().lower())
+    return f"{namespace}:{normalized}" if namespace else normalized
+
+
+@dataclass
+class Checkpoint:
+    run_key: str
+    topic: str
+    status: str
+    turn: int
+    state: Optional[dict]
+    transcript: List[str]
+
+
+class CheckpointStore:
+    """Per-topic team checkpoints and tool results in a local SQLite file."""
+
+    def __init__(self, path: str = "checkpoints.sqlite3", namespace: str = ""):
+        self.path = path
+        self.namespace = namespace
+        self.save_seconds = 0.0
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @property
+    def active_run_key(self) -> Optional[str]:
+        """The run key set by ``begin`` in the current context."""
+        return _active_run_key.get()
+
+    def begin(self, topic: str) -> Optional[Checkpoint]:
+        """Make ``topic`` the active run of the current context and return its unfinished checkpoint, if any."""
+        run_key = run_key_for(topic, self.namespace)
+        _active_run_key.set(run_key)
+        checkpoint = self.load(run_key)
+        if checkpoint is not None and checkpoint.status == "complete":
+            # A finished plan is not resumed; start over (and re-run tools) for a new run
+            self.discard(run_key)
+            return None
+        return checkpoint
+
+    def load(self, run_key: str) -> Optional[Checkpoint]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_key, topic, status, turn, state, transcript FROM runs WHERE run_key = ?", (run_key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Checkpoint(row[0], row[1], row[2], row[3], json.loads(row[4]) if row[4] else None, json.loads(row[5]))
+
+    def save(self, topic: str, turn: int, state: Any, transcript: List[str], status: str = "running"):
+        started = time.perf_counter()
+        run_key = run_key_for(topic, self.namespace)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_key, topic, status, turn, state, transcript, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(run_key) DO UPDATE SET status = excluded.status, turn = excluded.turn, "
+                "state = excluded.state, transcript = excluded.transcript, updated_at = excluded.updated_at",
+                (run_key, topic, status, turn, json.dumps(state, default=str), json.dumps(transcript), time.time()),
+            )
+            self.saves += 1
+            self.save_seconds += time.perf_counter() - started
+
+    def complete(self, topic: str, transcript: List[str]):
+        self.save(topic, len(transcript), None, transcript, status="complete")
+
+    def discard(self, run_key: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM runs WHERE run_key = ?", (run_key,))
+            self._conn.execute("DELETE FROM tool_results WHERE run_key = ?", (run_key,))
+            self._conn.execute("COMMIT")
+
+    def cached_tool(self, func):
+        """Decorate an async tool so a completed call for the active run is never executed twice."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            run_key = _active_run_key.get() or ""
+            args_key = hashlib.sha256(json.dumps([args, kwargs], sort_keys=True, default=str).encode()).hexdigest()
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT result FROM tool_results WHERE run_key = ? AND tool = ? AND args_key = ?",
+                    (run_key, func.__name__, args_key),
+                ).fetchone()
+            if row is not None:
+                print(f"[{func.__name__}] Reusing checkpointed result")
+                return json.loads(row[0])
+            result = await func(*args, **kwargs)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tool_results (run_key, tool, args_key, result) VALUES (?, ?, ?, ?)",
+                    (run_key, func.__name__, args_key, json.dumps(result)),
+                )
+            return result
+        return wrapper
+
+    def report(self) -> str:
+        average_ms = 1000 * self.save_seconds / self.saves if self.saves else 0.0
+        return f"Checkpoints: {self.saves} saves, {average_ms:.2f} ms average write"
+
+
+async def checkpointed_stream(team, store: CheckpointStore, topic: str, task: str):
+    """Run ``team`` for ``topic``, resuming from the last checkpoint and saving one after every message.
+
+    Yields the same items as ``team.run_stream``; on resume the messages from the
+    earlier attempt are not replayed (they are in the checkpoint's transcript).
+    """
+    checkpoint = store.begin(topic)
+    transcript = []
+    if checkpoint is not None and checkpoint.state is not None:
+        await team.load_state(checkpoint.state)
+        transcript = list(checkpoint.transcript)
+        print(f"Resuming '{topic}' from turn {checkpoint.turn}")
+        stream = team.run_stream()
+    else:
+        stream = team.run_stream(task=task)
+
+    async for item in stream:
+        if hasattr(item, "messages") and hasattr(item, "stop_reason"):
+            # The final TaskResult: the run is done
+            store.complete(topic, transcript)
+        else:
+            content = getattr(item, "content", item)
+            transcript.append("".join(str(c) for c in content) if isinstance(content, list) else str(content))
+            store.save(topic, len(transcript), await team.save_state(), transcript)
+        yield item
+
+
+def _crash_writer(path: str):
+    store = CheckpointStore(path)
+    checkpoint = store.load(run_key_for("crash test"))
+    transcript = checkpoint.transcript if checkpoint else []
+    while True:
+        transcript.append("message %d " % len(transcript) + "x" * random.randint(100, 4000))
+        store.save("crash test", len(transcript), {"turn": len(transcript), "payload": transcript[-3:]}, transcript)
+
+
+def _crash_test(rounds: int):
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "crash.sqlite3")
+        last_turn = 0
+        for attempt in range(rounds):
+            child = subprocess.Popen([sys.executable, "-m", "common.checkpoint", "--crash-writer", path])
+            time.sleep(random.uniform(0.05, 0.5))
+            child.kill()
+            child.wait()
+            store = CheckpointStore(path)
+            integrity = store._conn.execute("PRAGMA integrity_check").fetchone()[0]
+            checkpoint = store.load(run_key_for("crash test"))
+            if checkpoint is None:
+                # Killed before the first write ever committed
+                ok = integrity == "ok" and last_turn == 0
+            else:
+                ok = (
+                    integrity == "ok"
+                    and checkpoint.state["turn"] == checkpoint.turn == len(checkpoint.transcript)
+                    and checkpoint.turn >= last_turn
+                )
+            failures += not ok
+            last_turn = checkpoint.turn if checkpoint else last_turn
+            print(f"round {attempt + 1}: integrity={integrity} turn={checkpoint.turn if checkpoint else None} {'ok' if ok else 'FAILED'}")
+            store._conn.close()
+    print(f"{rounds - failures}/{rounds} crash rounds recovered a consistent checkpoint")
+    return failures
+
+
+_RESUME_TOOLS = 6
+
+
+def _resume_run(path: str, log_path: str, topic: str = "resume test", announce: bool = False):
+    """One run of ``_RESUME_TOOLS`` tool calls; appends a line to ``log_path`` for every real execution."""
+    store = CheckpointStore(path)
+
+    @store.cached_tool
+    async def tool(step: int) -> str:
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(f"{topic}:{step}\n")
+        return f"{topic} result {step}"
+
+    async def run():
+        store.begin(topic)
+        results = []
+        for step in range(_RESUME_TOOLS):
+            results.append(await tool(step))
+            if announce:
+                # Tells the parent of a --resume-run child how far the run got
+                print(f"completed {step}", flush=True)
+            # The team's model turn between two tool calls
+            await asyncio.sleep(0.05)
+        store.complete(topic, results)
+        return results
+
+    return run()
+
+
+def _resume_test(rounds: int):
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for attempt in range(rounds):
+            path = os.path.join(directory, f"resume-{attempt}.sqlite3")
+            log_path = os.path.join(directory, f"resume-{attempt}.log")
+            open(log_path, "w").close()
+            # Kill the run between tool calls, after a random number of them completed
+            completed = random.randint(1, _RESUME_TOOLS - 1)
+            child = subprocess.Popen([sys.executable, "-m", "common.checkpoint", "--resume-run", path, log_path],
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for _ in range(completed):
+                child.stdout.readline()
+            child.kill()
+            child.wait()
+            child.stdout.close()
+            results = asyncio.run(_resume_run(path, log_path))
+            with open(log_path, encoding="utf-8") as log:
+                executions = log.read().splitlines()
+            ok = (
+                sorted(executions) == sorted(f"resume test:{step}" for step in range(_RESUME_TOOLS))
+                and results == [f"resume test result {step}" for step in range(_RESUME_TOOLS)]
+            )
+            failures += not ok
+            print(f"round {attempt + 1}: killed after {completed} tools, {len(executions)} executions "
+                  f"{'ok' if ok else 'FAILED'}")
+
+        # Two jobs sharing one store: each must get its own tool results, not the other run's
+        path = os.path.join(directory, "concurrent.sqlite3")
+        log_path = os.path.join(directory, "concurrent.log")
+
+        async def both():
+            return await asyncio.gather(_resume_run(path, log_path, "topic a"), _resume_run(path, log_path, "topic b"))
+
+        a, b = asyncio.run(both())
+        ok = a == [f"topic a result {step}" for step in range(_RESUME_TOOLS)] and \
+            b == [f"topic b result {step}" for step in range(_RESUME_TOOLS)]
+        failures += not ok
+        print(f"concurrent runs: {'ok' if ok else 'FAILED'}")
+    print(f"{rounds + 1 - failures}/{rounds + 1} resume checks passed")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crash- and resume-test the checkpoint store.")
+    parser.add_argument("--crash-test", type=int, nargs="?", const=20, metavar="ROUNDS")
+    parser.add_argument("--resume-test", type=int, nargs="?", const=10, metavar="ROUNDS")
+    parser.add_argument("--crash-writer", metavar="PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--resume-run", nargs=2, metavar=("PATH", "LOG"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.crash_writer:
+        _crash_writer(args.crash_writer)
+    elif args.resume_run:
+        asyncio.run(_resume_run(*args.resume_run, announce=True))
+    elif args.crash_test:
+        sys.exit(1 if _crash_test(args.crash_test) else 0)
+    elif args.resume_test:
+        sys.exit(1 if _resume_test(args.resume_test) else 0)
+    else:
+        parser.print_help()
@@ -0,0 +1,189 @@
+"""Local, CPU-only compaction of Bing-grounded tool output.
+
+Grounded answers come back as long markdown with inline links and citation
+markers. ``RoundRobinGroupChat`` forwards every message to every agent, so
+whatever a tool returns is paid for again on each following turn. The
+compactor shrinks a result before it is handed back to ``AssistantAgent``:
+
+1. strips citation markers and collects unique URLs into one short source list,
+2. drops sentences that nearly repeat an earlier one,
+3. keeps the highest-scoring sentences (extractive summary) that fit the token budget.
+"""
+
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from common.tokens import count_tokens
+
+# 【3:0†source】 style markers emitted by the agent service, plus [1] / [^1] footnotes
+_CITATION_RE = re.compile(r"【[^】]*】|\[\^?\d+\]")
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+_URL_RE = re.compile(r"https?://[^\s)\]>]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9*#\-])")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in into is it its of on or that the their this to with "
+    "you your they them these those will which what how also more such".split()
+)
+
+
+@dataclass
+class CompactionStats:
+    calls: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _words(text: str):
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def _shingles(words, size: int = 3):
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def strip_citations(text: str):
+    """Remove citation markers and links; return ``(text, unique_urls)`` in first-seen order."""
+    urls = []
+
+    def keep_label(match):
+        urls.append(match.group(2))
+        return match.group(1)
+
+    text = _MD_LINK_RE.sub(keep_label, text)
+    urls.extend(_URL_RE.findall(text))
+    text = _URL_RE.sub("", text)
+    text = _CITATION_RE.sub("", text)
+    text = re.sub(r"\(\s*\)|[ \t]{2,}", " ", text)
+    text = re.sub(r"[ \t]+([.,;:!?])", r"\1", text)
+    unique_urls = list(dict.fromkeys(url.rstrip(".,;") for url in urls))
+    return text, unique_urls
+
+
+def split_sentences(text: str):
+    """Split markdown into sentences, treating every list item or heading line as its own unit."""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        sentences.extend(part.strip() for part in _SENTENCE_RE.split(line) if part.strip())
+    return sentences
+
+
+def remove_near_duplicates(sentences, threshold: float = 0.7):
+    """Drop sentences that repeat an earlier one.
+
+    A sentence is a near duplicate when its word 3-shingles or its plain word set
+    overlap an earlier sentence by ``threshold`` or more (Jaccard).
+    """
+    kept, seen = [], []
+    for sentence in sentences:
+        words = _words(sentence)
+        signature = (_shingles(words), set(words))
+        if any(
+            _jaccard(signature[0], other[0]) >= threshold or _jaccard(signature[1], other[1]) >= threshold
+            for other in seen
+        ):
+            continue
+        kept.append(sentence)
+        seen.append(signature)
+    return kept
+
+
+def extractive_summary(sentences, max_tokens: int):
+    """Pick the most informative sentences that fit ``max_tokens``, keeping their original order."""
+    costs = [count_tokens(s) for s in sentences]
+    if sum(costs) <= max_tokens:
+        return list(sentences)
+
+    frequencies = Counter(w for s in sentences for w in _words(s))
+    scores = []
+    for index, sentence in enumerate(sentences):
+        words = _words(sentence)
+        score = sum(frequencies[w] for w in set(words)) / (len(words) ** 0.5 or 1)
+        if sentence.startswith("#"):
+            score *= 1.5  # headings keep the structure readable
+        score *= 1.0 + 0.5 / (1 + index)  # grounded answers lead with the main point
+        scores.append(score)
+
+    chosen, used = set(), 0
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if used + costs[index] <= max_tokens:
+            chosen.add(index)
+            used += costs[index]
+    return [sentences[i] for i in sorted(chosen)]
+
+
+class Compactor:
+    """Compacts tool results to a token budget and keeps running totals of tokens saved."""
+
+    def __init__(self, max_tokens: int = 400, max_sources: int = 5, duplicate_threshold: float = 0.7):
+        self.max_tokens = max_tokens
+        self.max_sources = max_sources
+        self.duplicate_threshold = duplicate_threshold
+        self.stats = CompactionStats()
+        # The CompactionStats of the job calling in the current context, set by job_stats()
+        self._job_stats: ContextVar[Optional[CompactionStats]] = ContextVar(f"compactor_{id(self)}", default=None)
+        self._lock = threading.Lock()
+
+    def compact(self, text: str) -> str:
+        before = count_tokens(text)
+        body, urls = strip_citations(text)
+        sources = urls[:self.max_sources]
+        sources_block = ("\nSources: " + " ".join(sources)) if sources else ""
+
+        sentences = remove_near_duplicates(split_sentences(body), self.duplicate_threshold)
+        budget = max(0, self.max_tokens - count_tokens(sources_block))
+        compacted = "\n".join(extractive_summary(sentences, budget)) + sources_block
+
+        # Never hand back something larger than the original answer
+        if count_tokens(compacted) >= before:
+            compacted = text
+        after = count_tokens(compacted)
+        with self._lock:
+            for stats in (self.stats, self._job_stats.get()):
+                if stats is not None:
+                    stats.calls += 1
+                    stats.tokens_before += before
+                    stats.tokens_after += after
+        return compacted
+
+    @contextmanager
+    def job_stats(self):
+        """Count the results compacted in this context in a fresh CompactionStats, for one job's report."""
+        stats = CompactionStats()
+        token = self._job_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            self._job_stats.reset(token)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = CompactionStats()
+
+    def report(self, stats: Optional[CompactionStats] = None) -> str:
+        s = stats or self.stats
+        return (
+            f"Compaction: {s.calls} tool results, {s.tokens_before} -> {s.tokens_after} tokens "
+            f"({s.tokens_saved} saved per forwarded copy)"
+        )
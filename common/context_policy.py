@@ -0,0 +1,173 @@
+"""Per-agent context policies for multi-agent group chats.
+
+Both ``RoundRobinGroupChat`` (AutoGen) and ``AgentGroupChat`` (Semantic Kernel)
+hand every agent the full accumulated history on each turn, so prompt tokens
+grow roughly quadratically with the number of turns. A policy decides which
+part of that history a given agent actually sees. Policies work on a neutral
+``ContextMessage`` list; the framework adapters live in ``autogen_context``
+and ``sk_context``.
+"""
+
+import threading
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional
+
+from common.compaction import extractive_summary, split_sentences
+from common.tokens import count_tokens
+
+
+@dataclass
+class ContextMessage:
+    """One unit of history: a message (or a tool call with its results) and who produced it."""
+
+    source: str
+    text: str
+    original: Any = None
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.text)
+
+
+class ContextPolicy:
+    """Returns the view of ``messages`` an agent should be prompted with. The default is the full history."""
+
+    def apply(self, messages: List[ContextMessage]) -> List[ContextMessage]:
+        return list(messages)
+
+
+class LastK(ContextPolicy):
+    """Keep the task (first message) and the last ``k`` messages."""
+
+    def __init__(self, k: int, keep_task: bool = True):
+        self.k = k
+        self.keep_task = keep_task
+
+    def apply(self, messages):
+        if len(messages) <= self.k + (1 if self.keep_task else 0):
+            return list(messages)
+        tail = messages[-self.k:] if self.k else []
+        return ([messages[0]] if self.keep_task else []) + tail
+
+
+class RoleFilter(ContextPolicy):
+    """Keep the task, every message from ``sources`` and only the newest message from ``latest_from``."""
+
+    def __init__(self, sources: Iterable[str] = (), latest_from: Iterable[str] = (), keep_task: bool = True):
+        self.sources = set(sources)
+        self.latest_from = set(latest_from)
+        self.keep_task = keep_task
+
+    def apply(self, messages):
+        latest_index = {}
+        for index, message in enumerate(messages):
+            if message.source in self.latest_from:
+                latest_index[message.source] = index
+        keep = set(latest_index.values())
+        keep.update(i for i, m in enumerate(messages) if m.source in self.sources)
+        if self.keep_task and messages:
+            keep.add(0)
+        return [messages[i] for i in sorted(keep)]
+
+
+class TokenBudget(ContextPolicy):
+    """Keep the newest messages that fit ``max_tokens``; older ones collapse into one rolling summary.
+
+    The summary is extractive and local, so it costs no model call. It is
+    rebuilt from everything that has fallen out of the window each turn, which
+    keeps it consistent as the window rolls forward.
+    """
+
+    def __init__(self, max_tokens: int, summary_tokens: int = 300, keep_task: bool = True):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.keep_task = keep_task
+
+    def apply(self, messages):
+        if sum(m.tokens for m in messages) <= self.max_tokens:
+            return list(messages)
+
+        head = [messages[0]] if self.keep_task and messages else []
+        rest = messages[len(head):]
+        budget = self.max_tokens - sum(m.tokens for m in head) - self.summary_tokens
+
+        kept, used = [], 0
+        for message in reversed(rest):
+            if kept and used + message.tokens > budget:
+                break
+            kept.append(message)
+            used += message.tokens
+        kept.reverse()
+        dropped = rest[:len(rest) - len(kept)]
+        if not dropped:
+            return head + kept
+
+        sentences = []
+        for message in dropped:
+            sentences.extend(f"{message.source}: {s}" for s in split_sentences(message.text))
+        summary = "Summary of earlier conversation:\n" + "\n".join(extractive_summary(sentences, self.summary_tokens))
+        return head + [ContextMessage(source="context_summary", text=summary)] + kept
+
+
+class Pipeline(ContextPolicy):
+    """Apply several policies in order, e.g. ``Pipeline(RoleFilter(...), TokenBudget(2000))``."""
+
+    def __init__(self, *policies: ContextPolicy):
+        self.policies = policies
+
+    def apply(self, messages):
+        for policy in self.policies:
+            messages = policy.apply(messages)
+        return list(messages)
+
+
+@dataclass
+class _AgentUsage:
+    turns: int = 0
+    tokens_full: int = 0
+    tokens_windowed: int = 0
+    per_turn: List[tuple] = field(default_factory=list)
+
+
+class ContextMeter:
+    """Records prompt tokens per agent turn with the full history and with the agent's policy applied."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents = defaultdict(_AgentUsage)
+
+    def record(self, agent: str, full: List[ContextMessage], windowed: List[ContextMessage]):
+        before = sum(m.tokens for m in full)
+        after = sum(m.tokens for m in windowed)
+        with self._lock:
+            usage = self._agents[agent]
+            usage.turns += 1
+            usage.tokens_full += before
+            usage.tokens_windowed += after
+            usage.per_turn.append((before, after))
+
+    def reset(self):
+        with self._lock:
+            self._agents.clear()
+
+    def report(self, agent: Optional[str] = None) -> str:
+        with self._lock:
+            names = [agent] if agent else sorted(self._agents)
+            lines = []
+            for name in names:
+                usage = self._agents[name]
+                turns = ", ".join(f"{before}->{after}" for before, after in usage.per_turn)
+                lines.append(
+                    f"{name}: {usage.turns} turns, prompt tokens {usage.tokens_full} -> {usage.tokens_windowed} [{turns}]"
+                )
+            total_full = sum(u.tokens_full for u in self._agents.values())
+            total_windowed = sum(u.tokens_windowed for u in self._agents.values())
+        lines.append(f"Context windowing total: {total_full} -> {total_windowed} prompt tokens")
+        return "\n".join(lines)
+
+
+# Meter for the current request. Cached services shared by concurrent requests record
+# into whichever meter the running task has set, instead of one fixed at construction.
+current_meter: ContextVar[Optional[ContextMeter]] = ContextVar("current_meter", default=None)
@@ -0,0 +1,163 @@
+"""Pool of reusable Bing grounding agents.
+
+Creating and deleting an agent around every tool call costs two extra
+control-plane round trips per call and, because nobody deleted the threads,
+leaks a thread each time. The pool creates each agent definition once per
+process and runs every request on a fresh thread, which is deleted in the
+background once the reply is read. Threads are not reused: a reused thread
+would carry earlier requests' messages into the next run's context, and its
+prompt tokens would grow on every call. Pooled agents are pinned against the
+``common.resource_tracker`` sweeper and deleted in one batch on shutdown.
+"""
+
+import atexit
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from azure.ai.projects.models import BingGroundingTool
+
+from common.agent_tracing import span
+from common.resource_tracker import release, release_all, tracker_for
+from common.run_poller import RunWaiter, get_run_waiter
+
+
+@dataclass
+class PoolStats:
+    calls: int = 0
+    agents_created: int = 0
+    threads_created: int = 0
+
+    @property
+    def control_plane_calls_avoided(self) -> int:
+        # Without the pool every call pays create_agent + delete_agent; with it we
+        # pay that pair once per agent definition (the delete happens on shutdown).
+        return 2 * self.calls - 2 * self.agents_created
+
+
+class GroundingAgentPool:
+    """Creates each named grounding agent once and reuses it across calls."""
+
+    def __init__(self, project_client, connection_id: str, model: str = "gpt-4o", waiter: Optional[RunWaiter] = None):
+        self._client = project_client
+        self._waiter = waiter or get_run_waiter()
+        self._bing = BingGroundingTool(connection_id=connection_id)
+        self._model = model
+        self._agents = {}
+        # One lock per agent name, held while that agent is created
+        self._agent_locks = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = PoolStats()
+        # The PoolStats of the job calling in the current context, set by job_stats()
+        self._job_stats: ContextVar[Optional[PoolStats]] = ContextVar(f"grounding_pool_{id(self)}", default=None)
+        atexit.register(self.close)
+
+    def get_agent(self, name: str, instructions: str):
+        """Return the pooled agent called ``name``, creating it on first use."""
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is not None:
+                return agent
+            agent_lock = self._agent_locks.setdefault(name, threading.Lock())
+        # The create call runs outside the pool lock, so other callers are not held up by it;
+        # concurrent first calls for the same name wait here and create the agent once
+        with agent_lock:
+            with self._lock:
+                agent = self._agents.get(name)
+            if agent is not None:
+                return agent
+            agent = self._client.agents.create_agent(
+                model=self._model,
+                name=name,
+                instructions=instructions,
+                tools=self._bing.definitions,
+                headers={"x-ms-enable-preview": "true"}
+            )
+            self._pin(agent.id)
+            with self._lock:
+                closed = self._closed
+                if not closed:
+                    self._agents[name] = agent
+                    self._count("agents_created")
+            if closed:
+                release(self._client, "agent", agent.id)
+            return agent
+
+    def _create_thread(self):
+        thread = self._client.agents.create_thread()
+        with self._lock:
+            self._count("threads_created")
+        return thread
+
+    def _pin(self, resource_id: str):
+        # Pooled agents sit idle between calls but are still in use; only close() deletes them
+        tracker = tracker_for(self._client)
+        if tracker is not None:
+            tracker.pin(resource_id)
+
+    def run(self, name: str, instructions: str, content: str):
+        """Send ``content`` to the pooled agent and return ``(run, messages)``."""
+        with span("grounding_pool.run", **{"gen_ai.agent.name": name}):
+            agent = self.get_agent(name, instructions)
+            thread = self._create_thread()
+            try:
+                self._client.agents.create_message(thread_id=thread.id, role="user", content=content)
+                run = self._waiter.run(self._client.agents, thread.id, agent.id, key=name)
+                messages = self._client.agents.list_messages(thread_id=thread.id)
+            finally:
+                release(self._client, "thread", thread.id)
+        with self._lock:
+            self._count("calls")
+        return run, messages
+
+    def ask(self, name: str, instructions: str, content: str) -> str:
+        """Send ``content`` to the pooled agent and return the latest reply text."""
+        run, messages = self.run(name, instructions, content)
+        return messages["data"][0]["content"][0]["text"]["value"]
+
+    def _count(self, name: str):
+        # Called with the lock held: the process totals and the calling job's stats, if any
+        for stats in (self.stats, self._job_stats.get()):
+            if stats is not None:
+                setattr(stats, name, getattr(stats, name) + 1)
+
+    @contextmanager
+    def job_stats(self):
+        """Count the calls made in this context (and the tasks and threads it starts) in a fresh PoolStats.
+
+        Concurrent jobs share the pool, so one job's ``reset_stats()`` would wipe the
+        counters of the others; each job reports its own stats instead.
+        """
+        stats = PoolStats()
+        token = self._job_stats.set(stats)
+        try:
+            yield stats
+        finally:
+            self._job_stats.reset(token)
+
+    def reset_stats(self):
+        with self._lock:
+            # Agents that already exist are free for the next window.
+            self.stats = PoolStats()
+
+    def report(self, stats: Optional[PoolStats] = None) -> str:
+        s = stats or self.stats
+        return (
+            f"Grounding pool: {s.calls} calls, {s.agents_created} agents created, "
+            f"{s.threads_created} threads created, {s.control_plane_calls_avoided} control-plane calls avoided"
+        )
+
+    def close(self):
+        """Delete every pooled agent in one concurrent batch."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            agent_ids = [agent.id for agent in self._agents.values()]
+            self._agents.clear()
+        with span("grounding_pool.close", agents=len(agent_ids)):
+            # Deleted by the resource tracker's workers, which nest their spans under this one
+            release_all(self._client, [("agent", agent_id) for agent_id in agent_ids])
@@ -0,0 +1,170 @@
+"""Process-wide background job runner for the Streamlit UIs.
+
+Calling ``asyncio.run(...)`` inside the Streamlit script thread creates a new
+event loop per click, blocks the session for the whole multi-agent run and
+loses the work if the user navigates away. ``JobRunner`` owns one long-lived
+event loop on a daemon thread; UIs submit coroutines, keep the job ID in
+``st.session_state`` and poll ``get()`` on each rerun for progress snapshots
+and the result. Jobs can be cancelled and finished jobs are kept for
+``retention_seconds``.
+
+Job coroutines run off the script thread, so they must not call ``st.*``;
+they report progress through ``job.log()`` instead.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+PENDING, RUNNING, DONE, FAILED, CANCELLED = "pending", "running", "done", "failed", "cancelled"
+
+
+@dataclass
+class JobSnapshot:
+    id: str
+    name: str
+    status: str
+    progress: List[str]
+    partial: str
+    result: Any
+    error: Optional[str]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def active(self) -> bool:
+        return self.status in (PENDING, RUNNING)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    status: str = PENDING
+    progress: List[str] = field(default_factory=list)
+    partial: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: Any = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def log(self, message: str):
+        """Append a progress line; safe to call from the job coroutine."""
+        with self._lock:
+            self.progress.append(message)
+
+    def set_partial(self, text: str):
+        """Publish the output generated so far (e.g. streamed tokens) for the UI to render."""
+        with self._lock:
+            self.partial = text
+
+    def snapshot(self) -> JobSnapshot:
+        with self._lock:
+            return JobSnapshot(
+                self.id, self.name, self.status, list(self.progress), self.partial, self.result, self.error,
+                self.created_at, self.started_at, self.finished_at,
+            )
+
+
+class JobRunner:
+    """Runs coroutines on one long-lived event loop, at most ``max_concurrent`` at a time."""
+
+    def __init__(self, max_concurrent: int = 32, retention_seconds: float = 3600):
+        self.retention_seconds = retention_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="job-runner", daemon=True)
+        self._thread.start()
+        self._slots = asyncio.run_coroutine_threadsafe(self._make_semaphore(max_concurrent), self._loop).result()
+
+    @staticmethod
+    async def _make_semaphore(size: int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(size)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def submit(self, func: Callable[..., Awaitable[Any]], *args, name: str = "", **kwargs) -> str:
+        """Schedule ``func(job, *args, **kwargs)`` and return the job ID immediately."""
+        self._prune()
+        job = Job(id=uuid.uuid4().hex[:12], name=name or getattr(func, "__name__", "job"))
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = asyncio.run_coroutine_threadsafe(self._run(job, func, args, kwargs), self._loop)
+        return job.id
+
+    async def _run(self, job: Job, func, args, kwargs):
+        async with self._slots:
+            with job._lock:
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                result = await func(job, *args, **kwargs)
+            except asyncio.CancelledError:
+                self._finish(job, CANCELLED, error="Cancelled")
+                raise
+            except Exception as exc:
+                self._finish(job, FAILED, error=f"{type(exc).__name__}: {exc}")
+            else:
+                self._finish(job, DONE, result=result)
+
+    @staticmethod
+    def _finish(job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        with job._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[JobSnapshot]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.future is None:
+            return False
+        if job.status == PENDING:
+            self._finish(job, CANCELLED, error="Cancelled")
+        return job.future.cancel() or job.future.cancelled()
+
+    def jobs(self) -> List[JobSnapshot]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Return the process-wide runner; it survives Streamlit reruns because this module stays imported."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
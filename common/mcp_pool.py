@@ -0,0 +1,151 @@
+"""A pool of long-lived MCP client sessions with pipelined tool calls.
+
+``mcp-client.py`` used to spawn the server, run ``initialize``, make one call
+and exit, so every batch of work paid for interpreter startup plus the
+handshake. ``McpSessionPool`` opens ``size`` sessions once (stdio
+subprocesses, SSE or streamable HTTP connections), caches ``list_tools`` and
+spreads ``call_tool`` requests over the sessions. A ``ClientSession`` matches
+responses to requests by ID, so several requests can be outstanding on one
+session; ``max_in_flight`` bounds how many are pipelined across the pool.
+
+Sessions are entered on an ``AsyncExitStack``; open and close the pool in the
+same task, preferably with ``async with McpSessionPool(...) as pool``.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+
+def stdio_transport(command: str, args: List[str], env: Optional[Dict[str, str]] = None) -> Callable:
+    """Transport factory that starts one server subprocess per session."""
+    return lambda: stdio_client(StdioServerParameters(command=command, args=args, env=env))
+
+
+def sse_transport(url: str) -> Callable:
+    """Transport factory that opens one SSE connection per session."""
+    return lambda: sse_client(url)
+
+
+def streamable_http_transport(url: str) -> Callable:
+    """Transport factory that opens one streamable HTTP connection per session."""
+    return lambda: streamablehttp_client(url)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+class McpSessionPool:
+    """``size`` initialized sessions shared by concurrent ``call_tool`` requests."""
+
+    def __init__(self, transport: Callable, size: int = 2, max_in_flight: int = 32, latency_window: int = 100_000):
+        self.transport = transport
+        self.size = size
+        self.max_in_flight = max_in_flight
+        self.sessions: List[ClientSession] = []
+        self.handshake_seconds: List[float] = []
+        self._stack: Optional[AsyncExitStack] = None
+        self._window = asyncio.Semaphore(max_in_flight)
+        self._next = itertools.cycle(range(size))
+        self._in_flight = [0] * size
+        self._tools = None
+        self._latencies = deque(maxlen=latency_window)
+        self.calls = 0
+        self.errors = 0
+        self.peak_in_flight = 0
+        self._started = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        self._stack = AsyncExitStack()
+        for _ in range(self.size):
+            started = time.perf_counter()
+            # streamable HTTP also yields a session-ID getter; only the two streams are needed
+            streams = await self._stack.enter_async_context(self.transport())
+            read_stream, write_stream = streams[0], streams[1]
+            session = await self._stack.enter_async_context(ClientSession(read_stream, write_stream))
+            await session.initialize()
+            self.handshake_seconds.append(time.perf_counter() - started)
+            self.sessions.append(session)
+        self.reset_stats()
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._stack = None
+        self.sessions = []
+
+    async def list_tools(self, refresh: bool = False):
+        """The server's tools, fetched once per pool (all sessions talk to the same server)."""
+        if self._tools is None or refresh:
+            self._tools = (await self.sessions[0].list_tools()).tools
+        return self._tools
+
+    def _pick(self) -> int:
+        # Least outstanding requests; ties go round-robin so idle sessions share the load
+        start = next(self._next)
+        order = [(start + i) % self.size for i in range(self.size)]
+        return min(order, key=lambda i: self._in_flight[i])
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None):
+        async with self._window:
+            index = self._pick()
+            self._in_flight[index] += 1
+            self.peak_in_flight = max(self.peak_in_flight, sum(self._in_flight))
+            started = time.perf_counter()
+            try:
+                result = await self.sessions[index].call_tool(name, arguments=arguments or {})
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._in_flight[index] -= 1
+            self._latencies.append(time.perf_counter() - started)
+            self.calls += 1
+            if result.isError:
+                self.errors += 1
+            return result
+
+    async def map(self, name: str, argument_list: List[Dict[str, Any]]):
+        """Call ``name`` once per arguments dict, pipelined up to ``max_in_flight``; results keep input order."""
+        return await asyncio.gather(*(self.call_tool(name, arguments) for arguments in argument_list))
+
+    @property
+    def latencies(self) -> List[float]:
+        """Call latencies in seconds since the last ``reset_stats``."""
+        return list(self._latencies)
+
+    def reset_stats(self):
+        self._latencies.clear()
+        self.calls = 0
+        self.errors = 0
+        self.peak_in_flight = 0
+        self._started = time.perf_counter()
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        latencies = sorted(self._latencies)
+        handshake = sum(self.handshake_seconds) / len(self.handshake_seconds) if self.handshake_seconds else 0.0
+        return (
+            f"{self.calls} calls ({self.errors} errors) over {self.size} sessions in {elapsed:.2f}s: "
+            f"{self.calls / elapsed if elapsed else 0:.0f} calls/s | latency p50 {percentile(latencies, 50) * 1000:.1f} ms "
+            f"p99 {percentile(latencies, 99) * 1000:.1f} ms | peak in flight {self.peak_in_flight}/{self.max_in_flight} | "
+            f"handshake {handshake * 1000:.0f} ms/session"
+        )
@@ -0,0 +1,300 @@
+"""Launch and tool-execution helpers shared by the FastMCP servers in ``mcp/``.
+
+The servers used to hard-code ``transport = "stdio"`` with SSE commented
+out. ``run_server`` picks the transport at launch from ``--transport`` (or
+the ``MCP_TRANSPORT`` environment variable) so the same server can be
+benchmarked over stdio, SSE and streamable HTTP. ``ToolRuntime`` memoizes
+pure tools and moves CPU-bound tools off the event loop.
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+
+def run_server(mcp, argv=None):
+    """Parse ``--transport/--host/--port`` and run ``mcp`` until it exits."""
+    parser = argparse.ArgumentParser(description=f"{mcp.name} MCP server.")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.getenv("MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", mcp.settings.host))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", mcp.settings.port)))
+    args = parser.parse_args(argv)
+    if args.transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {args.transport}")
+
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    # On stdio, stdout carries the protocol, so diagnostics always go to stderr
+    where = "" if args.transport == "stdio" else f" on {args.host}:{args.port}"
+    print(f"Running server with {args.transport} transport{where}", file=sys.stderr)
+    mcp.run(transport=args.transport)
+
+
+# Functions behind @cpu_bound tools, keyed so the worker process finds the same function after
+# re-importing the server module (under spawn, ``__main__`` is imported as ``__mp_main__``).
+_CPU_FUNCTIONS = {}
+
+
+def _function_key(func) -> str:
+    return f"{func.__code__.co_filename}:{func.__qualname__}"
+
+
+def _run_registered(key: str, args, kwargs):
+    return _CPU_FUNCTIONS[key](*args, **kwargs)
+
+
+# Arguments or results with more values than this are hashed and measured in a worker thread
+_OFFLOAD_ITEMS = 1000
+
+
+def _size_hint(value) -> int:
+    """Rough number of values in a tool argument or result, without walking every element.
+
+    Lists count their length times the size of their first element, dicts the sum over their values.
+    """
+    if isinstance(value, dict):
+        return max(1, sum(_size_hint(item) for item in value.values()))
+    if isinstance(value, (list, tuple)):
+        return len(value) * _size_hint(value[0]) if value else 1
+    return 1
+
+
+def _argument_items(args, kwargs) -> int:
+    return sum(_size_hint(value) for value in (*args, *kwargs.values()))
+
+
+class ServerBusy(RuntimeError):
+    """Raised when the CPU-bound tool queue is full; the client should retry later."""
+
+
+class ToolRuntime:
+    """Decorators that keep FastMCP tools from stalling the server's event loop.
+
+    FastMCP runs tool functions inline on the event loop, so one CPU-heavy
+    call stalls every connected client, and identical requests to a pure tool
+    are recomputed each time.
+
+    ``@runtime.pure`` memoizes a deterministic tool in an LRU keyed by its
+    arguments and bounded by entries (``cache_size``) and by the approximate
+    JSON size of the results (``cache_bytes``); identical calls that arrive
+    while the first is still running share its result. Hashing the arguments
+    costs as much as serializing them, so calls whose arguments or result hold
+    more than ``max_memo_items`` values bypass the cache, and the key and size
+    of large ones are computed in a worker thread instead of on the loop. ``@runtime.cpu_bound`` runs the tool in a process
+    pool. At most ``max_queue`` calls may be queued or running; beyond that
+    callers get ``ServerBusy``. A call that exceeds ``timeout`` seconds, or
+    whose request is cancelled, is dropped from the queue if it has not
+    started. A call that has already started keeps its worker until it
+    finishes and is counted as abandoned. Apply these decorators below
+    ``@mcp.tool()``; ``register_stats_resource`` publishes cache hit rates and
+    queue depth as an MCP resource.
+    """
+
+    def __init__(self, cache_size: int = 256, workers: Optional[int] = None, max_queue: int = 64, timeout: float = 30.0,
+                 cache_bytes: int = 64 * 2**20, max_memo_items: int = 100_000):
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self.max_memo_items = max_memo_items
+        self.workers = workers or os.cpu_count() or 2
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._caches: Dict[str, OrderedDict] = {}
+        self._cache_stats = defaultdict(lambda: {"hits": 0, "misses": 0, "shared": 0, "skipped": 0, "bytes": 0})
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._outstanding = set()
+        self.cpu = {"completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "cancelled": 0, "abandoned": 0, "peak_depth": 0, "seconds": 0.0}
+
+    # ---- memoization -------------------------------------------------------
+
+    def pure(self, func=None, *, maxsize: Optional[int] = None):
+        """Memoize a deterministic tool; ``maxsize`` overrides the runtime's ``cache_size``."""
+        if func is None:
+            return lambda f: self.pure(f, maxsize=maxsize)
+        name = func.__name__
+        cache = self._caches.setdefault(name, OrderedDict())
+        sizes = {}
+        limit = maxsize or self.cache_size
+        signature = inspect.signature(func)
+
+        def key_for(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            payload = json.dumps(bound.arguments, sort_keys=True, default=repr)
+            return hashlib.sha256(payload.encode()).hexdigest()
+
+        def measure(result) -> int:
+            return len(json.dumps(result, default=repr))
+
+        def remember(key, value, size):
+            if size > self.cache_bytes:
+                return
+            if key in cache:
+                stats["bytes"] -= sizes[key]
+            cache[key] = value
+            sizes[key] = size
+            stats["bytes"] += size
+            cache.move_to_end(key)
+            while len(cache) > limit or stats["bytes"] > self.cache_bytes:
+                old, _ = cache.popitem(last=False)
+                stats["bytes"] -= sizes.pop(old)
+
+        stats = self._cache_stats[name]
+
+        if inspect.iscoroutinefunction(func):
+            async def offloaded(work, value, items):
+                # json.dumps of a large payload would stall every other client on the loop
+                return await asyncio.to_thread(work, *value) if items > _OFFLOAD_ITEMS else work(*value)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                items = _argument_items(args, kwargs)
+                if items > self.max_memo_items:
+                    stats["skipped"] += 1
+                    return await func(*args, **kwargs)
+                key = await offloaded(key_for, (args, kwargs), items)
+                if key in cache:
+                    stats["hits"] += 1
+                    cache.move_to_end(key)
+                    return cache[key]
+                pending_key = f"{name}:{key}"
+                if pending_key in self._pending:
+                    stats["shared"] += 1
+                    return await asyncio.shield(self._pending[pending_key])
+                stats["misses"] += 1
+                future = asyncio.get_running_loop().create_future()
+                self._pending[pending_key] = future
+                try:
+                    result = await func(*args, **kwargs)
+                    future.set_result(result)
+                    result_items = _size_hint(result)
+                    if result_items <= self.max_memo_items:
+                        remember(key, result, await offloaded(measure, (result,), result_items))
+                    return result
+                except BaseException as exc:
+                    if not future.done():
+                        future.set_exception(exc)
+                        # Nobody else may be waiting; avoid "exception never retrieved"
+                        future.exception()
+                    raise
+                finally:
+                    del self._pending[pending_key]
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _argument_items(args, kwargs) > self.max_memo_items:
+                stats["skipped"] += 1
+                return func(*args, **kwargs)
+            key = key_for(args, kwargs)
+            if key in cache:
+                stats["hits"] += 1
+                cache.move_to_end(key)
+                return cache[key]
+            stats["misses"] += 1
+            result = func(*args, **kwargs)
+            if _size_hint(result) <= self.max_memo_items:
+                remember(key, result, measure(result))
+            return result
+        return wrapper
+
+    # ---- process pool ------------------------------------------------------
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and threads is not safe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def cpu_bound(self, func=None, *, timeout: Optional[float] = None):
+        """Run a synchronous tool in the process pool; ``timeout`` overrides the runtime's default."""
+        if func is None:
+            return lambda f: self.cpu_bound(f, timeout=timeout)
+        key = _function_key(func)
+        _CPU_FUNCTIONS[key] = func
+        limit = timeout or self.timeout
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if len(self._outstanding) >= self.max_queue:
+                self.cpu["rejected"] += 1
+                raise ServerBusy(f"{func.__name__}: {self.max_queue} CPU-bound calls already queued or running; retry later")
+            started = time.perf_counter()
+            future = self._pool().submit(_run_registered, key, args, kwargs)
+            self._outstanding.add(future)
+            # Done callbacks run on the executor's thread; update the set on the event loop
+            loop = asyncio.get_running_loop()
+
+            def forget(done):
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(self._outstanding.discard, done)
+
+            future.add_done_callback(forget)
+            self.cpu["peak_depth"] = max(self.cpu["peak_depth"], len(self._outstanding))
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), limit)
+            except asyncio.TimeoutError:
+                self.cpu["timeouts"] += 1
+                # Only a call still waiting in the queue can be cancelled; a running one keeps its worker
+                if not future.cancel():
+                    self.cpu["abandoned"] += 1
+                raise TimeoutError(f"{func.__name__} did not finish within {limit:.0f}s") from None
+            except asyncio.CancelledError:
+                self.cpu["cancelled"] += 1
+                if not future.cancel():
+                    self.cpu["abandoned"] += 1
+                raise
+            except Exception:
+                self.cpu["failed"] += 1
+                raise
+            self.cpu["completed"] += 1
+            self.cpu["seconds"] += time.perf_counter() - started
+            return result
+        return wrapper
+
+    # ---- stats -------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        caches = {}
+        for name, cache in self._caches.items():
+            s = self._cache_stats[name]
+            lookups = s["hits"] + s["misses"] + s["shared"]
+            caches[name] = {
+                **s,
+                "size": len(cache),
+                "hit_rate": round((s["hits"] + s["shared"]) / lookups, 4) if lookups else 0.0,
+            }
+        outstanding = list(self._outstanding)
+        running = sum(1 for future in outstanding if future.running())
+        completed = self.cpu["completed"]
+        return {
+            "caches": caches,
+            "cpu_pool": {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": len(outstanding),
+                "running": running,
+                "waiting": len(outstanding) - running,
+                **self.cpu,
+                "avg_seconds": round(self.cpu["seconds"] / completed, 4) if completed else 0.0,
+            },
+        }
+
+    def register_stats_resource(self, mcp, uri: str = "stats://tools"):
+        """Expose ``stats()`` as a JSON MCP resource."""
+        @mcp.resource(uri, name="tool-stats", description="Tool cache hit rates and CPU pool queue depth", mime_type="application/json")
+        def tool_stats() -> str:
+            return json.dumps(self.stats(), indent=2)
+        return tool_stats
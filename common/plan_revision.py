@@ -0,0 +1,197 @@
+"""Section-level revisions of a Markdown lesson plan.
+
+In the default group chat the LessonPlanner regenerates the whole plan on
+every turn and the Educator re-reads all of it, so output tokens (the slow
+part of a completion) grow with the plan rather than with the feedback. In
+revision mode the plan is kept locally as a ``PlanDocument`` split into
+sections; after the first draft the planner only emits edit blocks::
+
+    @@ REPLACE Activities @@
+    ...new section body...
+    @@ ADD Homework AFTER Assessment @@
+    ...
+    @@ DELETE Resources @@
+
+``apply_edits`` applies them, and the Educator reviews ``render_diff`` of the
+changed sections plus the document's ``outline``. A section spans its deeper
+subsections: REPLACE and DELETE act on the whole subtree, ADD goes after it,
+and headings in an edit's body become subsections again.
+"""
+
+import difflib
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from common.compaction import split_sentences
+
+EDIT_INSTRUCTIONS = (
+    "You are revising an existing lesson plan. Do NOT repeat the whole plan. Output only edit blocks, each starting "
+    "on its own line with one of: '@@ REPLACE <section title> @@', '@@ ADD <new section title> AFTER <section title> @@' "
+    "or '@@ DELETE <section title> @@'. Follow REPLACE and ADD markers with the complete new body of that section. "
+    "REPLACE and DELETE include the section's subsections, so a REPLACE body must repeat the subsections to keep. "
+    "Use the exact section titles of the current plan. Change only the sections the feedback is about."
+)
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_EDIT = re.compile(r"^@@\s*(REPLACE|ADD|DELETE)\s+(.+?)(?:\s+AFTER\s+(.+?))?\s*@@\s*$", re.IGNORECASE)
+
+
+def _key(title: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+@dataclass
+class Section:
+    title: str
+    body: str
+    level: int = 2
+
+    def render(self) -> str:
+        heading = f"{'#' * self.level} {self.title}\n" if self.title else ""
+        return f"{heading}{self.body.strip()}\n"
+
+
+@dataclass
+class Edit:
+    action: str
+    title: str
+    body: str = ""
+    after: Optional[str] = None
+
+
+@dataclass
+class PlanDocument:
+    """A Markdown plan as an ordered list of sections; text before the first heading is an untitled preamble."""
+
+    sections: List[Section] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, markdown: str) -> "PlanDocument":
+        sections = [Section("", "", 0)]
+        for line in markdown.splitlines():
+            match = _HEADING.match(line)
+            if match:
+                sections.append(Section(match.group(2), "", len(match.group(1))))
+            else:
+                sections[-1].body += line + "\n"
+        if not sections[0].body.strip():
+            sections.pop(0)
+        return cls(sections)
+
+    def render(self) -> str:
+        return "\n".join(section.render() for section in self.sections)
+
+    def subtree_end(self, index: int) -> int:
+        """Index just past section ``index`` and its deeper-level subsections."""
+        level = self.sections[index].level
+        end = index + 1
+        while end < len(self.sections) and self.sections[end].level > level:
+            end += 1
+        return end
+
+    def find(self, title: str) -> Optional[int]:
+        key = _key(title)
+        for index, section in enumerate(self.sections):
+            if _key(section.title) == key:
+                return index
+        return None
+
+    def outline(self, sentences_per_section: int = 1) -> str:
+        """Compact summary: every heading with the first sentence(s) of its body."""
+        lines = []
+        for section in self.sections:
+            first = " ".join(split_sentences(section.body)[:sentences_per_section])
+            lines.append(f"- {section.title or 'Overview'}: {first}")
+        return "\n".join(lines)
+
+    def copy(self) -> "PlanDocument":
+        return PlanDocument([Section(s.title, s.body, s.level) for s in self.sections])
+
+
+def parse_edits(text: str) -> List[Edit]:
+    """Edit blocks in ``text``; anything before the first marker is ignored."""
+    edits = []
+    for line in text.splitlines():
+        match = _EDIT.match(line.strip())
+        if match:
+            edits.append(Edit(match.group(1).upper(), match.group(2).strip(), "", match.group(3)))
+        elif edits:
+            # A repeated heading for the section is redundant with the marker
+            if not edits[-1].body and _HEADING.match(line) and _key(_HEADING.match(line).group(2)) == _key(edits[-1].title):
+                continue
+            edits[-1].body += line + "\n"
+    return edits
+
+
+def _edit_sections(title: str, level: int, body: str) -> List[Section]:
+    """The section an edit writes, followed by the subsections its body's headings start."""
+    parsed = PlanDocument.parse(body).sections
+    section = Section(title, "", level)
+    if parsed and not parsed[0].title and parsed[0].level == 0:
+        section.body = parsed.pop(0).body
+    return [section] + parsed
+
+
+def apply_edits(document: PlanDocument, edits: List[Edit]) -> Tuple[PlanDocument, List[str]]:
+    """Return the revised copy of ``document`` and a note for every edit that could not be applied.
+
+    REPLACE and DELETE cover the section together with its subsections. A
+    REPLACE of an unknown section is appended as a new section rather than lost.
+    """
+    revised = document.copy()
+    problems = []
+    for edit in edits:
+        index = revised.find(edit.title)
+        level = revised.sections[index].level if index is not None else 2
+        if edit.action == "DELETE":
+            if index is None:
+                problems.append(f"DELETE: no section '{edit.title}'")
+            else:
+                del revised.sections[index:revised.subtree_end(index)]
+        elif edit.action == "REPLACE" and index is not None:
+            revised.sections[index:revised.subtree_end(index)] = _edit_sections(edit.title, level, edit.body)
+        else:
+            position = len(revised.sections)
+            if edit.after:
+                after = revised.find(edit.after)
+                if after is None:
+                    problems.append(f"ADD: no section '{edit.after}', appended '{edit.title}' at the end")
+                else:
+                    position = revised.subtree_end(after)
+                    level = revised.sections[after].level
+            elif edit.action == "REPLACE":
+                problems.append(f"REPLACE: no section '{edit.title}', appended it")
+            revised.sections[position:position] = _edit_sections(edit.title, level, edit.body)
+    return revised, problems
+
+
+def render_diff(before: PlanDocument, after: PlanDocument) -> str:
+    """Unified diff of the rendered documents, limited to changed lines and a little context."""
+    diff = difflib.unified_diff(
+        before.render().splitlines(), after.render().splitlines(), "previous plan", "revised plan", n=1, lineterm=""
+    )
+    return "\n".join(diff) or "(no changes)"
+
+
+@dataclass
+class IterationStats:
+    iteration: int
+    planner_tokens: int
+    educator_tokens: int
+    seconds: float
+
+
+def compare_report(results: dict) -> str:
+    """Per-iteration and total output tokens / wall-clock for each mode, e.g. ``{"full": [...], "revise": [...]}``."""
+    lines = []
+    for mode, iterations in results.items():
+        for it in iterations:
+            lines.append(
+                f"{mode:<7} iteration {it.iteration}: planner {it.planner_tokens} + educator {it.educator_tokens} "
+                f"output tokens, {it.seconds:.1f}s"
+            )
+        tokens = sum(it.planner_tokens + it.educator_tokens for it in iterations)
+        seconds = sum(it.seconds for it in iterations)
+        lines.append(f"{mode:<7} total: {len(iterations)} iterations, {tokens} output tokens, {seconds:.1f}s")
+    return "\n".join(lines)
@@ -0,0 +1,262 @@
+"""Persistent store of generated lesson plans, looked up by normalized topic.
+
+Teachers ask for the same topics over and over ("Photosynthesis",
+"Incorporating Technology in the Classroom - high school"), and each request
+used to replay the whole multi-agent conversation. Plans are stored in a
+local SQLite file keyed by normalized topic + grade + framework, so
+"photosynthesis lesson plan" finds "Photosynthesis". With
+``min_similarity`` set (the UIs use 0.75), a lookup that misses the exact key
+takes the closest stored topic by cosine similarity of a local hashed
+character 3-gram vector, so "photosynthesys" and "Photosynthesis in plants"
+find "Photosynthesis". A similarity score alone cannot tell "World War I
+causes" from "World War II causes", or a long topic about mitosis from the
+same one about meiosis, and a plan for the wrong topic is worse than a miss.
+So a near match must also pass two guards:
+
+* the numbers and roman numerals of both topics are the same;
+* every word of the shorter topic matches a word of the longer one, exactly
+  (ignoring a plural "s") or with one typo in a word of six letters or more.
+
+Every save creates a new version; versions expire after a TTL. Exact hits,
+near hits, misses and the time/tokens saved are counted in the same file.
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    framework TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    vector TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (key, version)
+);
+CREATE TABLE IF NOT EXISTS plan_stats (
+    framework TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    near_hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    seconds_saved REAL NOT NULL DEFAULT 0,
+    tokens_saved INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_GRADE_PATTERNS = [
+    (re.compile(r"\b(elementary|primary)( school)?\b"), "elementary"),
+    (re.compile(r"\b(middle school|junior high)\b"), "middle school"),
+    (re.compile(r"\b(high school|secondary( school)?)\b"), "high school"),
+    (re.compile(r"\b(college|university|undergraduate)\b"), "college"),
+    (re.compile(r"\b(grade|year) ?(\d{1,2})\b|\b(\d{1,2})(st|nd|rd|th) grade\b"), None),
+]
+_FILLER = re.compile(r"\b(a|an|the|on|for|about|of|in|into|to|with|lesson|plan|plans|design|create|topic|class|classes)\b")
+_DIMENSIONS = 4096
+_NUMERAL = re.compile(r"^(\d+|(?=[ivxlc])c{0,3}(xc|xl|l?x{0,3})(ix|iv|v?i{0,3}))$")
+# Shortest word in which one typo is tolerated
+_TYPO_MIN_LENGTH = 6
+
+
+def normalize_topic(text: str):
+    """Split free text into ``(normalized_topic, grade)``; grade is '' when none is mentioned."""
+    text = text.lower()
+    grade = ""
+    for pattern, label in _GRADE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            grade = label or f"grade {next(g for g in (match.group(2), match.group(3)) if g)}"
+            text = pattern.sub(" ", text)
+            break
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    text = _FILLER.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip(), grade
+
+
+def vectorize(text: str) -> dict:
+    """Hashed, L2-normalized bag of character 3-grams of the words (no model, no network)."""
+    features = Counter()
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            features[padded[i:i + 3]] += 1
+    vector = Counter()
+    for feature, weight in features.items():
+        vector[zlib.crc32(feature.encode()) % _DIMENSIONS] += weight
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+
+def word_set(topic: str) -> frozenset:
+    """Words of a normalized topic, ignoring order, repeats and a plural "s"; numbers are kept as they are."""
+    return frozenset(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+                     for word in topic.split())
+
+
+def numerals(words) -> frozenset:
+    """The numbers and roman numerals ("ii", "xiv") among ``words``."""
+    return frozenset(word for word in words if _NUMERAL.match(word))
+
+
+def _one_typo(a: str, b: str) -> bool:
+    """Whether ``a`` and ``b`` differ by at most one inserted, deleted or substituted letter."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # Skip the first difference: a substitution if the lengths match, else the extra letter of b
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def words_covered(a: frozenset, b: frozenset) -> bool:
+    """Whether every word of the shorter topic matches its own word of the longer one."""
+    shorter, longer = sorted((a, b), key=len)
+    unused = set(longer)
+    for word in shorter:
+        match = word if word in unused else next(
+            (other for other in unused
+             if min(len(word), len(other)) >= _TYPO_MIN_LENGTH and not numerals((word, other)) and _one_typo(word, other)),
+            None,
+        )
+        if match is None:
+            return False
+        unused.discard(match)
+    return True
+
+
+def near_duplicate(a: str, b: str) -> bool:
+    """The guards a near match must pass besides the similarity threshold."""
+    words_a, words_b = word_set(a), word_set(b)
+    return numerals(words_a) == numerals(words_b) and words_covered(words_a, words_b)
+
+
+def cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+
+@dataclass
+class StoredPlan:
+    topic: str
+    grade: str
+    framework: str
+    version: int
+    plan: str
+    seconds: float
+    tokens: int
+    created_at: float
+    similarity: float = 1.0
+
+
+class PlanStore:
+    """Versioned, TTL-bound lesson plans keyed by normalized topic + grade + framework."""
+
+    def __init__(self, path: str = "plans.sqlite3", ttl_seconds: float = 7 * 24 * 3600,
+                 min_similarity: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        # None: exact topic matches only. A threshold opts in to guarded near matches.
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(framework: str, topic: str, grade: str) -> str:
+        return f"{framework}|{grade}|{topic}"
+
+    def lookup(self, text: str, framework: str) -> Optional[StoredPlan]:
+        """Return the newest unexpired plan for ``text`` and count the hit or miss.
+
+        Near duplicates are only considered when ``min_similarity`` is set.
+        """
+        topic, grade = normalize_topic(text)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, topic, grade, framework, version, plan, seconds, tokens, created_at, vector FROM plans "
+                "WHERE framework = ? AND grade = ? AND expires_at > ? ORDER BY version DESC",
+                (framework, grade, now),
+            ).fetchall()
+
+        best, best_similarity = None, 0.0
+        wanted_key = self.key(framework, topic, grade)
+        exact = next((row for row in rows if row[0] == wanted_key), None)
+        if exact is not None:
+            best, best_similarity = exact, 1.0
+        elif self.min_similarity is not None:
+            query = vectorize(topic)
+            seen = set()
+            for row in rows:
+                if row[0] in seen:
+                    continue  # rows are newest first; only compare the latest version of each key
+                seen.add(row[0])
+                if not near_duplicate(topic, row[1]):
+                    continue  # "world war i" is not "world war ii", however close the n-grams are
+                similarity = cosine(query, {int(k): v for k, v in json.loads(row[9]).items()})
+                if similarity > best_similarity:
+                    best, best_similarity = row, similarity
+            if best_similarity < self.min_similarity:
+                best = None
+
+        if best is None:
+            self._count(framework, "misses")
+            return None
+        plan = StoredPlan(best[1], best[2], best[3], best[4], best[5], best[6], best[7], best[8], best_similarity)
+        self._count(framework, "hits" if best is exact else "near_hits", plan.seconds, plan.tokens)
+        return plan
+
+    def save(self, text: str, framework: str, plan: str, seconds: float, tokens: int) -> int:
+        """Store a new version of the plan for ``text`` and return its version number."""
+        topic, grade = normalize_topic(text)
+        key = self.key(framework, topic, grade)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            version = self._conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM plans WHERE key = ?", (key,)).fetchone()[0]
+            self._conn.execute(
+                "INSERT INTO plans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, version, framework, grade, topic, plan, json.dumps(vectorize(topic)), seconds, tokens, now, now + self.ttl_seconds),
+            )
+            self._conn.execute("DELETE FROM plans WHERE expires_at <= ?", (now,))
+            self._conn.execute("COMMIT")
+        return version
+
+    def _count(self, framework: str, column: str, seconds: float = 0.0, tokens: int = 0):
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO plan_stats (framework) VALUES (?)", (framework,))
+            self._conn.execute(
+                f"UPDATE plan_stats SET {column} = {column} + 1, seconds_saved = seconds_saved + ?, "
+                "tokens_saved = tokens_saved + ? WHERE framework = ?",
+                (seconds, tokens, framework),
+            )
+
+    def report(self, framework: str) -> str:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hits, near_hits, misses, seconds_saved, tokens_saved FROM plan_stats WHERE framework = ?", (framework,)
+            ).fetchone() or (0, 0, 0, 0.0, 0)
+        hits, near_hits, misses, seconds_saved, tokens_saved = row
+        total = hits + near_hits + misses
+        hit_rate = (hits + near_hits) / total if total else 0.0
+        return (
+            f"Plan store: {hit_rate:.0%} hit rate ({hits} exact, {near_hits} near, {misses} misses), "
+            f"{seconds_saved:.0f}s and {tokens_saved} tokens saved"
+        )
@@ -0,0 +1,416 @@
+"""Client-side rate limiting to each deployment's RPM/TPM quota.
+
+Azure OpenAI meters every deployment in requests per minute (RPM) and
+tokens per minute (TPM). A request counts as its prompt tokens plus its
+``max_tokens``. Without client-side limiting, every click fires at once, and
+the overflow comes back as 429s. SDK retries then resend the overflow
+together, so it fails again. ``RateLimiter`` keeps one token bucket per
+quota for each deployment, shared by the whole process:
+
+* ``reserve`` takes the request's share from both buckets immediately and
+  returns how long the caller must wait for it to refill. Waits are granted
+  in arrival order, so callers queue fairly instead of racing. Sustained load
+  runs at the quota rate.
+* ``observe`` feeds response headers back. ``x-ratelimit-remaining-*`` lowers
+  the buckets to what the service says is left; ``x-ratelimit-limit-*``
+  sets quotas that were not configured; ``Retry-After`` on a 429 holds every
+  caller until it has passed.
+
+Quotas come from ``AGENT_RATE_LIMITS``, either a JSON file or inline JSON
+like ``{"gpt-4o": {"rpm": 300, "tpm": 50000}, "*": {"rpm": 60}}``. Keys are
+deployment names (``agents`` for the Agents service); ``*`` applies to any
+other key. A deployment without a quota is only slowed by the service's
+headers.
+
+The clients wire it in at their transports:
+
+* ``http_client()`` / ``async_http_client()`` are openai ``httpx`` clients for
+  ``AzureOpenAI``/``AsyncAzureOpenAI``. AutoGen's
+  ``AzureOpenAIChatCompletionClient(http_client=...)`` and the shared SK client
+  in ``common.sk_services`` use them as well. The deployment comes from the
+  request URL and the token estimate from the request body. 429s are left to
+  the SDK's own retries (``max_retries``, 2 by default): each retry passes
+  through the transport again, so it waits its turn, and the ``Retry-After``
+  that ``observe`` saw holds every other caller too. Retrying here as well
+  would multiply the attempts per request.
+* ``limit_agents(client)`` wraps an ``AIProjectClient`` (or the emulator). It
+  paces Agents service calls and retries 429s that outlast the SDK's own
+  retries.
+"""
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from common.tokens import count_tokens
+
+try:
+    import httpx
+    from openai import DEFAULT_CONNECTION_LIMITS, DefaultAsyncHttpxClient, DefaultHttpxClient
+except ImportError:  # both ship with openai; the Agents service demos run without them
+    httpx = None
+
+LIMITS_ENV_VAR = "AGENT_RATE_LIMITS"
+AGENTS_KEY = "agents"
+# A full bucket holds this many seconds of quota; the service enforces the per-minute quota over short windows
+BURST_SECONDS = 1.0
+# Counted for a chat request that sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+DEFAULT_RETRIES = 6
+DEFAULT_RETRY_AFTER = 1.0
+_DEPLOYMENT_PATH = re.compile(r"/deployments/([^/]+)/")
+# Emulator helpers that make no request
+_LOCAL_OPERATIONS = ("sleep",)
+
+
+class TokenBucket:
+    """``per_minute`` units refilled continuously, holding at most ``burst_seconds`` of them.
+
+    A reservation may take the level below zero. The caller then waits until
+    the level has climbed back to zero, so later reservations wait longer.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def clamp(self, remaining: float, now: float):
+        """The service says only ``remaining`` is left: never hand out more than that."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+    def drain(self, seconds: float, now: float):
+        """Nothing more for ``seconds``; reservations after that are spaced at the refill rate."""
+        self._refill(now)
+        self.level = min(self.level, -seconds * self.rate)
+
+
+@dataclass
+class LimiterStats:
+    requests: int = 0
+    tokens: int = 0
+    delayed: int = 0
+    waited: float = 0.0
+    max_wait: float = 0.0
+    throttled: int = 0
+    retried: int = 0
+
+
+class RateLimiter:
+    """Request and token buckets for one deployment, fed by its response headers."""
+
+    def __init__(self, key: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 burst_seconds: float = BURST_SECONDS):
+        self.key = key
+        self.burst_seconds = burst_seconds
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm else None
+        self.configured = bool(rpm or tpm)
+        self.stats = LimiterStats()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Take one request and ``tokens`` from the buckets; returns the seconds to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._blocked_until - now)
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None and tokens:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.stats.requests += 1
+            self.stats.tokens += tokens
+            if delay > 0:
+                self.stats.delayed += 1
+                self.stats.waited += delay
+                self.stats.max_wait = max(self.stats.max_wait, delay)
+            return delay
+
+    def _held(self) -> float:
+        # A 429 that arrived while this caller slept holds it too
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def acquire(self, tokens: int = 0):
+        delay = self.reserve(tokens)
+        while delay > 0:
+            time.sleep(delay)
+            delay = self._held()
+
+    async def acquire_async(self, tokens: int = 0):
+        delay = self.reserve(tokens)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._held()
+
+    def observe(self, status_code: int, headers) -> Optional[float]:
+        """Adjust to a response's rate-limit headers; returns the Retry-After of a 429."""
+        headers = headers or {}
+        with self._lock:
+            now = time.monotonic()
+            for name in ("requests", "tokens"):
+                limit = _number(headers.get(f"x-ratelimit-limit-{name}"))
+                if limit and not self.configured and getattr(self, name) is None:
+                    setattr(self, name, TokenBucket(limit, self.burst_seconds))
+                remaining = _number(headers.get(f"x-ratelimit-remaining-{name}"))
+                if remaining is not None and getattr(self, name) is not None:
+                    getattr(self, name).clamp(remaining, now)
+            if status_code != 429:
+                return None
+            retry_after = retry_after_seconds(headers) or DEFAULT_RETRY_AFTER
+            self._penalize(retry_after, now)
+            return retry_after
+
+    def throttled(self, retry_after: float):
+        """A 429 whose headers were already read (e.g. from an SDK exception)."""
+        with self._lock:
+            self._penalize(retry_after, time.monotonic())
+
+    def _penalize(self, seconds: float, now: float):
+        self.stats.throttled += 1
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.drain(seconds, now)
+
+    def report(self) -> str:
+        s = self.stats
+        quota = ", ".join(
+            f"{bucket.per_minute:g} {name}/min"
+            for name, bucket in (("requests", self.requests), ("tokens", self.tokens)) if bucket is not None
+        ) or "no quota"
+        return (
+            f"Rate limit {self.key} ({quota}): {s.requests} requests, {s.tokens} tokens | "
+            f"{s.delayed} queued, {s.waited:.1f}s waiting (max {s.max_wait:.1f}s) | "
+            f"{s.throttled} throttled by the service, {s.retried} retried"
+        )
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    value = _number(headers.get("retry-after-ms"))
+    if value is not None:
+        return value / 1000
+    return _number(headers.get("retry-after"))
+
+
+def load_limits(source: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """Quotas from ``source`` (default ``AGENT_RATE_LIMITS``): inline JSON or the path of a JSON file."""
+    source = source if source is not None else os.getenv(LIMITS_ENV_VAR, "")
+    if not source.strip():
+        return {}
+    if source.lstrip().startswith("{"):
+        return json.loads(source)
+    with open(source, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limits: Optional[Dict[str, Dict[str, float]]] = None
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(key: str) -> RateLimiter:
+    """The process-wide limiter for a deployment (or ``agents``)."""
+    global _limits
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            if _limits is None:
+                _limits = load_limits()
+            quota = _limits.get(key) or _limits.get("*") or {}
+            limiter = _limiters[key] = RateLimiter(key, quota.get("rpm"), quota.get("tpm"))
+        return limiter
+
+
+def report() -> str:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return "\n".join(limiter.report() for limiter in limiters) or "Rate limit: no requests"
+
+
+def _text_tokens(value) -> int:
+    if isinstance(value, str):
+        return count_tokens(value)
+    if isinstance(value, list):
+        return sum(_text_tokens(item) for item in value)
+    if isinstance(value, dict):
+        # Message parts ({"type": "text", "text": ...}) and messages ({"role": ..., "content": ...})
+        return _text_tokens(value.get("text") or value.get("content") or value.get("input") or "")
+    return 0
+
+
+def estimate_tokens(body: Dict[str, Any]) -> int:
+    """Tokens the service counts against TPM for a request body: prompt plus ``max_tokens``."""
+    prompt = _text_tokens(body.get("messages") or body.get("input") or body.get("prompt") or "")
+    if not prompt:
+        return 0
+    if "input" in body and "messages" not in body and "max_output_tokens" not in body:
+        return prompt  # embeddings
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or body.get("max_output_tokens")
+    return prompt + int(completion or DEFAULT_COMPLETION_TOKENS)
+
+
+def describe_request(path: str, body: Dict[str, Any], host: str = "") -> Tuple[str, int]:
+    """``(deployment, estimated tokens)`` for an OpenAI request."""
+    match = _DEPLOYMENT_PATH.search(path)
+    key = match.group(1) if match else body.get("model") or host
+    return key, estimate_tokens(body)
+
+
+def _read_request(request) -> Tuple[RateLimiter, int]:
+    body = {}
+    if request.method == "POST" and "json" in request.headers.get("content-type", ""):
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            pass
+    key, tokens = describe_request(request.url.path, body if isinstance(body, dict) else {}, request.url.host)
+    return get_limiter(key), tokens
+
+
+def _count_retry(limiter: RateLimiter, request):
+    # The openai SDK numbers its attempts; a retry is paced like any other request
+    if request.headers.get("x-stainless-retry-count", "0") not in ("", "0"):
+        limiter.stats.retried += 1
+
+
+class RateLimitedTransport(httpx.BaseTransport if httpx else object):
+    """``httpx`` transport that makes each request wait its turn at the deployment's limiter.
+
+    A 429 is returned to the SDK, whose retry comes back through here.
+    """
+
+    def __init__(self, transport=None):
+        self._transport = transport or httpx.HTTPTransport(limits=DEFAULT_CONNECTION_LIMITS)
+
+    def handle_request(self, request):
+        limiter, tokens = _read_request(request)
+        _count_retry(limiter, request)
+        limiter.acquire(tokens)
+        response = self._transport.handle_request(request)
+        limiter.observe(response.status_code, response.headers)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport if httpx else object):
+    """The ``AsyncClient`` counterpart of ``RateLimitedTransport``, sharing the same limiters."""
+
+    def __init__(self, transport=None):
+        self._transport = transport or httpx.AsyncHTTPTransport(limits=DEFAULT_CONNECTION_LIMITS)
+
+    async def handle_async_request(self, request):
+        limiter, tokens = _read_request(request)
+        _count_retry(limiter, request)
+        await limiter.acquire_async(tokens)
+        response = await self._transport.handle_async_request(request)
+        limiter.observe(response.status_code, response.headers)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def http_client(**kwargs):
+    """An openai ``httpx.Client`` (default timeouts and pool) whose requests go through the limiters."""
+    return DefaultHttpxClient(transport=RateLimitedTransport(), **kwargs)
+
+
+def async_http_client(**kwargs):
+    """An openai ``httpx.AsyncClient`` whose requests go through the limiters."""
+    return DefaultAsyncHttpxClient(transport=AsyncRateLimitedTransport(), **kwargs)
+
+
+class _LimitedOperations:
+    """Proxy for an Agents operations group that paces each call and retries 429s it gets back."""
+
+    def __init__(self, target, limiter: RateLimiter, retries: int, scale: float):
+        self._target = target
+        self._limiter = limiter
+        self._retries = retries
+        self._scale = scale
+        self._cache: Dict[str, Any] = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            return getattr(self._target, name)
+        if name in self._cache:
+            return self._cache[name]
+        attr = getattr(self._target, name)
+        if name in _LOCAL_OPERATIONS:
+            return attr
+        if callable(attr):
+            wrapped = self._limited(attr)
+        elif hasattr(attr, "__dict__"):
+            # A sub-client such as agents.threads or agents.runs.steps
+            wrapped = _LimitedOperations(attr, self._limiter, self._retries, self._scale)
+        else:
+            return attr
+        self._cache[name] = wrapped
+        return wrapped
+
+    def _limited(self, method):
+        def call(*args, **kwargs):
+            for attempt in range(self._retries + 1):
+                self._limiter.acquire()
+                try:
+                    return method(*args, **kwargs)
+                except Exception as exc:
+                    response = getattr(exc, "response", None)
+                    if getattr(response, "status_code", None) != 429 or attempt == self._retries:
+                        raise
+                    retry_after = retry_after_seconds(response.headers or {}) or DEFAULT_RETRY_AFTER
+                    self._limiter.throttled(retry_after * self._scale)
+                    self._limiter.stats.retried += 1
+
+        return call
+
+
+class RateLimitedProjectClient:
+    """A project client whose ``agents`` calls share the ``agents`` limiter."""
+
+    def __init__(self, client, limiter: Optional[RateLimiter] = None, retries: int = DEFAULT_RETRIES):
+        self._client = client
+        # The emulator runs its service clock faster; its Retry-After values are in service seconds
+        scale = getattr(client.agents, "time_scale", 1.0)
+        self.agents = _LimitedOperations(client.agents, limiter or get_limiter(AGENTS_KEY), retries, scale)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._client.__exit__(*exc)
+
+
+def limit_agents(client, limiter: Optional[RateLimiter] = None):
+    return RateLimitedProjectClient(client, limiter)
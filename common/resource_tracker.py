@@ -0,0 +1,634 @@
+"""Tracking and garbage collection of agents, threads, vector stores and files.
+
+The demos create Agents service resources freely and delete them unevenly.
+``ai-agent-rag-ui.py`` created an agent and a thread on every Send and lost
+both, plus the vector store, whenever the run raised. The AutoGen tools left
+one thread behind per call, and ``connected-agents/main.py`` never deleted a
+session thread. Leftovers slow down list operations and count against the
+project's quotas.
+
+``track(client)`` wraps a project client (``get_project_client`` does this for
+every demo). Each call that creates a resource is recorded with its kind,
+creation time, owning process and tags (``demo`` plus the enclosing
+``common.token_usage`` scope). Agents, threads and vector stores are also
+tagged in their ``metadata`` (``created_by``, ``session``), so they can be
+found in the portal. Deletes made through the client drop the record.
+Resources then go away by one of three routes:
+
+* ``scope()`` deletes, on exit, everything created inside it that is still
+  alive, in one concurrent batch, even when the block raised.
+* Resources created outside any scope are deleted when the process exits.
+* ``ResourceTracker.start_sweeper`` runs a background thread. It batch-deletes
+  resources idle for longer than ``max_idle`` seconds (optionally only those
+  matching some tags), including resources left by processes that crashed.
+  Calls naming a thread or an agent count as use. Pinned resources (such as
+  pooled agents) are skipped while their process is alive.
+
+Records live in ``ResourceLedger``, an in-memory SQLite database. When
+``AGENT_RESOURCE_LEDGER`` names a file, the records persist across processes,
+and ``python -m common.resource_tracker sweep`` can clean up after earlier
+runs.
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from common import token_usage
+
+LEDGER_ENV_VAR = "AGENT_RESOURCE_LEDGER"
+KINDS = ("agent", "thread", "vector_store", "file")
+TAG_KEY = "created_by"
+DEFAULT_MAX_IDLE = 3600.0
+DEFAULT_SWEEP_INTERVAL = 300.0
+DELETE_WORKERS = 8
+# Last-use times are written to the ledger at most this often per resource
+TOUCH_INTERVAL = 60.0
+
+# Operations (old and new SDK names) that create or delete a resource, by kind
+_CREATES = {
+    "agents.create_agent": "agent",
+    "agents.create_thread": "thread",
+    "agents.threads.create": "thread",
+    "agents.create_vector_store": "vector_store",
+    "agents.create_vector_store_and_poll": "vector_store",
+    "agents.vector_stores.create": "vector_store",
+    "agents.vector_stores.create_and_poll": "vector_store",
+    "agents.upload_file": "file",
+    "agents.upload_file_and_poll": "file",
+    "agents.files.upload": "file",
+    "agents.files.upload_and_poll": "file",
+}
+_DELETES = {
+    "agents.delete_agent": "agent",
+    "agents.delete_thread": "thread",
+    "agents.threads.delete": "thread",
+    "agents.delete_vector_store": "vector_store",
+    "agents.vector_stores.delete": "vector_store",
+    "agents.delete_file": "file",
+    "agents.files.delete": "file",
+}
+# Files take no metadata
+_TAGGABLE = ("agent", "thread", "vector_store")
+_ID_ARGUMENTS = {
+    "agent": ("agent_id", "assistant_id"),
+    "thread": ("thread_id",),
+    "vector_store": ("vector_store_id",),
+    "file": ("file_id",),
+}
+_USE_ARGUMENTS = ("thread_id", "agent_id", "assistant_id")
+# Delete calls per kind: old SDK on ``client.agents``, new SDK on its sub-clients
+_OLD_DELETERS = {"agent": "delete_agent", "thread": "delete_thread", "vector_store": "delete_vector_store",
+                 "file": "delete_file"}
+_NEW_DELETERS = {"agent": "delete_agent", "thread": "threads.delete", "vector_store": "vector_stores.delete",
+                 "file": "files.delete"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    namespace TEXT NOT NULL,
+    id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    pid INTEGER NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    tags TEXT NOT NULL,
+    PRIMARY KEY (namespace, id)
+);
+CREATE INDEX IF NOT EXISTS resources_used ON resources (namespace, used_at);
+"""
+
+
+@dataclass
+class Resource:
+    kind: str
+    id: str
+    created_at: float
+    used_at: float
+    pid: int
+    tags: Dict[str, str] = field(default_factory=dict)
+    pinned: bool = False
+
+    def matches(self, tags: Optional[Dict[str, str]]) -> bool:
+        return all(self.tags.get(key) == value for key, value in (tags or {}).items())
+
+
+@dataclass
+class TrackerStats:
+    created: Counter = field(default_factory=Counter)
+    deleted: Counter = field(default_factory=Counter)
+    # Already gone when we tried (deleted elsewhere, or a stale ledger row)
+    missing: int = 0
+    failed: int = 0
+    swept: int = 0
+    sweeps: int = 0
+    delete_seconds: float = 0.0
+
+
+def deleter(client, kind: str):
+    """The call that deletes a resource of ``kind``, for the old or the new SDK's client."""
+    target = client.agents
+    path = _OLD_DELETERS[kind] if hasattr(target, "create_thread") else _NEW_DELETERS[kind]
+    for name in path.split("."):
+        target = getattr(target, name)
+    return target
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to someone else
+        return True
+    return True
+
+
+class ResourceLedger:
+    """Tracked resources per namespace (one namespace per project) in SQLite."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def add(self, namespace: str, resource: Resource):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (namespace, resource.id, resource.kind, resource.created_at, resource.used_at, resource.pid,
+                 int(resource.pinned), json.dumps(resource.tags)),
+            )
+
+    def touch(self, namespace: str, resource_id: str, used_at: float):
+        with self._lock:
+            self._conn.execute("UPDATE resources SET used_at = ? WHERE namespace = ? AND id = ?",
+                               (used_at, namespace, resource_id))
+
+    def pin(self, namespace: str, resource_id: str, pinned: bool = True):
+        with self._lock:
+            self._conn.execute("UPDATE resources SET pinned = ? WHERE namespace = ? AND id = ?",
+                               (int(pinned), namespace, resource_id))
+
+    def remove(self, namespace: str, resource_ids: Iterable[str]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM resources WHERE namespace = ? AND id = ?",
+                                   [(namespace, resource_id) for resource_id in resource_ids])
+
+    def resources(self, namespace: str, idle_since: Optional[float] = None) -> List[Resource]:
+        """Resources in ``namespace``, only those last used before ``idle_since`` when it is given."""
+        query = "SELECT kind, id, created_at, used_at, pid, tags, pinned FROM resources WHERE namespace = ?"
+        params: Tuple = (namespace,)
+        if idle_since is not None:
+            query += " AND used_at < ?"
+            params += (idle_since,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY used_at", params).fetchall()
+        return [Resource(kind, resource_id, created_at, used_at, pid, json.loads(tags), bool(pinned))
+                for kind, resource_id, created_at, used_at, pid, tags, pinned in rows]
+
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT namespace FROM resources")]
+
+
+_ledger: Optional[ResourceLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> ResourceLedger:
+    """The process ledger, in ``AGENT_RESOURCE_LEDGER`` when it is set, else in memory."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ResourceLedger(os.getenv(LEDGER_ENV_VAR) or ":memory:")
+        return _ledger
+
+
+# Resources created in the innermost scope() of this context, as (tracker, resource) pairs
+_scope: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("resource_scope", default=None)
+
+
+@contextmanager
+def scope():
+    """Delete every resource created inside the block and still alive on exit, including after an exception."""
+    created: list = []
+    token = _scope.set(created)
+    try:
+        yield created
+    finally:
+        _scope.reset(token)
+        by_tracker: Dict[int, Tuple[ResourceTracker, list]] = {}
+        for tracker, resource in created:
+            by_tracker.setdefault(id(tracker), (tracker, []))[1].append(resource)
+        for tracker, resources in by_tracker.values():
+            tracker.delete([resource for resource in resources if tracker.alive(resource.id)])
+
+
+class ResourceTracker:
+    """Records the resources created through one project client and deletes them in concurrent batches.
+
+    ``client`` is the client to delete through (the traced, rate-limited one
+    the tracking proxy wraps). ``namespace`` separates projects in a shared
+    ledger.
+    """
+
+    def __init__(self, client, namespace: str = "default", ledger: Optional[ResourceLedger] = None,
+                 workers: int = DELETE_WORKERS, delete_on_exit: bool = True):
+        self.client = client
+        self.namespace = namespace
+        self.ledger = ledger or get_ledger()
+        self.workers = workers
+        self.stats = TrackerStats()
+        self._live: Dict[str, Resource] = {}
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._closed = False
+        if delete_on_exit:
+            atexit.register(self.close)
+
+    # -- recording ----------------------------------------------------------
+
+    def tags(self) -> Dict[str, str]:
+        """Tags for a resource created now: the demo plus the enclosing token_usage scope."""
+        tags = {"demo": token_usage.get_ledger().demo}
+        tags.update({key: str(value) for key, value in token_usage.current_tags().items()})
+        return tags
+
+    def metadata(self) -> Dict[str, str]:
+        """Service-side metadata tags, for finding our resources outside the ledger."""
+        tags = self.tags()
+        metadata = {TAG_KEY: tags["demo"]}
+        if "session" in tags:
+            metadata["session"] = tags["session"]
+        return metadata
+
+    def record(self, kind: str, resource_id: str, tags: Optional[Dict[str, str]] = None) -> Resource:
+        now = time.time()
+        resource = Resource(kind, resource_id, now, now, os.getpid(), tags if tags is not None else self.tags())
+        with self._lock:
+            self._live[resource_id] = resource
+            self._touched[resource_id] = now
+            self.stats.created[kind] += 1
+        self.ledger.add(self.namespace, resource)
+        created = _scope.get()
+        if created is not None:
+            created.append((self, resource))
+        return resource
+
+    def forget(self, resource_ids: Iterable[str]):
+        resource_ids = list(resource_ids)
+        with self._lock:
+            for resource_id in resource_ids:
+                self._live.pop(resource_id, None)
+                self._touched.pop(resource_id, None)
+        self.ledger.remove(self.namespace, resource_ids)
+
+    def touch(self, resource_id: str):
+        """Mark a resource as used now; written to the ledger at most every ``TOUCH_INTERVAL`` seconds."""
+        now = time.time()
+        with self._lock:
+            resource = self._live.get(resource_id)
+            if resource is None:
+                return
+            resource.used_at = now
+            if now - self._touched.get(resource_id, 0.0) < TOUCH_INTERVAL:
+                return
+            self._touched[resource_id] = now
+        self.ledger.touch(self.namespace, resource_id, now)
+
+    def pin(self, resource_id: str, pinned: bool = True):
+        """Exempt a resource from sweeping while this process runs; it is still deleted on exit."""
+        with self._lock:
+            resource = self._live.get(resource_id)
+            if resource is not None:
+                resource.pinned = pinned
+        self.ledger.pin(self.namespace, resource_id, pinned)
+
+    def alive(self, resource_id: str) -> bool:
+        """Whether a resource created through this tracker has not been deleted (by us or the sweeper)."""
+        with self._lock:
+            return resource_id in self._live
+
+    def live(self, tags: Optional[Dict[str, str]] = None) -> List[Resource]:
+        with self._lock:
+            return [resource for resource in self._live.values() if resource.matches(tags)]
+
+    # -- deleting -----------------------------------------------------------
+
+    def _delete_one(self, resource: Resource) -> bool:
+        try:
+            deleter(self.client, resource.kind)(resource.id)
+        except Exception as exc:
+            if getattr(getattr(exc, "response", None), "status_code", None) != 404:
+                with self._lock:
+                    self.stats.failed += 1
+                return False
+            with self._lock:
+                self.stats.missing += 1
+        else:
+            with self._lock:
+                self.stats.deleted[resource.kind] += 1
+        self.forget([resource.id])
+        return True
+
+    def _submit(self, resource: Resource) -> Future:
+        with self._lock:
+            if not self._workers:
+                # Plain daemon threads rather than a ThreadPoolExecutor: executors refuse work once the
+                # interpreter starts shutting down, which is exactly when close() runs from atexit
+                self._workers = [threading.Thread(target=self._work, name=f"resource-delete-{i}", daemon=True)
+                                 for i in range(self.workers)]
+                for worker in self._workers:
+                    worker.start()
+        future: Future = Future()
+        # Each delete runs in a copy of this context so its span nests under the caller's
+        self._queue.put((contextvars.copy_context(), resource, future))
+        return future
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            context, resource, future = item
+            try:
+                future.set_result(context.run(self._delete_one, resource))
+            except BaseException as exc:
+                future.set_exception(exc)
+            finally:
+                self._queue.task_done()
+
+    def delete(self, resources: Iterable[Resource]) -> int:
+        """Delete ``resources`` concurrently and wait; returns how many are gone. Failures stay tracked."""
+        resources = list(resources)
+        if not resources:
+            return 0
+        started = time.perf_counter()
+        futures = [self._submit(resource) for resource in resources]
+        gone = sum(future.result() for future in futures)
+        with self._lock:
+            self.stats.delete_seconds += time.perf_counter() - started
+        return gone
+
+    def delete_later(self, kind: str, resource_id: str):
+        """Delete one resource in the background, e.g. a thread whose run has finished."""
+        with self._lock:
+            resource = self._live.get(resource_id)
+        self._submit(resource or Resource(kind, resource_id, 0.0, 0.0, os.getpid()))
+
+    # -- sweeping -----------------------------------------------------------
+
+    def stale(self, max_idle: float = DEFAULT_MAX_IDLE, tags: Optional[Dict[str, str]] = None) -> List[Resource]:
+        """Ledger resources idle for ``max_idle`` seconds and matching ``tags``, pinned ones of live processes excepted."""
+        idle_since = time.time() - max_idle
+        candidates = self.ledger.resources(self.namespace, idle_since=idle_since)
+        with self._lock:
+            # This process's last-use times may be newer than the ledger's
+            candidates = [self._live.get(resource.id, resource) for resource in candidates]
+        return [
+            resource for resource in candidates
+            if resource.used_at < idle_since and resource.matches(tags) and not (resource.pinned and _pid_alive(resource.pid))
+        ]
+
+    def sweep(self, max_idle: float = DEFAULT_MAX_IDLE, tags: Optional[Dict[str, str]] = None,
+              dry_run: bool = False) -> List[Resource]:
+        """Batch-delete the stale resources, including those of other processes in the ledger."""
+        stale = self.stale(max_idle, tags)
+        if dry_run or not stale:
+            return stale
+        self.delete(stale)
+        with self._lock:
+            self.stats.swept += len(stale)
+            self.stats.sweeps += 1
+        return stale
+
+    def start_sweeper(self, max_idle: float = DEFAULT_MAX_IDLE, interval: float = DEFAULT_SWEEP_INTERVAL,
+                      tags: Optional[Dict[str, str]] = None):
+        """Sweep every ``interval`` seconds in a daemon thread; later calls while it runs do nothing."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, args=(max_idle, interval, tags),
+                                             name="resource-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self, max_idle: float, interval: float, tags: Optional[Dict[str, str]]):
+        while not self._stop.wait(interval):
+            try:
+                self.sweep(max_idle, tags)
+            except Exception:
+                # A failed sweep leaves the rows for the next one
+                pass
+
+    def close(self):
+        """Stop the sweeper and delete everything this process still tracks (including pending deletes)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        self.delete(self.live())
+        # Background deletes still queued, then stop the workers
+        self._queue.join()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+
+    def report(self) -> str:
+        s = self.stats
+        live = Counter(resource.kind for resource in self.live())
+        parts = [f"{label} {_kinds(counts)}" for label, counts in (("created", s.created), ("deleted", s.deleted), ("live", live))]
+        if s.sweeps:
+            parts.append(f"swept {s.swept} in {s.sweeps} sweeps")
+        if s.missing or s.failed:
+            parts.append(f"{s.missing} already gone, {s.failed} failed")
+        return "Agent resources: " + ", ".join(parts)
+
+
+def _kinds(counts: Counter) -> str:
+    if not counts:
+        return "0"
+    return f"{sum(counts.values())} (" + ", ".join(f"{counts[kind]} {kind.replace('_', ' ')}" for kind in KINDS if counts[kind]) + ")"
+
+
+def _resource_id(kind: str, args, kwargs) -> Optional[str]:
+    for name in _ID_ARGUMENTS[kind]:
+        if name in kwargs:
+            return kwargs[name]
+    return args[0] if args else None
+
+
+class _TrackedOperations:
+    """Proxy for an Agents operations group that records the resources its calls create and delete."""
+
+    def __init__(self, target, tracker: ResourceTracker, prefix: str):
+        self._target = target
+        self._tracker = tracker
+        self._prefix = prefix
+        self._cache: Dict[str, Any] = {}
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            return getattr(self._target, name)
+        if name in self._cache:
+            return self._cache[name]
+        attr = getattr(self._target, name)
+        path = f"{self._prefix}.{name}"
+        if path in _CREATES:
+            wrapped = self._creating(_CREATES[path], attr)
+        elif path in _DELETES:
+            wrapped = self._deleting(_DELETES[path], attr)
+        elif callable(attr):
+            wrapped = self._using(attr)
+        elif hasattr(attr, "__dict__"):
+            # A sub-client such as agents.threads or agents.vector_stores
+            wrapped = _TrackedOperations(attr, self._tracker, path)
+        else:
+            return attr
+        self._cache[name] = wrapped
+        return wrapped
+
+    def _creating(self, kind: str, method):
+        def call(*args, **kwargs):
+            if kind in _TAGGABLE:
+                kwargs["metadata"] = {**self._tracker.metadata(), **(kwargs.get("metadata") or {})}
+            result = method(*args, **kwargs)
+            resource_id = getattr(result, "id", None)
+            if resource_id:
+                self._tracker.record(kind, resource_id)
+            return result
+
+        return call
+
+    def _deleting(self, kind: str, method):
+        def call(*args, **kwargs):
+            resource_id = _resource_id(kind, args, kwargs)
+            try:
+                result = method(*args, **kwargs)
+            except Exception as exc:
+                if getattr(getattr(exc, "response", None), "status_code", None) == 404:
+                    # Already gone, so nothing is left to track
+                    self._tracker.forget([resource_id])
+                raise
+            self._tracker.forget([resource_id])
+            return result
+
+        return call
+
+    def _using(self, method):
+        def call(*args, **kwargs):
+            for name in _USE_ARGUMENTS:
+                value = kwargs.get(name)
+                if isinstance(value, str):
+                    self._tracker.touch(value)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class TrackedProjectClient:
+    """A project client whose created resources are tracked by ``resource_tracker``."""
+
+    def __init__(self, client, tracker: ResourceTracker):
+        self._client = client
+        self.resource_tracker = tracker
+        self.agents = _TrackedOperations(client.agents, tracker, "agents")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def __enter__(self):
+        self._client.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._client.__exit__(*exc)
+
+
+def track(client, namespace: str = "default", ledger: Optional[ResourceLedger] = None):
+    """``client`` wrapped so that the resources created through it are tracked and cleaned up."""
+    return TrackedProjectClient(client, ResourceTracker(client, namespace, ledger))
+
+
+def tracker_for(client) -> Optional[ResourceTracker]:
+    """The tracker of a client from ``track``/``get_project_client``, or ``None`` for an untracked one."""
+    return getattr(client, "resource_tracker", None)
+
+
+def release(client, kind: str, resource_id: str):
+    """Delete a resource that is no longer needed: in the background when tracked, else right away."""
+    tracker = tracker_for(client)
+    if tracker is not None:
+        tracker.delete_later(kind, resource_id)
+        return
+    deleter(client, kind)(resource_id)
+
+
+def release_all(client, resources: Iterable[Tuple[str, str]]) -> int:
+    """Delete ``(kind, id)`` pairs in one concurrent batch and wait; returns how many are gone."""
+    tracker = tracker_for(client)
+    # An untracked client gets a throwaway tracker for the batch
+    batch = tracker or ResourceTracker(client, ledger=ResourceLedger(), delete_on_exit=False)
+    try:
+        return batch.delete([Resource(kind, resource_id, 0.0, 0.0, os.getpid()) for kind, resource_id in resources])
+    finally:
+        if tracker is None:
+            batch.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or sweep tracked Agents service resources.")
+    parser.add_argument("command", choices=("list", "sweep"))
+    parser.add_argument("--ledger", default=os.getenv(LEDGER_ENV_VAR), help=f"ledger file (default ${LEDGER_ENV_VAR})")
+    parser.add_argument("--max-idle", type=float, default=DEFAULT_MAX_IDLE, help="seconds since last use")
+    parser.add_argument("--tag", action="append", default=[], metavar="KEY=VALUE", help="only resources with this tag")
+    parser.add_argument("--dry-run", action="store_true", help="list what sweep would delete")
+    args = parser.parse_args()
+    if not args.ledger:
+        parser.error(f"no ledger: pass --ledger or set {LEDGER_ENV_VAR}")
+    os.environ[LEDGER_ENV_VAR] = args.ledger
+    tags = dict(tag.split("=", 1) for tag in args.tag)
+
+    from common.azure_resources import get_project_client
+
+    tracker = tracker_for(get_project_client())
+    if args.command == "list":
+        resources = [r for r in tracker.ledger.resources(tracker.namespace) if r.matches(tags)]
+    else:
+        resources = tracker.sweep(args.max_idle, tags, dry_run=args.dry_run)
+    now = time.time()
+    for r in resources:
+        print(f"{r.kind:<12} {r.id:<36} idle {now - r.used_at:>8.0f}s  pid {r.pid:<7} {json.dumps(r.tags)}")
+    if args.command == "sweep" and not args.dry_run:
+        print(tracker.report())
+    else:
+        print(f"{len(resources)} resources")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""Waiting for agent runs without fixed-interval polling.
+
+``create_and_process_run`` / ``runs.create_and_process`` sleep a fixed
+interval (1 s) between ``get_run`` calls: a run that finishes just after a
+check waits almost a full interval before anyone notices, and a 30 s run costs
+30 status requests. ``RunWaiter`` creates the run itself and waits with a
+pluggable ``WaitStrategy``:
+
+* ``FixedInterval`` is the SDK behaviour, kept as the baseline.
+* ``AdaptiveBackoff`` learns run durations per key (usually the agent name)
+  in a ``RunDurationHistory`` and checks at evenly spaced quantiles of them,
+  at most 1 s apart, so no requests are spent before runs usually finish and
+  checks are dense where they do; past the slowest quantile it backs off
+  exponentially.
+  A key without history borrows the durations of all keys; with no history
+  at all it backs off from a 0.5 s first check.
+
+``RunWaiter(stream=True)`` uses the run event stream where the client has one
+(``create_stream`` / ``runs.stream``), which needs no status requests at all.
+``RunWaiter.run_async`` waits the same way for runs of the async client.
+``SharedRunPoller`` serves many concurrent waits from one scheduler thread:
+checks for all runs are ordered by due time, run on a small worker pool, and
+waits on the same run share one check.
+
+Each waiter keeps ``WaitStats``: status requests made and the estimated
+latency added between a run finishing and the check that saw it, compared to
+what fixed 1 s polling would have cost for the same runs. Times are in
+service seconds; with the local emulator they are divided by its
+``time_scale``. Finished runs report their ``usage`` to ``common.token_usage``.
+"""
+
+import asyncio
+import atexit
+import contextvars
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from common import token_usage
+from common.agent_tracing import span
+
+WAIT_ENV_VAR = "AGENT_RUN_WAIT"
+HISTORY_ENV_VAR = "AGENT_RUN_HISTORY"
+ALL_KEYS = "*"
+PENDING_STATUSES = ("queued", "in_progress", "cancelling", "requires_action")
+TERMINAL_EVENTS = ("thread.run.completed", "thread.run.failed", "thread.run.cancelled", "thread.run.expired",
+                   "thread.run.incomplete")
+
+
+class RunDurationHistory:
+    """Recent run durations per key; optionally persisted as JSON so a new process starts tuned."""
+
+    def __init__(self, window: int = 50, path: Optional[str] = None):
+        self.window = window
+        self.path = path
+        self._durations: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for key, values in json.load(f).items():
+                    self._durations[key].extend(values)
+        if path:
+            atexit.register(self.save)
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._durations[key].append(round(seconds, 3))
+            self._durations[ALL_KEYS].append(round(seconds, 3))
+
+    def durations(self, key: str, minimum: int = 3) -> List[float]:
+        """Sorted recorded durations for ``key``, or for all keys while ``key`` has fewer than ``minimum``."""
+        with self._lock:
+            for candidate in (key, ALL_KEYS):
+                values = sorted(self._durations.get(candidate, ()))
+                if len(values) >= minimum:
+                    return values
+        return []
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {key: list(values) for key, values in self._durations.items()}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+
+class WaitStrategy:
+    """Yields the delays (service seconds) before each successive status check of one run."""
+
+    def schedule(self, key: str) -> Iterator[float]:
+        raise NotImplementedError
+
+    def observe(self, key: str, seconds: float):
+        """Called with the estimated duration of every completed run."""
+
+
+class FixedInterval(WaitStrategy):
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+
+    def schedule(self, key: str) -> Iterator[float]:
+        while True:
+            yield self.interval
+
+
+class AdaptiveBackoff(WaitStrategy):
+    """Checks at evenly spaced quantiles (p5 to p95) of past durations, never more than ``max_gap`` apart.
+
+    Each check is then about equally likely to find the run finished: none are
+    spent before runs of this key usually end, they are dense where most end,
+    and ``max_gap`` (the SDK's 1 s) bounds the added latency inside that range.
+    Past the slowest quantile the delay grows by ``factor`` up to ``max_interval``.
+    """
+
+    def __init__(self, history: Optional[RunDurationHistory] = None, initial: float = 0.5, min_interval: float = 0.2,
+                 max_gap: float = 1.0, max_interval: float = 2.0, factor: float = 1.5, checks: int = 8):
+        self.history = history or RunDurationHistory()
+        self.initial = initial
+        self.min_interval = min_interval
+        self.max_gap = max_gap
+        self.max_interval = max_interval
+        self.factor = factor
+        self.checks = checks
+
+    def schedule(self, key: str) -> Iterator[float]:
+        durations = self.history.durations(key)
+        delay = self.initial / self.factor
+        if durations:
+            # Quantiles from p5 to p95: a run that ends before the first check pays for the whole wait
+            levels = [0.05 + 0.9 * i / (self.checks - 1) for i in range(self.checks)]
+            targets = [durations[min(len(durations) - 1, int(len(durations) * level))] for level in levels]
+            # The first check waits for the fastest typical run; later ones are capped at max_gap
+            elapsed = delay = max(self.min_interval, targets[0])
+            yield delay
+            for target in targets[1:]:
+                while elapsed < target:
+                    delay = min(max(self.min_interval, target - elapsed), self.max_gap)
+                    elapsed += delay
+                    yield delay
+        while True:
+            delay = min(max(delay, self.min_interval) * self.factor, self.max_interval)
+            yield delay
+
+    def observe(self, key: str, seconds: float):
+        self.history.record(key, seconds)
+
+
+@dataclass
+class WaitStats:
+    runs: int = 0
+    streamed: int = 0
+    status_requests: int = 0
+    durations: List[float] = field(default_factory=list)
+    gaps: List[float] = field(default_factory=list)
+    baseline_interval: float = 1.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, duration: float, gap: float, requests: int, streamed: bool = False):
+        with self._lock:
+            self.runs += 1
+            self.streamed += streamed
+            self.status_requests += requests
+            self.durations.append(duration)
+            self.gaps.append(gap)
+
+    def report(self) -> str:
+        with self._lock:
+            runs, durations, gaps, requests = self.runs, list(self.durations), list(self.gaps), self.status_requests
+        if not runs:
+            return "Run waits: none yet"
+        # The finish falls anywhere in the gap between the last two checks: half of it on average
+        added = sum(gaps) / 2 / runs
+        interval = self.baseline_interval
+        baseline_requests = sum(max(1, math.ceil(d / interval)) for d in durations)
+        streamed = f", {self.streamed} streamed" if self.streamed else ""
+        return (
+            f"Run waits: {runs} runs{streamed}, {requests} status requests "
+            f"(fixed {interval:g}s polling: ~{baseline_requests}, {baseline_requests - requests} saved) | "
+            f"added latency ~{added * 1000:.0f} ms/run (fixed: ~{interval / 2 * 1000:.0f} ms) | "
+            f"mean run {sum(durations) / runs:.2f}s"
+        )
+
+
+class _RunApi:
+    """create/get/cancel/stream for either client generation: ``agents.create_run`` or ``agents.runs.create``."""
+
+    def __init__(self, agents):
+        self.agents = agents
+        self.legacy = hasattr(agents, "create_run")
+        # The emulator runs faster than real time; waits are scaled to match and measured in service seconds
+        self.time_scale = getattr(agents, "time_scale", 1.0)
+
+    def create(self, thread_id: str, agent_id: str, **kwargs):
+        if self.legacy:
+            return self.agents.create_run(thread_id=thread_id, assistant_id=agent_id, **kwargs)
+        return self.agents.runs.create(thread_id=thread_id, agent_id=agent_id, **kwargs)
+
+    def get(self, thread_id: str, run_id: str):
+        if self.legacy:
+            return self.agents.get_run(thread_id=thread_id, run_id=run_id)
+        return self.agents.runs.get(thread_id=thread_id, run_id=run_id)
+
+    def cancel(self, thread_id: str, run_id: str):
+        if self.legacy:
+            return self.agents.cancel_run(thread_id=thread_id, run_id=run_id)
+        return self.agents.runs.cancel(thread_id=thread_id, run_id=run_id)
+
+    def stream(self, thread_id: str, agent_id: str, **kwargs):
+        if self.legacy:
+            if hasattr(self.agents, "create_stream"):
+                return self.agents.create_stream(thread_id=thread_id, assistant_id=agent_id, **kwargs)
+        elif hasattr(self.agents.runs, "stream"):
+            return self.agents.runs.stream(thread_id=thread_id, agent_id=agent_id, **kwargs)
+        return None
+
+
+class RunWaiter:
+    """Creates a run and waits for it with ``strategy``; a drop-in for ``create_and_process_run``."""
+
+    def __init__(self, strategy: Optional[WaitStrategy] = None, stream: bool = False):
+        self.strategy = strategy or AdaptiveBackoff()
+        self.stream = stream
+        self.stats = WaitStats()
+
+    def run(self, agents, thread_id: str, agent_id: str, key: Optional[str] = None, **kwargs):
+        """Run ``agent_id`` on ``thread_id`` and return the finished run. ``key`` groups runs for the history."""
+        api = _RunApi(agents)
+        strategy = "stream" if self.stream else type(self.strategy).__name__
+        with span("agent_run", **{"run.waiter": type(self).__name__, "run.strategy": strategy, "run.key": key or agent_id}) as current:
+            stream = api.stream(thread_id, agent_id, **kwargs) if self.stream else None
+            if stream is not None:
+                run = self._run_streaming(api, stream, thread_id, key or agent_id)
+            else:
+                started = time.perf_counter()
+                run = api.create(thread_id, agent_id, **kwargs)
+                run = self._wait(api, thread_id, run, key or agent_id, started)
+            current.set(**{"run.status": run.status})
+        token_usage.record(getattr(run, "usage", None), model=getattr(run, "model", None), agent=key)
+        return run
+
+    def _wait(self, api: _RunApi, thread_id: str, run, key: str, started: float):
+        schedule = self.strategy.schedule(key)
+        last_check, requests = started, 0
+        while run.status in PENDING_STATUSES:
+            if run.status == "requires_action":
+                # As in the SDK helper without a toolset: nothing can answer the tool call, so cancel the run
+                api.cancel(thread_id, run.id)
+            delay = next(schedule)
+            with span("run.wait", **{"poll.delay_s": round(delay, 3)}):
+                time.sleep(delay * api.time_scale)
+            previous, last_check = last_check, time.perf_counter()
+            run = api.get(thread_id, run.id)
+            requests += 1
+        self._finished(run, key, started, previous if requests else started, last_check, requests, api.time_scale)
+        return run
+
+    async def run_async(self, agents, thread_id: str, agent_id: str, key: Optional[str] = None, **kwargs):
+        """``run`` for an async client (``azure.ai.projects.aio``): the same strategy, waiting with ``asyncio.sleep``.
+
+        The event stream is not used here; a streaming waiter polls with its strategy instead.
+        """
+        api = _RunApi(agents)
+        name = key or agent_id
+        with span("agent_run", **{"run.waiter": type(self).__name__, "run.strategy": type(self.strategy).__name__,
+                                  "run.key": name}) as current:
+            started = time.perf_counter()
+            run = await api.create(thread_id, agent_id, **kwargs)
+            schedule = self.strategy.schedule(name)
+            last_check, requests = started, 0
+            while run.status in PENDING_STATUSES:
+                if run.status == "requires_action":
+                    await api.cancel(thread_id, run.id)
+                delay = next(schedule)
+                with span("run.wait", **{"poll.delay_s": round(delay, 3)}):
+                    await asyncio.sleep(delay * api.time_scale)
+                previous, last_check = last_check, time.perf_counter()
+                run = await api.get(thread_id, run.id)
+                requests += 1
+            self._finished(run, name, started, previous if requests else started, last_check, requests, api.time_scale)
+            current.set(**{"run.status": run.status})
+        token_usage.record(getattr(run, "usage", None), model=getattr(run, "model", None), agent=key)
+        return run
+
+    def _finished(self, run, key: str, started: float, previous: float, seen: float, requests: int, scale: float,
+                  streamed: bool = False):
+        gap = (seen - previous) / scale
+        duration = (seen - started) / scale - gap / 2
+        if run.status == "completed":
+            self.strategy.observe(key, duration)
+        self.stats.record(duration, gap, requests, streamed)
+
+    def _run_streaming(self, api: _RunApi, stream, thread_id: str, key: str):
+        started = time.perf_counter()
+        run = None
+        with stream:
+            for event_type, event_data, *_ in stream:
+                if event_type == "thread.run.created":
+                    run = event_data
+                elif event_type in TERMINAL_EVENTS:
+                    run = event_data
+                    break
+                elif event_type == "thread.run.requires_action":
+                    run = api.cancel(thread_id, event_data.id)
+        seen = time.perf_counter()
+        if run is None:
+            raise RuntimeError(f"Run event stream on {thread_id} ended before the run was created")
+        if run.status in PENDING_STATUSES:
+            # The stream ended early (cancelled or dropped): fall back to polling
+            return self._wait(api, thread_id, run, key, started)
+        self._finished(run, key, started, seen, seen, 0, api.time_scale, streamed=True)
+        return run
+
+
+@dataclass(order=True)
+class _Entry:
+    due: float
+    order: int
+    api: _RunApi = field(compare=False)
+    thread_id: str = field(compare=False)
+    run: object = field(compare=False)
+    key: str = field(compare=False)
+    schedule: Iterator[float] = field(compare=False)
+    context: contextvars.Context = field(compare=False)
+    future: Future = field(compare=False)
+    started: float = field(compare=False)
+    last_check: float = field(compare=False)
+    requests: int = 0
+
+
+class SharedRunPoller(RunWaiter):
+    """One scheduler thread checks every outstanding run, at most ``workers`` status requests at a time.
+
+    Concurrent callers block in ``run`` while a single heap orders all runs by
+    their next check, so a burst of 50 runs costs 50 schedules, not 50
+    sleeping threads each with its own polling loop, and a second wait on the
+    same run shares the first one's checks.
+    """
+
+    def __init__(self, strategy: Optional[WaitStrategy] = None, workers: int = 4):
+        super().__init__(strategy)
+        self._heap: List[_Entry] = []
+        self._waiting: Dict[str, Future] = {}
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="run-poller")
+        self._thread = threading.Thread(target=self._loop, name="run-poller", daemon=True)
+        self._closed = False
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _wait(self, api: _RunApi, thread_id: str, run, key: str, started: float):
+        if run.status not in PENDING_STATUSES:
+            self._finished(run, key, started, started, time.perf_counter(), 0, api.time_scale)
+            return run
+        with self._cond:
+            future = self._waiting.get(run.id)
+            if future is None:
+                future = self._waiting[run.id] = Future()
+                self._push(_Entry(0.0, 0, api, thread_id, run, key, self.strategy.schedule(key),
+                                  contextvars.copy_context(), future, started, started))
+        return future.result()
+
+    def _push(self, entry: _Entry):
+        # Called with the condition held
+        entry.due = entry.last_check + next(entry.schedule) * entry.api.time_scale
+        entry.order = next(self._order)
+        heapq.heappush(self._heap, entry)
+        self._cond.notify()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._heap or self._heap[0].due > time.perf_counter()):
+                    self._cond.wait(None if not self._heap else self._heap[0].due - time.perf_counter())
+                if self._closed:
+                    return
+                entry = heapq.heappop(self._heap)
+            self._executor.submit(self._check, entry)
+
+    def _check(self, entry: _Entry):
+        previous = entry.last_check
+        try:
+            # Runs in the waiter's context so the get_run span nests under its trace
+            run = entry.context.run(entry.api.get, entry.thread_id, entry.run.id)
+            if run.status == "requires_action":
+                entry.context.run(entry.api.cancel, entry.thread_id, run.id)
+        except Exception as exc:
+            with self._cond:
+                self._waiting.pop(entry.run.id, None)
+            entry.future.set_exception(exc)
+            return
+        entry.last_check = time.perf_counter()
+        entry.requests += 1
+        if run.status in PENDING_STATUSES:
+            entry.run = run
+            with self._cond:
+                self._push(entry)
+            return
+        with self._cond:
+            self._waiting.pop(run.id, None)
+        self._finished(run, entry.key, entry.started, previous, entry.last_check, entry.requests, entry.api.time_scale)
+        entry.future.set_result(run)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            pending = [entry.future for entry in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+        for future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("SharedRunPoller closed"))
+        self._executor.shutdown(wait=False)
+
+
+def make_waiter(kind: str, history: Optional[RunDurationHistory] = None) -> RunWaiter:
+    """``fixed`` (SDK behaviour), ``adaptive``, ``shared`` (adaptive, multiplexed) or ``stream``."""
+    if kind == "fixed":
+        return RunWaiter(FixedInterval())
+    if kind == "adaptive":
+        return RunWaiter(AdaptiveBackoff(history))
+    if kind == "shared":
+        return SharedRunPoller(AdaptiveBackoff(history))
+    if kind == "stream":
+        return RunWaiter(AdaptiveBackoff(history), stream=True)
+    raise ValueError(f"Unknown run wait strategy '{kind}'; expected fixed, adaptive, shared or stream")
+
+
+_waiter: Optional[RunWaiter] = None
+_waiter_lock = threading.Lock()
+
+
+def get_run_waiter() -> RunWaiter:
+    """The process waiter chosen by ``AGENT_RUN_WAIT`` (default ``adaptive``), with history in ``AGENT_RUN_HISTORY``."""
+    global _waiter
+    with _waiter_lock:
+        if _waiter is None:
+            history_path = os.getenv(HISTORY_ENV_VAR)
+            history = RunDurationHistory(path=history_path) if history_path else None
+            _waiter = make_waiter(os.getenv(WAIT_ENV_VAR, "adaptive"), history)
+        return _waiter
@@ -0,0 +1,22 @@
+"""Cheap local text similarity used for convergence checks and near-duplicate lookups."""
+
+import re
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str, size: int = 3) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def text_similarity(a: str, b: str, size: int = 3) -> float:
+    """Jaccard similarity of word ``size``-shingles: 1.0 for identical text, 0.0 for nothing in common."""
+    first, second = shingles(a, size), shingles(b, size)
+    if not first and not second:
+        return 1.0
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
@@ -0,0 +1,213 @@
+"""Batch course-plan generation over one shared Semantic Kernel agent.
+
+``run_batch`` plans every topic in a list with at most ``concurrency``
+requests in flight on a single ``ChatCompletionAgent`` (and therefore one
+``AzureChatCompletion`` and one HTTP connection pool). Each finished topic is
+written to ``<out_dir>/<nnnn>-<slug>.md`` and appended to
+``<out_dir>/manifest.jsonl`` with its latency and token usage, so an
+interrupted batch picks up where it stopped: topics already recorded as
+``ok`` with their Markdown file present are skipped on the next run.
+
+Rate limits (HTTP 429) pause every worker, not just the one that hit them,
+for the server's ``Retry-After`` or an exponential backoff with jitter.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from common import token_usage
+from common.tokens import count_tokens
+
+MANIFEST = "manifest.jsonl"
+
+
+@dataclass
+class BatchRecord:
+    index: int
+    topic: str
+    status: str
+    file: Optional[str]
+    seconds: float
+    attempts: int
+    prompt_tokens: int
+    completion_tokens: int
+    error: Optional[str] = None
+
+
+def read_topics(path: str) -> List[str]:
+    """One topic per line; blank lines and ``#`` comments are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def slugify(text: str, max_length: int = 60) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:max_length].rstrip("-") or "topic"
+
+
+def load_manifest(out_dir: str) -> Dict[str, dict]:
+    """Latest manifest entry per topic (later lines win, so retried topics report their last attempt)."""
+    entries = {}
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut off by a crash mid-write; that topic is simply redone
+                    continue
+                entries[entry["topic"]] = entry
+    return entries
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    # SK wraps openai errors in ServiceResponseException; the HTTP status is on the cause
+    while exc is not None:
+        code = getattr(exc, "status_code", None)
+        if isinstance(code, int):
+            return code
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            value = headers.get("retry-after-ms")
+            if value:
+                return float(value) / 1000
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    return None
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def _usage(response, text: str):
+    message = getattr(response, "message", response)
+    usage = (getattr(message, "metadata", None) or {}).get("usage")
+    if usage is not None:
+        return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+    return 0, count_tokens(text)
+
+
+class _RateLimitGate:
+    """Shared pause: once any request is rate limited, no worker sends until the pause is over."""
+
+    def __init__(self):
+        self.resume_at = 0.0
+        self.hits = 0
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float):
+        self.hits += 1
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+async def _plan_topic(agent, index, topic, out_dir, gate, semaphore, max_retries, base_delay) -> BatchRecord:
+    async with semaphore:
+        attempts = 0
+        started = time.perf_counter()
+        while True:
+            attempts += 1
+            await gate.wait()
+            try:
+                with token_usage.scope(agent=agent.name):
+                    response = await agent.get_response(messages=topic)
+            except Exception as exc:
+                retryable = _status_code(exc) in (429, 500, 502, 503, 504)
+                if not retryable or attempts > max_retries:
+                    return BatchRecord(
+                        index, topic, "failed", None, time.perf_counter() - started, attempts, 0, 0,
+                        f"{type(exc).__name__}: {exc}",
+                    )
+                delay = _retry_after(exc) or base_delay * 2 ** (attempts - 1) * (1 + random.random())
+                if _status_code(exc) == 429:
+                    gate.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            break
+
+        text = str(response)
+        prompt_tokens, completion_tokens = _usage(response, text)
+        file_name = f"{index:04d}-{slugify(topic)}.md"
+        with open(os.path.join(out_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(f"# {topic}\n\n{text}\n")
+        return BatchRecord(
+            index, topic, "ok", file_name, time.perf_counter() - started, attempts, prompt_tokens, completion_tokens
+        )
+
+
+async def run_batch(
+    agent,
+    topics: List[str],
+    out_dir: str,
+    concurrency: int = 8,
+    max_retries: int = 6,
+    base_delay: float = 2.0,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Tuple[List[BatchRecord], int]:
+    """Plan every topic not already done in ``out_dir``.
+
+    Returns the records of this run and the number of rate-limit pauses.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_manifest(out_dir)
+    pending = [
+        (index, topic) for index, topic in enumerate(topics, 1)
+        if not (done.get(topic, {}).get("status") == "ok"
+                and os.path.exists(os.path.join(out_dir, done[topic].get("file") or "")))
+    ]
+    if progress:
+        progress(f"{len(topics) - len(pending)} of {len(topics)} topics already done, {len(pending)} to go")
+
+    gate = _RateLimitGate()
+    semaphore = asyncio.Semaphore(concurrency)
+    records = []
+    tasks = [
+        asyncio.create_task(_plan_topic(agent, index, topic, out_dir, gate, semaphore, max_retries, base_delay))
+        for index, topic in pending
+    ]
+    with open(os.path.join(out_dir, MANIFEST), "a", encoding="utf-8") as manifest:
+        for finished in asyncio.as_completed(tasks):
+            record = await finished
+            manifest.write(json.dumps(asdict(record)) + "\n")
+            manifest.flush()
+            records.append(record)
+            if progress:
+                detail = record.file if record.status == "ok" else record.error
+                progress(f"[{len(records)}/{len(pending)}] {record.status} {record.topic} ({record.seconds:.1f}s, {record.attempts} attempts): {detail}")
+    return records, gate.hits
+
+
+def summarize(records: List[BatchRecord], wall_seconds: float, rate_limit_hits: int = 0) -> str:
+    if not records:
+        return "Nothing to do"
+    ok = [r for r in records if r.status == "ok"]
+    latencies = sorted(r.seconds for r in ok) or [0.0]
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    completion = sum(r.completion_tokens for r in ok)
+    return (
+        f"{len(ok)}/{len(records)} topics ok in {wall_seconds:.1f}s "
+        f"({len(ok) / wall_seconds if wall_seconds else 0:.2f} plans/s) | latency p50 {p50:.1f}s p95 {p95:.1f}s | "
+        f"{sum(r.prompt_tokens for r in ok)} prompt + {completion} completion tokens | "
+        f"{sum(r.attempts - 1 for r in records)} retries, {rate_limit_hits} rate-limit pauses"
+    )
@@ -0,0 +1,35 @@
+"""Semantic Kernel termination strategy backed by ``common.budget.RunBudget``."""
+
+from typing import Any
+
+from semantic_kernel.agents.strategies import TerminationStrategy
+
+from common.tokens import count_tokens
+
+
+def message_tokens(message) -> int:
+    """Tokens reported by the service for this message, or a local estimate when usage is missing."""
+    usage = (message.metadata or {}).get("usage")
+    if usage is not None:
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        return prompt + completion
+    return count_tokens(message.content or "")
+
+
+class BudgetTerminationStrategy(TerminationStrategy):
+    """Checks every message against ``budget`` before the agent-specific ``should_agent_terminate``.
+
+    Subclasses keep implementing ``should_agent_terminate`` (e.g. "approved"
+    checks); the budget applies to messages from all agents.
+    """
+
+    budget: Any = None
+
+    async def should_terminate(self, agent, history, *args, **kwargs):
+        message = history[-1]
+        if self.budget is not None:
+            reason = self.budget.observe(message.name or agent.name, message.content or "", message_tokens(message))
+            if reason:
+                return True
+        return await super().should_terminate(agent, history, *args, **kwargs)
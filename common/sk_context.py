@@ -0,0 +1,74 @@
+"""Semantic Kernel adapter for the context policies in ``common.context_policy``."""
+
+from typing import Any
+
+from semantic_kernel.contents import AuthorRole, ChatHistory, ChatMessageContent
+
+from common.context_policy import ContextMessage, current_meter
+from common.sk_usage import MeteredChatCompletion
+
+# Instructions are always sent; DEVELOPER only exists on newer semantic-kernel releases
+_PINNED_ROLES = {AuthorRole.SYSTEM, getattr(AuthorRole, "DEVELOPER", AuthorRole.SYSTEM)}
+
+
+def _source(message: ChatMessageContent) -> str:
+    return message.name or message.role.value
+
+
+def apply_policy(chat_history: ChatHistory, agent_name: str, policy, meter=None) -> ChatHistory:
+    """Return a new ``ChatHistory`` with ``policy`` applied; system messages are always kept."""
+    system = [m for m in chat_history.messages if m.role in _PINNED_ROLES]
+    units = []
+    for message in chat_history.messages:
+        if message.role in _PINNED_ROLES:
+            continue
+        # Keep tool results attached to the call that produced them
+        if message.role == AuthorRole.TOOL:
+            if units:
+                units[-1].original.append(message)
+                units[-1].text += "\n" + (message.content or "")
+            continue
+        units.append(ContextMessage(source=_source(message), text=message.content or "", original=[message]))
+
+    windowed = policy.apply(units)
+    if meter is not None:
+        meter.record(agent_name, units, windowed)
+
+    history = ChatHistory()
+    for message in system:
+        history.add_message(message)
+    for unit in windowed:
+        if unit.original is None:
+            history.add_message(ChatMessageContent(role=AuthorRole.USER, content=unit.text, name=unit.source))
+        else:
+            for message in unit.original:
+                history.add_message(message)
+    return history
+
+
+class ContextWindowedChatCompletion(MeteredChatCompletion):
+    """``AzureChatCompletion`` that applies a context policy before every request.
+
+    ``AgentGroupChat`` passes each agent the whole group history; giving an agent
+    a kernel with this service trims that history to what the agent needs.
+    """
+
+    context_agent: str = ""
+    context_policy: Any = None
+    context_meter: Any = None
+
+    def _usage_agent(self) -> str:
+        return self.context_agent or super()._usage_agent()
+
+    def _windowed(self, chat_history: ChatHistory) -> ChatHistory:
+        if self.context_policy is None:
+            return chat_history
+        meter = self.context_meter or current_meter.get()
+        return apply_policy(chat_history, self.context_agent or self.service_id, self.context_policy, meter)
+
+    async def get_chat_message_contents(self, chat_history, settings, **kwargs):
+        return await super().get_chat_message_contents(self._windowed(chat_history), settings, **kwargs)
+
+    async def get_streaming_chat_message_contents(self, chat_history, settings, **kwargs):
+        async for chunk in super().get_streaming_chat_message_contents(self._windowed(chat_history), settings, **kwargs):
+            yield chunk
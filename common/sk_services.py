@@ -0,0 +1,108 @@
+"""Process-wide cached Semantic Kernel services, kernels and agents.
+
+The Streamlit UIs used to build a new ``AzureChatCompletion`` (and for the
+group chat two new ``Kernel``s) on every Submit. Each construction re-reads
+the environment settings and opens a new HTTP client, so every request paid
+for settings validation plus a fresh TCP/TLS handshake. Here the first
+service creates the ``AsyncAzureOpenAI`` client and every later service,
+kernel and agent reuses it, sharing one connection pool.
+
+Only stateless objects are cached. Per-request state lives in a fresh chat
+history: ``agent.get_response`` starts a new thread when none is passed, and
+each request builds its own ``AgentGroupChat``.
+
+The shared client sends through ``common.rate_limit``, so every SK request
+in the process waits its turn at the deployment's RPM/TPM quota.
+
+The shared client's connection pool belongs to the event loop it first ran
+on; the UIs run every request on the one ``common.jobs`` loop, and the
+console scripts use a single ``asyncio.run``.
+"""
+
+import threading
+from typing import Optional
+
+from azure.identity import get_bearer_token_provider
+from openai import AsyncAzureOpenAI
+from semantic_kernel import Kernel
+from semantic_kernel.agents import ChatCompletionAgent
+from semantic_kernel.connectors.ai.open_ai.settings.azure_open_ai_settings import AzureOpenAISettings
+
+from common.azure_resources import get_credential
+from common.context_policy import ContextPolicy
+from common.rate_limit import async_http_client
+from common.sk_context import ContextWindowedChatCompletion
+from common.sk_usage import MeteredChatCompletion
+
+_lock = threading.RLock()
+_shared_client = None
+_services = {}
+_kernels = {}
+_agents = {}
+
+
+def get_async_client():
+    """The shared ``AsyncAzureOpenAI`` client: configured from the SK Azure settings, rate limited."""
+    global _shared_client
+    with _lock:
+        if _shared_client is None:
+            # The same AZURE_OPENAI_* settings (environment or .env) AzureChatCompletion() reads
+            settings = AzureOpenAISettings()
+            if settings.api_key:
+                auth = {"api_key": settings.api_key.get_secret_value()}
+            else:
+                auth = {"azure_ad_token_provider": get_bearer_token_provider(get_credential(), settings.token_endpoint)}
+            if settings.base_url:
+                location = {"base_url": str(settings.base_url)}
+            else:
+                location = {"azure_endpoint": str(settings.endpoint)}
+            _shared_client = AsyncAzureOpenAI(api_version=settings.api_version, http_client=async_http_client(),
+                                              **location, **auth)
+        return _shared_client
+
+
+def _new_service(service_cls, service_id: str):
+    return service_cls(service_id=service_id, async_client=get_async_client())
+
+
+def get_chat_service(service_id: str = "default") -> MeteredChatCompletion:
+    """Return the cached chat service for ``service_id``; its token usage goes to ``common.token_usage``."""
+    with _lock:
+        service = _services.get(service_id)
+        if service is None:
+            service = _services[service_id] = _new_service(MeteredChatCompletion, service_id)
+        return service
+
+
+def get_kernel(service_id: str, agent_name: str = "", policy: Optional[ContextPolicy] = None) -> Kernel:
+    """Return a cached kernel whose chat service applies ``policy`` to the agent's history.
+
+    The kernel is cached per ``(service_id, agent_name)``; the policy given on
+    first use is kept. Metering goes to ``common.context_policy.current_meter``
+    so concurrent requests do not share a meter.
+    """
+    with _lock:
+        key = (service_id, agent_name)
+        kernel = _kernels.get(key)
+        if kernel is None:
+            service = _new_service(ContextWindowedChatCompletion, service_id)
+            service.context_agent = agent_name
+            service.context_policy = policy
+            kernel = Kernel()
+            kernel.add_service(service)
+            _kernels[key] = kernel
+        return kernel
+
+
+def get_agent(name: str, instructions: str, kernel: Optional[Kernel] = None, service_id: str = "default") -> ChatCompletionAgent:
+    """Return a cached ``ChatCompletionAgent``; the agent keeps no per-request state."""
+    with _lock:
+        key = (name, instructions, id(kernel) if kernel is not None else service_id)
+        agent = _agents.get(key)
+        if agent is None:
+            if kernel is not None:
+                agent = ChatCompletionAgent(kernel=kernel, name=name, instructions=instructions)
+            else:
+                agent = ChatCompletionAgent(service=get_chat_service(service_id), name=name, instructions=instructions)
+            _agents[key] = agent
+        return agent
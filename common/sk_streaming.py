@@ -0,0 +1,198 @@
+"""Token streaming for Semantic Kernel agents and group chats.
+
+``agent.get_response`` and ``group_chat.invoke()`` only return once a whole
+course or lesson plan has been generated. These helpers drive the streaming
+variants (``agent.invoke_stream`` / ``group_chat.invoke_stream``), hand every
+token to a callback as it arrives and record time-to-first-token (TTFT) and
+tokens/sec for each agent turn.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from common import token_usage
+from common.tokens import count_tokens
+
+
+@dataclass
+class TurnStats:
+    agent: str
+    ttft: float
+    duration: float
+    tokens: int
+    truncated: bool = False
+    # perf_counter() when the turn began
+    started: float = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        generating = self.duration - self.ttft
+        return self.tokens / generating if generating > 0 else 0.0
+
+
+class StreamMeter:
+    """Collects TTFT and throughput for every streamed agent turn."""
+
+    def __init__(self):
+        self.turns: List[TurnStats] = []
+
+    def report(self) -> str:
+        lines = [
+            f"{t.agent}: TTFT {t.ttft * 1000:.0f} ms, {t.tokens} tokens in {t.duration:.1f}s ({t.tokens_per_second:.1f} tok/s)"
+            + (" [stopped early]" if t.truncated else "")
+            for t in self.turns
+        ]
+        return "\n".join(lines) or "No streamed turns"
+
+
+class Throttle:
+    """Calls ``flush(text)`` at most once per ``interval`` seconds; ``close()`` flushes the final text."""
+
+    def __init__(self, flush: Callable[[str], None], interval: float = 0.1):
+        self._flush = flush
+        self._interval = interval
+        self._last = 0.0
+        self._text = ""
+        self._lock = threading.Lock()
+
+    def update(self, text: str):
+        with self._lock:
+            self._text = text
+            now = time.monotonic()
+            if now - self._last < self._interval:
+                return
+            self._last = now
+        self._flush(text)
+
+    def close(self):
+        self._flush(self._text)
+
+
+def _chunk_text(item) -> str:
+    # Newer semantic-kernel releases wrap each chunk in an AgentResponseItem
+    chunk = getattr(item, "message", item)
+    return str(chunk.content or "") if chunk.content is not None else ""
+
+
+def _chunk_name(item, default: str) -> str:
+    chunk = getattr(item, "message", item)
+    return getattr(chunk, "name", None) or default
+
+
+class _Turn:
+    def __init__(self, agent: str, started: Optional[float] = None):
+        self.agent = agent
+        self.started = started or time.perf_counter()
+        self.first_token = None
+        self.parts = []
+
+    def add(self, text: str):
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+        self.parts.append(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def finish(self, truncated: bool = False) -> TurnStats:
+        now = time.perf_counter()
+        ttft = (self.first_token or now) - self.started
+        return TurnStats(self.agent, ttft, now - self.started, count_tokens(self.text), truncated, self.started)
+
+
+async def stream_agent(
+    agent,
+    messages,
+    on_token: Optional[Callable[[str], None]] = None,
+    meter: Optional[StreamMeter] = None,
+    stop_when: Optional[Callable[[str], bool]] = None,
+    **kwargs,
+) -> str:
+    """Stream one agent response, calling ``on_token`` per chunk; returns the full text.
+
+    ``stop_when(text_so_far)`` can end the stream early; the turn is then
+    recorded in ``meter`` as truncated.
+    """
+    turn = _Turn(agent.name)
+    truncated = False
+    stream = agent.invoke_stream(messages=messages, **kwargs)
+    # Shared chat services do not know which agent they answer for; the scope tells them
+    with token_usage.scope(agent=agent.name):
+        try:
+            async for item in stream:
+                text = _chunk_text(item)
+                if text:
+                    turn.add(text)
+                    if on_token:
+                        on_token(text)
+                    if stop_when and stop_when(turn.text):
+                        truncated = True
+                        break
+        finally:
+            await stream.aclose()
+    if meter is not None:
+        meter.turns.append(turn.finish(truncated))
+    return turn.text
+
+
+async def stream_group_chat(
+    group_chat,
+    on_token: Optional[Callable[[str, str], None]] = None,
+    on_turn: Optional[Callable[[str, str], None]] = None,
+    meter: Optional[StreamMeter] = None,
+    stop_when: Optional[Callable[[str, str], bool]] = None,
+    on_stop: Optional[Callable[[TurnStats], None]] = None,
+):
+    """Stream an ``AgentGroupChat``; ``on_token(agent, text)`` per chunk and ``on_turn(agent, full_text)`` per turn.
+
+    ``stop_when(agent, text_so_far)`` is checked after every chunk. When it
+    returns True the stream is closed, which aborts the pending completion
+    request, the chat is marked complete and ``on_stop`` receives the
+    truncated turn's stats (also recorded in ``meter``).
+
+    Returns ``[(agent, text), ...]`` for every completed or truncated turn.
+    """
+    turns = []
+    current = None
+    # The next agent starts working as soon as the previous turn ends, so TTFT is measured from there
+    turn_started = time.perf_counter()
+
+    def close_turn(truncated: bool = False):
+        if current is None:
+            return None
+        stats = current.finish(truncated)
+        if meter is not None:
+            meter.turns.append(stats)
+        turns.append((current.agent, current.text))
+        if on_turn:
+            on_turn(current.agent, current.text)
+        return stats
+
+    stream = group_chat.invoke_stream()
+    try:
+        async for item in stream:
+            name = _chunk_name(item, current.agent if current else "agent")
+            if current is None or name != current.agent:
+                close_turn()
+                if current is not None:
+                    turn_started = time.perf_counter()
+                current = _Turn(name, turn_started)
+            text = _chunk_text(item)
+            if text:
+                current.add(text)
+                if on_token:
+                    on_token(name, text)
+                if stop_when and stop_when(name, current.text):
+                    stats = close_turn(truncated=True)
+                    current = None
+                    group_chat.is_complete = True
+                    if on_stop:
+                        on_stop(stats)
+                    break
+    finally:
+        await stream.aclose()
+    close_turn()
+    return turns
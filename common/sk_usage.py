@@ -0,0 +1,37 @@
+"""Semantic Kernel chat service metered into ``common.token_usage``."""
+
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+
+from common import token_usage
+
+
+class MeteredChatCompletion(AzureChatCompletion):
+    """``AzureChatCompletion`` that records the usage in every response's metadata.
+
+    Calls are tagged with ``usage_agent``, else the agent of the enclosing
+    ``token_usage.scope``, else the service ID. Streamed responses report
+    usage on their last chunk, so a stream closed early records nothing.
+    """
+
+    usage_agent: str = ""
+
+    def _usage_agent(self) -> str:
+        return self.usage_agent or token_usage.current_tags().get("agent") or self.service_id
+
+    def _record(self, message):
+        usage = (getattr(message, "metadata", None) or {}).get("usage")
+        if usage is not None:
+            token_usage.record(usage, model=getattr(message, "ai_model_id", None) or self.ai_model_id,
+                               agent=self._usage_agent())
+
+    async def get_chat_message_contents(self, chat_history, settings, **kwargs):
+        messages = await super().get_chat_message_contents(chat_history, settings, **kwargs)
+        for message in messages:
+            self._record(message)
+        return messages
+
+    async def get_streaming_chat_message_contents(self, chat_history, settings, **kwargs):
+        async for chunk in super().get_streaming_chat_message_contents(chat_history, settings, **kwargs):
+            for message in chunk:
+                self._record(message)
+            yield chunk
@@ -0,0 +1,340 @@
+"""Token and cost accounting shared by every demo and framework.
+
+Each model call is recorded once, with its prompt, completion and cached
+prompt tokens, and tagged with the demo, the agent name and the model:
+
+* Agents service runs: ``run.usage``, recorded by ``common.run_poller``.
+* ``model-router/main.py``: the usage chunk at the end of each stream.
+* AutoGen: ``models_usage`` on team messages, through
+  ``common.autogen_usage.metered_stream``.
+* Semantic Kernel: response metadata, recorded by the chat services from
+  ``common.sk_usage``.
+
+The ledger only keeps aggregates: totals per ``(demo, agent, model)``, per
+session and for the most recent ``max_runs`` runs. Recording a call costs a
+few dictionary updates, however long the process runs. Tags not passed to
+``record`` come from the enclosing ``scope()``. The demo defaults to the
+script (``ai-agent/ai-agent-rag``) and the session to this process.
+
+Costs use ``PRICES`` (USD per million tokens), matched on the longest model
+name prefix so dated model versions resolve. Set ``AGENT_PRICES`` to a JSON
+file of ``{"model": [input, cached_input, output]}`` to override or extend
+them. With ``AGENT_USAGE`` set to a file, the session summary is appended
+there as a JSON line at exit, and ``python -m common.token_usage <file>``
+merges those lines to show which agents use the most tokens.
+"""
+
+import argparse
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+USAGE_ENV_VAR = "AGENT_USAGE"
+PRICES_ENV_VAR = "AGENT_PRICES"
+DIMENSIONS = ("demo", "agent", "model")
+
+# Azure OpenAI global list prices in USD per 1M tokens: (input, cached input, output)
+PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+    "o3": (2.00, 0.50, 8.00),
+    "o3-mini": (1.10, 0.55, 4.40),
+    "o4-mini": (1.10, 0.275, 4.40),
+}
+
+
+def load_prices(path: Optional[str] = None) -> Dict[str, Tuple[float, float, float]]:
+    """``PRICES`` updated from the JSON file at ``path`` (default ``AGENT_PRICES``)."""
+    prices = dict(PRICES)
+    path = path or os.getenv(PRICES_ENV_VAR)
+    if path:
+        with open(path, encoding="utf-8") as f:
+            prices.update({model: tuple(value) for model, value in json.load(f).items()})
+    return prices
+
+
+def _field(obj, name: str, default=None):
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def read_usage(usage) -> Optional[Tuple[int, int, int]]:
+    """``(prompt, completion, cached)`` from any SDK usage object or dict, or ``None`` when there is none.
+
+    Accepts OpenAI ``CompletionUsage`` (cached tokens in ``prompt_tokens_details``),
+    Agents ``RunCompletionUsage``, AutoGen ``RequestUsage`` and Semantic Kernel usage.
+    """
+    if usage is None:
+        return None
+    prompt = _field(usage, "prompt_tokens")
+    completion = _field(usage, "completion_tokens")
+    if prompt is None and completion is None:
+        # Responses-style naming
+        prompt, completion = _field(usage, "input_tokens"), _field(usage, "output_tokens")
+        if prompt is None and completion is None:
+            return None
+    details = _field(usage, "prompt_tokens_details") or _field(usage, "input_tokens_details")
+    cached = _field(details, "cached_tokens") or _field(usage, "cached_tokens") or 0
+    return int(prompt or 0), int(completion or 0), int(cached)
+
+
+@dataclass
+class Usage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    unpriced_calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt: int, completion: int, cached: int, cost: Optional[float]):
+        self.calls += 1
+        self.prompt_tokens += prompt
+        self.completion_tokens += completion
+        self.cached_tokens += cached
+        if cost is None:
+            self.unpriced_calls += 1
+        else:
+            self.cost += cost
+
+    def merge(self, other: "Usage"):
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cost += other.cost
+        self.unpriced_calls += other.unpriced_calls
+
+    def describe(self) -> str:
+        cached = f" ({self.cached_tokens} cached)" if self.cached_tokens else ""
+        unpriced = f", {self.unpriced_calls} calls unpriced" if self.unpriced_calls else ""
+        return (
+            f"{self.calls} calls, {self.prompt_tokens} prompt{cached} + {self.completion_tokens} completion tokens, "
+            f"${self.cost:.4f}{unpriced}"
+        )
+
+
+_scope: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("token_usage_scope", default={})
+_run_ids = itertools.count(1)
+
+
+@contextmanager
+def scope(**tags):
+    """Tag every call recorded inside (this task and tasks it starts) with ``demo``/``session``/``run``/``agent``.
+
+    ``run=True`` starts a new run with a generated ID.
+    """
+    if tags.get("run") is True:
+        tags["run"] = f"run-{os.getpid()}-{next(_run_ids)}"
+    token = _scope.set({**_scope.get(), **{k: v for k, v in tags.items() if v is not None}})
+    try:
+        yield _scope.get()
+    finally:
+        _scope.reset(token)
+
+
+def current_tags() -> Dict[str, str]:
+    """Tags set by the enclosing ``scope()`` calls."""
+    return _scope.get()
+
+
+def _script_name() -> str:
+    """``connected-agents/main`` for ``python connected-agents/main.py``: several demos are a ``main.py``."""
+    path = os.path.abspath(sys.argv[0]) if sys.argv and sys.argv[0] else ""
+    if not path or not path.endswith(".py"):
+        return "python"
+    return f"{os.path.basename(os.path.dirname(path))}/{os.path.splitext(os.path.basename(path))[0]}"
+
+
+class UsageLedger:
+    """Aggregated token usage and cost per ``(demo, agent, model)``, per session and per recent run."""
+
+    def __init__(self, prices: Optional[Dict[str, Tuple[float, float, float]]] = None, max_runs: int = 256,
+                 max_sessions: int = 256, demo: Optional[str] = None, session: Optional[str] = None):
+        self.prices = load_prices() if prices is None else prices
+        self.max_runs = max_runs
+        self.max_sessions = max_sessions
+        self.demo = demo or _script_name()
+        self.session = session or f"{os.getpid()}-{int(time.time())}"
+        self.started = time.time()
+        self._totals: Dict[Tuple[str, str, str], Usage] = defaultdict(Usage)
+        self._sessions: "OrderedDict[str, Usage]" = OrderedDict()
+        self._runs: "OrderedDict[str, Usage]" = OrderedDict()
+        self._prices_by_model: Dict[str, Optional[Tuple[float, float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def price(self, model: str) -> Optional[Tuple[float, float, float]]:
+        """Prices for ``model`` by longest matching prefix (``gpt-4o-2024-11-20`` uses ``gpt-4o``)."""
+        if model not in self._prices_by_model:
+            matches = [name for name in self.prices if model.lower().startswith(name.lower())]
+            self._prices_by_model[model] = self.prices[max(matches, key=len)] if matches else None
+        return self._prices_by_model[model]
+
+    def cost(self, model: str, prompt: int, completion: int, cached: int = 0) -> Optional[float]:
+        price = self.price(model)
+        if price is None:
+            return None
+        input_price, cached_price, output_price = price
+        return ((prompt - cached) * input_price + cached * cached_price + completion * output_price) / 1e6
+
+    def record(self, usage, model: Optional[str] = None, agent: Optional[str] = None, demo: Optional[str] = None,
+               session: Optional[str] = None, run: Optional[str] = None) -> bool:
+        """Account for one model call; ``usage`` is any shape ``read_usage`` reads. Returns whether it had usage."""
+        tokens = read_usage(usage)
+        if tokens is None:
+            return False
+        prompt, completion, cached = tokens
+        tags = _scope.get()
+        model = model or tags.get("model") or "unknown"
+        key = (demo or tags.get("demo") or self.demo, agent or tags.get("agent") or "unknown", model)
+        session = session or tags.get("session") or self.session
+        run = run or tags.get("run")
+        cost = self.cost(model, prompt, completion, cached)
+        with self._lock:
+            self._totals[key].add(prompt, completion, cached, cost)
+            self._bounded(self._sessions, session, self.max_sessions).add(prompt, completion, cached, cost)
+            if run is not None:
+                self._bounded(self._runs, run, self.max_runs).add(prompt, completion, cached, cost)
+        return True
+
+    @staticmethod
+    def _bounded(entries: "OrderedDict[str, Usage]", key: str, limit: int) -> Usage:
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = Usage()
+            if len(entries) > limit:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(key)
+        return entry
+
+    def total(self) -> Usage:
+        total = Usage()
+        with self._lock:
+            for usage in self._totals.values():
+                total.merge(usage)
+        return total
+
+    def session_usage(self, session: Optional[str] = None) -> Usage:
+        with self._lock:
+            return Usage(**asdict(self._sessions.get(session or self.session, Usage())))
+
+    def run_usage(self, run: str) -> Usage:
+        with self._lock:
+            return Usage(**asdict(self._runs.get(run, Usage())))
+
+    def rows(self) -> List[dict]:
+        with self._lock:
+            return [dict(zip(DIMENSIONS, key), **asdict(usage)) for key, usage in self._totals.items()]
+
+    def snapshot(self) -> dict:
+        """JSON-ready summary of this process, as appended to ``AGENT_USAGE``."""
+        with self._lock:
+            runs = {run: asdict(usage) for run, usage in self._runs.items()}
+            sessions = {session: asdict(usage) for session, usage in self._sessions.items()}
+        return {
+            "session": self.session,
+            "started": self.started,
+            "ended": time.time(),
+            "rows": self.rows(),
+            "sessions": sessions,
+            "runs": runs,
+        }
+
+    def export(self, path: str):
+        if not self._totals:
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+    def report(self, top: int = 5, by: str = "agent") -> str:
+        return summary(self.rows(), top=top, by=by)
+
+
+def group(rows: Iterable[dict], by: str = "agent") -> List[Tuple[str, Usage]]:
+    """Merge ``rows`` on the ``by`` dimensions (comma separated), most tokens first."""
+    dimensions = [d.strip() for d in by.split(",")]
+    groups: Dict[str, Usage] = defaultdict(Usage)
+    for row in rows:
+        usage = Usage(**{name: row.get(name, 0) for name in Usage.__dataclass_fields__})
+        groups[" / ".join(str(row.get(d, "?")) for d in dimensions)].merge(usage)
+    return sorted(groups.items(), key=lambda item: item[1].total_tokens, reverse=True)
+
+
+def summary(rows: Iterable[dict], top: int = 5, by: str = "agent") -> str:
+    rows = list(rows)
+    if not rows:
+        return "Token usage: no model calls recorded"
+    total = Usage()
+    for _, usage in group(rows, "demo"):
+        total.merge(usage)
+    lines = [f"Token usage: {total.describe()}"]
+    for name, usage in group(rows, by)[:top]:
+        share = usage.total_tokens / total.total_tokens if total.total_tokens else 0.0
+        lines.append(f"  {name}: {share:.0%} of tokens, {usage.describe()}")
+    return "\n".join(lines)
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> UsageLedger:
+    """The process ledger; exported to ``AGENT_USAGE`` at exit when it is set."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger()
+            path = os.getenv(USAGE_ENV_VAR)
+            if path:
+                atexit.register(_ledger.export, path)
+        return _ledger
+
+
+def record(usage, **tags) -> bool:
+    """Record one call in the process ledger (see ``UsageLedger.record``)."""
+    return get_ledger().record(usage, **tags)
+
+
+def load_rows(path: str, last: Optional[int] = None) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        snapshots = [json.loads(line) for line in f if line.strip()]
+    if last:
+        snapshots = snapshots[-last:]
+    return [row for snapshot in snapshots for row in snapshot["rows"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize token usage and cost exported to AGENT_USAGE.")
+    parser.add_argument("path", help="JSONL file written by the demos")
+    parser.add_argument("--by", default="agent", help="demo, agent, model or a comma-separated combination")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--last", type=int, help="only the last N sessions")
+    args = parser.parse_args(argv)
+    print(summary(load_rows(args.path, args.last), top=args.top, by=args.by))
+
+
+if __name__ == "__main__":
+    main()
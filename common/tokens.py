@@ -0,0 +1,31 @@
+"""Token counting shared by the compaction and context-window helpers."""
+
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken ships with the autogen requirements only
+    tiktoken = None
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    """The tiktoken encoding, or None when it cannot be loaded.
+
+    tiktoken downloads its BPE files on first use, so offline it is importable but
+    every ``get_encoding`` raises; the failure is cached and callers estimate instead.
+    """
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, encoding: str = "o200k_base") -> int:
+    """Count tokens the way gpt-4o does, or estimate ~4 characters per token without tiktoken or its encoding."""
+    if not text:
+        return 0
+    encoder = _encoding(encoding) if tiktoken is not None else None
+    if encoder is None:
+        return max(1, len(text) // 4)
+    return len(encoder.encode(text, disallowed_special=()))
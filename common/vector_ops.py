@@ -0,0 +1,172 @@
+"""Vectorized arithmetic for the MCP calculator's batch tools.
+
+A scalar ``add(a, b)`` tool costs one JSON-RPC round trip per operation.
+These helpers take whole arrays and compute them in NumPy, so thousands of
+operations cost one call. Inputs are bounded by ``MAX_ELEMENTS`` and
+expressions by ``MAX_EXPRESSION_LENGTH`` / ``MAX_EXPRESSION_NODES``; violations
+raise ``ValueError``, which FastMCP returns to the client as a tool error.
+
+``evaluate`` parses the expression with ``ast`` and only allows numbers,
+variable names, arithmetic operators and a fixed set of NumPy functions;
+nothing is passed to ``eval``.
+"""
+
+import ast
+import operator
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+MAX_ELEMENTS = 1_000_000
+MAX_VARIABLES = 16
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPRESSION_NODES = 200
+
+ELEMENTWISE = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.divide,
+    "power": np.power,
+    "minimum": np.minimum,
+    "maximum": np.maximum,
+}
+
+REDUCTIONS = {
+    "sum": np.sum,
+    "mean": np.mean,
+    "min": np.min,
+    "max": np.max,
+    "prod": np.prod,
+    "std": np.std,
+    "var": np.var,
+    "median": np.median,
+}
+
+_BINARY = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+    ast.Mod: operator.mod,
+    ast.FloorDiv: operator.floordiv,
+}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_FUNCTIONS = {
+    name: getattr(np, name)
+    for name in ("abs", "sqrt", "exp", "log", "log10", "sin", "cos", "tan", "floor", "ceil", "round", "minimum", "maximum", "where")
+}
+_COMPARE = {ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less, ast.LtE: np.less_equal}
+
+
+def as_array(values: Sequence[float], name: str = "values") -> np.ndarray:
+    if len(values) > MAX_ELEMENTS:
+        raise ValueError(f"{name} has {len(values)} elements; the limit is {MAX_ELEMENTS}")
+    try:
+        array = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        array = None
+    if array is None or array.ndim != 1:
+        raise ValueError(f"{name} must be a flat list of numbers")
+    return array
+
+
+def to_list(result) -> List[Optional[float]]:
+    """JSON-safe output: NaN and infinities (e.g. from division by zero) become ``None``."""
+    array = np.atleast_1d(np.asarray(result, dtype=np.float64))
+    if np.isfinite(array).all():
+        return array.tolist()
+    out = array.astype(object)
+    out[~np.isfinite(array)] = None
+    return out.tolist()
+
+
+def elementwise(op: str, a: Sequence[float], b: Sequence[float]) -> List[Optional[float]]:
+    """Apply ``op`` element-wise; ``b`` may have length 1 to broadcast a scalar."""
+    func = ELEMENTWISE.get(op)
+    if func is None:
+        raise ValueError(f"Unknown operation '{op}'; expected one of {sorted(ELEMENTWISE)}")
+    left, right = as_array(a, "a"), as_array(b, "b")
+    if len(right) not in (1, len(left)):
+        raise ValueError(f"a has {len(left)} elements but b has {len(right)}; b must match or have one element")
+    with np.errstate(all="ignore"):
+        return to_list(func(left, right))
+
+
+def reduce(op: str, values: Sequence[float]) -> Optional[float]:
+    func = REDUCTIONS.get(op)
+    if func is None:
+        raise ValueError(f"Unknown reduction '{op}'; expected one of {sorted(REDUCTIONS)}")
+    array = as_array(values)
+    if array.size == 0:
+        raise ValueError("values is empty")
+    with np.errstate(all="ignore"):
+        return to_list(func(array))[0]
+
+
+class _Evaluator(ast.NodeVisitor):
+    def __init__(self, variables: Dict[str, np.ndarray]):
+        self.variables = variables
+
+    def visit_Expression(self, node):
+        return self.visit(node.body)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ValueError(f"Unsupported constant {node.value!r}")
+        return np.float64(node.value)
+
+    def visit_Name(self, node):
+        if node.id not in self.variables:
+            raise ValueError(f"Unknown variable '{node.id}'")
+        return self.variables[node.id]
+
+    def visit_BinOp(self, node):
+        op = _BINARY.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported operator {type(node.op).__name__}")
+        return op(self.visit(node.left), self.visit(node.right))
+
+    def visit_UnaryOp(self, node):
+        op = _UNARY.get(type(node.op))
+        if op is None:
+            raise ValueError(f"Unsupported operator {type(node.op).__name__}")
+        return op(self.visit(node.operand))
+
+    def visit_Compare(self, node):
+        if len(node.ops) != 1 or type(node.ops[0]) not in _COMPARE:
+            raise ValueError("Only single <, <=, > and >= comparisons are supported")
+        return _COMPARE[type(node.ops[0])](self.visit(node.left), self.visit(node.comparators[0])).astype(np.float64)
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise ValueError(f"Unsupported function; allowed: {sorted(_FUNCTIONS)}")
+        return _FUNCTIONS[node.func.id](*(self.visit(arg) for arg in node.args))
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def evaluate(expression: str, variables: Dict[str, Sequence[float]]) -> List[Optional[float]]:
+    """Evaluate an arithmetic expression over equal-length (or length-1) variable arrays.
+
+    Example: ``evaluate("sqrt(x**2 + y**2)", {"x": [3, 5], "y": [4, 12]})`` -> ``[5.0, 13.0]``.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    if len(variables) > MAX_VARIABLES:
+        raise ValueError(f"At most {MAX_VARIABLES} variables are allowed")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as exc:
+        raise ValueError(f"Invalid expression: {exc.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ValueError(f"Expression has more than {MAX_EXPRESSION_NODES} nodes")
+
+    arrays = {name: as_array(values, name) for name, values in variables.items()}
+    lengths = {len(a) for a in arrays.values() if len(a) != 1}
+    if len(lengths) > 1:
+        raise ValueError(f"Variables must have the same length (or one element); got lengths {sorted(lengths)}")
+    with np.errstate(all="ignore"):
+        return to_list(_Evaluator(arrays).visit(tree))
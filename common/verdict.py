@@ -0,0 +1,102 @@
+"""Structured reviewer verdicts that can be decided from a partial token stream.
+
+The Educator used to be asked to "state that it is approved" somewhere in a
+full review, so the group chat could only check for "approved" once the whole
+review had been generated. Reviewers are now told to open with a verdict
+marker line such as ``VERDICT: APPROVED`` or ``VERDICT: REVISE``. The marker
+is decided after a handful of tokens; on approval the rest of the review is
+not needed and the stream can be cut short.
+
+Responses without a marker fall back to the old "approved" substring check
+once the turn is complete.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from common.sk_streaming import StreamMeter
+
+APPROVED, REVISE = "APPROVED", "REVISE"
+
+VERDICT_INSTRUCTIONS = (
+    f"Begin every response with a single line 'VERDICT: {APPROVED}' if the lesson plan is acceptable as is, "
+    f"or 'VERDICT: {REVISE}' if it needs changes, then give your review."
+)
+
+_MARKER = re.compile(r"^\W*VERDICT\W*(APPROVED|REVISE)\b", re.IGNORECASE)
+
+
+def parse_verdict(text: str, final: bool = False) -> Optional[str]:
+    """Return ``APPROVED``/``REVISE`` once ``text`` decides it, else ``None``.
+
+    With ``final=True`` the text is a complete response: unmarked responses use
+    the legacy "approved" substring check.
+    """
+    match = _MARKER.match(text)
+    if match:
+        # The word must be complete ("REVISE" vs. a longer word) before it counts
+        end = match.end()
+        if final or len(text) > end:
+            return match.group(1).upper()
+        return None
+    if final:
+        return APPROVED if "approved" in text.lower() else REVISE
+    return None
+
+
+@dataclass
+class EarlyStop:
+    agent: str
+    verdict: str
+    tokens: int
+    seconds: float
+    saved_tokens: float
+    saved_seconds: float
+    estimated_from: str
+
+
+class VerdictWatcher:
+    """Watches one agent's token stream and asks to stop it as soon as the verdict is ``APPROVED``.
+
+    Use ``should_stop`` as the ``stop_when`` callback of
+    ``common.sk_streaming.stream_group_chat``. Tokens and latency saved are
+    estimated from the same agent's earlier complete turns in ``meter``, or
+    from ``expected_tokens`` when it has none.
+    """
+
+    def __init__(self, agent: str, meter: StreamMeter, expected_tokens: int = 350):
+        self.agent = agent
+        self.meter = meter
+        self.expected_tokens = expected_tokens
+        self.stops: List[EarlyStop] = []
+
+    def should_stop(self, agent: str, text: str) -> bool:
+        return agent == self.agent and parse_verdict(text) == APPROVED
+
+    def record(self, turn) -> EarlyStop:
+        """Record the truncated ``TurnStats`` of the turn that ``should_stop`` cut short."""
+        full = [t for t in self.meter.turns if t.agent == self.agent and not t.truncated]
+        if full:
+            expected = sum(t.tokens for t in full) / len(full)
+            rate = sum(t.tokens_per_second for t in full) / len(full)
+            source = f"{len(full)} earlier {self.agent} turns"
+        else:
+            expected = self.expected_tokens
+            rate = turn.tokens_per_second
+            source = f"default of {self.expected_tokens} tokens"
+        saved_tokens = max(0.0, expected - turn.tokens)
+        saved_seconds = saved_tokens / rate if rate > 0 else 0.0
+        stop = EarlyStop(self.agent, APPROVED, turn.tokens, turn.duration, saved_tokens, saved_seconds, source)
+        self.stops.append(stop)
+        return stop
+
+    def report(self) -> str:
+        if not self.stops:
+            return f"No early verdict from {self.agent}"
+        lines = [
+            f"Early verdict {s.verdict} from {s.agent} after {s.tokens} tokens ({s.seconds:.1f}s); "
+            f"skipped ~{s.saved_tokens:.0f} tokens / ~{s.saved_seconds:.1f}s (estimated from {s.estimated_from})"
+            for s in self.stops
+        ]
+        return "\n".join(lines)
@@ -1,31 +1,48 @@
 import streamlit as st
 import os
+import sys
 from dotenv import load_dotenv
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import ListSortOrder
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.agent_tracing import span
+from common.azure_resources import get_project_client
+from common.resource_tracker import tracker_for
+from common.run_poller import get_run_waiter
+
 load_dotenv()
 
+# Session threads unused for this long are deleted by the background sweeper
+SESSION_IDLE_SECONDS = 3600
+
 def init_client():
-    client = AIProjectClient(
-        credential=DefaultAzureCredential(),
-        endpoint=os.getenv("AZURE_AI_PROJECT_ENDPOINT")
-    )
+    # AZURE_AI_PROJECT_ENDPOINT, or the local emulator when AGENTS_EMULATOR is set
+    client = get_project_client(endpoint=os.getenv("AZURE_AI_PROJECT_ENDPOINT"))
+    tracker_for(client).start_sweeper(max_idle=SESSION_IDLE_SECONDS)
     return client, os.getenv("ORCHESTRATOR_AGENT_ID")
 
+def session_thread(client):
+    # Streamlit does not tell us when a session ends, so its thread is swept once idle; start a new one then
+    if not tracker_for(client).alive(st.session_state.get('thread_id', '')):
+        st.session_state.thread_id = client.agents.threads.create().id
+        st.session_state.runs = []
+    return st.session_state.thread_id
+
 def send_message(client, agent_id, thread_id, message):
-    client.agents.messages.create(thread_id=thread_id, role="user", content=message)
-    run = client.agents.runs.create_and_process(thread_id=thread_id, agent_id=agent_id)
-    
-    if run.status == "failed":
-        return f"Error: {run.last_error}", None
-    
-    messages = client.agents.messages.list(thread_id=thread_id, order=ListSortOrder.DESCENDING)
-    for msg in messages:
-        if msg.role == "assistant" and msg.text_messages:
-            return msg.text_messages[-1].text.value, run.id
-    return "No response", None
+    # One trace per question when AGENT_TRACE is set
+    with span("connected_agents.send_message"):
+        client.agents.messages.create(thread_id=thread_id, role="user", content=message)
+        # Adaptive (or streamed, AGENT_RUN_WAIT=stream) waiting instead of fixed 1 s polling
+        run = get_run_waiter().run(client.agents, thread_id, agent_id, key="orchestrator")
+        
+        if run.status == "failed":
+            return f"Error: {run.last_error}", None
+        
+        messages = client.agents.messages.list(thread_id=thread_id, order=ListSortOrder.DESCENDING)
+        for msg in messages:
+            if msg.role == "assistant" and msg.text_messages:
+                return msg.text_messages[-1].text.value, run.id
+        return "No response", None
 
 def show_agent_flow(client, thread_id, run_id):
     try:
@@ -47,10 +64,8 @@ st.title("🎓 Educational Assistant")
 if 'client' not in st.session_state:
     try:
         client, agent_id = init_client()
-        thread = client.agents.threads.create()
-        st.session_state.update({
-            'client': client, 'agent_id': agent_id, 'thread_id': thread.id, 'runs': []
-        })
+        st.session_state.update({'client': client, 'agent_id': agent_id})
+        session_thread(client)
         st.success("✅ Connected!")
     except Exception as e:
         st.error(f"❌ {e}")
@@ -79,7 +94,7 @@ if st.button("Send", type="primary") and question:
         response, run_id = send_message(
             st.session_state.client, 
             st.session_state.agent_id, 
-            st.session_state.thread_id, 
+            session_thread(st.session_state.client), 
             question
         )
         if run_id:
@@ -89,7 +104,7 @@ if st.button("Send", type="primary") and question:
 # Conversation
 st.header("💬 Conversation")
 messages = st.session_state.client.agents.messages.list(
-    thread_id=st.session_state.thread_id, 
+    thread_id=session_thread(st.session_state.client), 
     order=ListSortOrder.DESCENDING
 )
 
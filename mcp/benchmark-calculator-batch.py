@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+# Compares N scalar `add` calls (one JSON-RPC round trip each) with the same N additions
+# sent through `add_batch` in chunks of --batch-size, against calculator-server.py over stdio.
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calculator-server.py")
+
+
+def report(label: str, operations: int, calls: int, seconds: float):
+    print(
+        f"{label:<22} {operations:>8} ops in {calls:>6} calls: {seconds:8.3f}s "
+        f"| {operations / seconds:12.0f} ops/s | {seconds / calls * 1000:8.3f} ms/call"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call add vs. batched NumPy tools.")
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    a = [random.randint(0, 1000) for _ in range(args.operations)]
+    b = [random.randint(0, 1000) for _ in range(args.operations)]
+    server_params = StdioServerParameters(command="python", args=[SERVER])
+
+    async with stdio_client(server_params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+
+            started = time.perf_counter()
+            scalar = []
+            for x, y in zip(a, b):
+                result = await session.call_tool("add", arguments={"a": x, "b": y})
+                scalar.append(float(result.content[0].text))
+            report("per-call add", args.operations, args.operations, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            batched, calls = [], 0
+            for start in range(0, args.operations, args.batch_size):
+                end = start + args.batch_size
+                result = await session.call_tool("add_batch", arguments={"a": a[start:end], "b": b[start:end]})
+                if result.isError:
+                    raise RuntimeError(result.content[0].text)
+                batched.extend(json.loads(result.content[0].text)["values"])
+                calls += 1
+            report("add_batch", args.operations, calls, time.perf_counter() - started)
+
+    if batched != scalar:
+        raise RuntimeError("Batched results differ from per-call results")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.mcp_pool import McpSessionPool, percentile, sse_transport, stdio_transport, streamable_http_transport
+
+try:
+    import psutil
+except ImportError:  # RSS is reported as n/a without psutil
+    psutil = None
+
+# Drives calculator-server.py with N concurrent clients over stdio, SSE and streamable HTTP on localhost
+# and reports handshake time, per-call latency percentiles, calls/sec and server RSS for each transport.
+# stdio starts one server process per client (that is how the transport works); the HTTP transports
+# share one server process, so RSS is summed over all server processes of the run.
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calculator-server.py")
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not listen on port {port} within {timeout:.0f}s")
+
+
+def server_processes(http_server):
+    """The calculator server processes of this run: the HTTP server, or the stdio children of this process."""
+    if psutil is None:
+        return []
+    if http_server is not None:
+        return [psutil.Process(http_server.pid)]
+    return [
+        p for p in psutil.Process().children(recursive=True)
+        if any("calculator-server.py" in part for part in (p.cmdline() or []))
+    ]
+
+
+async def sample_rss(http_server, peak: list, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            peak[0] = max(peak[0], sum(p.memory_info().rss for p in server_processes(http_server)))
+        except Exception:
+            # A process exited between listing and sampling
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_client(transport, client: int, calls: int, in_flight: int, latencies: list, handshakes: list, connected: list,
+                     go: asyncio.Event):
+    async with McpSessionPool(transport, size=1, max_in_flight=in_flight) as pool:
+        handshakes.extend(pool.handshake_seconds)
+        # All clients connect first so the timed phase measures concurrent load only
+        connected.append(pool)
+        await go.wait()
+        pool.reset_stats()
+        # add is memoized by the server, so every call gets arguments no other call used
+        await pool.map("add", [{"a": client * calls + i, "b": 1} for i in range(calls)])
+        latencies.extend(pool.latencies)
+        return pool.errors
+
+
+async def benchmark(name: str, clients: int, calls: int, in_flight: int) -> dict:
+    http_server = None
+    if name == "stdio":
+        transport = stdio_transport(sys.executable, [SERVER, "--transport", "stdio"])
+    else:
+        port = free_port()
+        http_server = subprocess.Popen(
+            [sys.executable, SERVER, "--transport", name, "--host", "127.0.0.1", "--port", str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        await wait_for_port(port)
+        path = "sse" if name == "sse" else "mcp"
+        url = f"http://127.0.0.1:{port}/{path}"
+        transport = sse_transport(url) if name == "sse" else streamable_http_transport(url)
+
+    latencies, handshakes, peak_rss = [], [], [0]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(http_server, peak_rss, stop))
+    connected, go = [], asyncio.Event()
+    try:
+        tasks = [
+            asyncio.create_task(run_client(transport, client, calls, in_flight, latencies, handshakes, connected, go))
+            for client in range(clients)
+        ]
+        # Start the timed load phase once every client has connected (or one has failed)
+        while len(connected) < clients and not any(task.done() for task in tasks):
+            await asyncio.sleep(0.01)
+        go.set()
+        started = time.perf_counter()
+        errors = sum(await asyncio.gather(*tasks))
+        elapsed = time.perf_counter() - started
+    finally:
+        stop.set()
+        await sampler
+        if http_server is not None:
+            http_server.terminate()
+            http_server.wait(timeout=10)
+
+    latencies.sort()
+    handshakes.sort()
+    return {
+        "transport": name,
+        "clients": clients,
+        "calls": len(latencies),
+        "errors": errors,
+        "handshake_p50_ms": percentile(handshakes, 50) * 1000,
+        "handshake_max_ms": (handshakes[-1] if handshakes else 0.0) * 1000,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p95_ms": percentile(latencies, 95) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "calls_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "server_rss_mb": peak_rss[0] / 2**20 if psutil is not None else None,
+    }
+
+
+def print_table(results):
+    header = f"{'transport':<16} {'clients':>7} {'calls':>7} {'err':>4} {'hs p50':>9} {'hs max':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'calls/s':>9} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rss = f"{r['server_rss_mb']:.1f}" if r["server_rss_mb"] is not None else "n/a"
+        print(
+            f"{r['transport']:<16} {r['clients']:>7} {r['calls']:>7} {r['errors']:>4} "
+            f"{r['handshake_p50_ms']:>7.1f}ms {r['handshake_max_ms']:>7.1f}ms {r['latency_p50_ms']:>6.2f}ms "
+            f"{r['latency_p95_ms']:>6.2f}ms {r['latency_p99_ms']:>6.2f}ms {r['calls_per_second']:>9.0f} {rss:>8}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark calculator-server.py over each MCP transport.")
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients per transport")
+    parser.add_argument("--calls", type=int, default=500, help="add calls per client")
+    parser.add_argument("--in-flight", type=int, default=8, help="pipelined calls per client")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.transports:
+        results.append(await benchmark(name, args.clients, args.calls, args.in_flight))
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
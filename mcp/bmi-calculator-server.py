@@ -0,0 +1,223 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+from mcp.server.fastmcp import FastMCP
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.mcp_server import ToolRuntime, run_server
+
+load_dotenv()
+
+# Create an MCP server
+mcp = FastMCP(
+    name="BMI Calculator",
+    #host="0.0.0.0",
+    #port=8000,
+)
+
+# Cohort statistics run in a process pool so a large file never blocks other clients;
+# single-person results are memoized. Both are reported by the stats://tools resource.
+runtime = ToolRuntime(max_queue=16, timeout=300)
+runtime.register_stats_resource(mcp)
+
+# Cohort files are read from this folder only, so clients cannot make the server read arbitrary files.
+DATA_DIR = os.path.abspath(os.getenv("BMI_DATA_DIR", os.getcwd()))
+MAX_INLINE_ROWS = 100_000
+DEFAULT_CHUNK_ROWS = 100_000
+
+# WHO adult categories: upper bound (exclusive) -> name
+CATEGORIES = [(18.5, "Underweight"), (25.0, "Normal weight"), (30.0, "Overweight"), (np.inf, "Obese")]
+CATEGORY_EDGES = np.array([bound for bound, _ in CATEGORIES[:-1]])
+CATEGORY_NAMES = [name for _, name in CATEGORIES]
+
+# Fine fixed-width bins for approximate percentiles with constant memory, and the coarser reported histogram
+PERCENTILE_EDGES = np.arange(0.0, 100.05, 0.1)
+HISTOGRAM_EDGES = np.arange(10.0, 62.5, 2.5)
+
+UNITS = {
+    # weight factor, height factor -> BMI = weight * wf / (height * hf)^2
+    "metric": (1.0, 1.0),          # kg, m
+    "metric_cm": (1.0, 0.01),      # kg, cm
+    "imperial": (0.45359237, 0.0254),  # lb, in
+}
+
+
+def bmi_values(weights, heights, units: str = "metric") -> np.ndarray:
+    """Vectorized BMI; rows with missing or non-positive values become NaN."""
+    if units not in UNITS:
+        raise ValueError(f"Unknown units '{units}'; expected one of {sorted(UNITS)}")
+    weight_factor, height_factor = UNITS[units]
+    weights = np.asarray(weights, dtype=np.float64) * weight_factor
+    heights = np.asarray(heights, dtype=np.float64) * height_factor
+    with np.errstate(all="ignore"):
+        bmi = weights / (heights * heights)
+    bmi[~((weights > 0) & (heights > 0) & np.isfinite(bmi))] = np.nan
+    return bmi
+
+
+def category(bmi: float) -> str:
+    return CATEGORY_NAMES[int(np.searchsorted(CATEGORY_EDGES, bmi, side="right"))]
+
+
+class CohortStats:
+    """Streaming BMI statistics: memory does not grow with the number of rows.
+
+    Mean and variance are merged per chunk (Chan et al.), percentiles come from
+    0.1-wide BMI bins, so they are accurate to 0.1.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.invalid = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.categories = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.fine = np.zeros(len(PERCENTILE_EDGES) + 1, dtype=np.int64)
+        self.histogram = np.zeros(len(HISTOGRAM_EDGES) + 1, dtype=np.int64)
+
+    def add(self, bmi: np.ndarray):
+        self.rows += len(bmi)
+        valid = bmi[~np.isnan(bmi)]
+        self.invalid += len(bmi) - len(valid)
+        if not len(valid):
+            return
+        n, mean = len(valid), float(valid.mean())
+        m2 = float(((valid - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.min = min(self.min, float(valid.min()))
+        self.max = max(self.max, float(valid.max()))
+        self.categories += np.bincount(np.searchsorted(CATEGORY_EDGES, valid, side="right"), minlength=len(CATEGORIES))
+        self.fine += np.bincount(np.searchsorted(PERCENTILE_EDGES, valid, side="right"), minlength=len(self.fine))
+        self.histogram += np.bincount(np.searchsorted(HISTOGRAM_EDGES, valid, side="right"), minlength=len(self.histogram))
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        position = np.searchsorted(np.cumsum(self.fine), q / 100 * self.count, side="left")
+        if position == 0:
+            return round(self.min, 1)
+        if position >= len(PERCENTILE_EDGES):
+            return round(self.max, 1)
+        # Midpoint of the 0.1-wide bin, clamped to the observed range
+        return round(min(max(PERCENTILE_EDGES[position - 1] + 0.05, self.min), self.max), 2)
+
+    def summary(self) -> Dict:
+        labels = [f"<{HISTOGRAM_EDGES[0]:g}"]
+        labels += [f"{low:g}-{high:g}" for low, high in zip(HISTOGRAM_EDGES[:-1], HISTOGRAM_EDGES[1:])]
+        labels.append(f">={HISTOGRAM_EDGES[-1]:g}")
+        return {
+            "rows": self.rows,
+            "valid": self.count,
+            "invalid": self.invalid,
+            "mean": round(self.mean, 2) if self.count else None,
+            "std": round(float(np.sqrt(self.m2 / self.count)), 2) if self.count else None,
+            "min": round(self.min, 2) if self.count else None,
+            "max": round(self.max, 2) if self.count else None,
+            "percentiles": {f"p{q}": self.percentile(q) for q in (5, 25, 50, 75, 95)},
+            "categories": {
+                name: {"count": int(count), "share": round(int(count) / self.count, 4) if self.count else 0.0}
+                for name, count in zip(CATEGORY_NAMES, self.categories)
+            },
+            "histogram": [{"bin": label, "count": int(count)} for label, count in zip(labels, self.histogram)],
+        }
+
+
+def _resolve(path: str) -> str:
+    full = os.path.abspath(os.path.join(DATA_DIR, path))
+    if os.path.commonpath([full, DATA_DIR]) != DATA_DIR:
+        raise ValueError(f"Cohort files must be inside {DATA_DIR}")
+    if not os.path.isfile(full):
+        raise ValueError(f"No such file: {path}")
+    return full
+
+
+def _chunks(path: str, columns: List[str], chunk_rows: int):
+    """Yield (weights, heights) arrays of at most ``chunk_rows`` rows without loading the whole file."""
+    if path.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pyarrow (pip install pyarrow)") from None
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            # Casting to float turns nulls into NaN, which bmi_values counts as invalid rows
+            yield tuple(
+                batch.column(batch.schema.get_field_index(name)).cast(pa.float64()).to_numpy(zero_copy_only=False)
+                for name in columns
+            )
+    else:
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ValueError("Reading CSV files requires pandas (pip install pandas)") from None
+        for frame in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+            frame = frame.apply(pd.to_numeric, errors="coerce")
+            yield frame[columns[0]].to_numpy(dtype=np.float64), frame[columns[1]].to_numpy(dtype=np.float64)
+
+
+@mcp.tool()
+@runtime.pure
+def calculate_bmi(weight: float, height: float, units: str = "metric") -> Dict:
+    """Calculate the BMI and WHO category for one person.
+
+    units: "metric" (kg, m), "metric_cm" (kg, cm) or "imperial" (lb, in).
+    """
+    bmi = float(bmi_values([weight], [height], units)[0])
+    if np.isnan(bmi):
+        raise ValueError("weight and height must be positive numbers")
+    return {"bmi": round(bmi, 2), "category": category(bmi)}
+
+
+@mcp.tool()
+@runtime.cpu_bound
+def cohort_bmi(weights: List[float], heights: List[float], units: str = "metric") -> Dict:
+    """Summary statistics, category shares and a histogram of BMI for a cohort sent inline.
+
+    For more than 100,000 people, put the cohort in a CSV or Parquet file and use cohort_bmi_file.
+    """
+    if len(weights) != len(heights):
+        raise ValueError(f"weights has {len(weights)} values but heights has {len(heights)}")
+    if len(weights) > MAX_INLINE_ROWS:
+        raise ValueError(f"At most {MAX_INLINE_ROWS} rows inline; use cohort_bmi_file for larger cohorts")
+    stats = CohortStats()
+    stats.add(bmi_values(weights, heights, units))
+    return stats.summary()
+
+
+@mcp.tool()
+@runtime.cpu_bound
+def cohort_bmi_file(
+    path: str,
+    weight_column: str = "weight",
+    height_column: str = "height",
+    units: str = "metric",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Dict:
+    """Summary statistics, category shares and a histogram of BMI for a CSV or Parquet cohort file.
+
+    The file is read in chunks of chunk_rows rows, so memory stays bounded however large it is.
+    path is relative to the server's data folder (BMI_DATA_DIR).
+    """
+    if not 1 <= chunk_rows <= 1_000_000:
+        raise ValueError("chunk_rows must be between 1 and 1,000,000")
+    stats = CohortStats()
+    for weights, heights in _chunks(_resolve(path), [weight_column, height_column], chunk_rows):
+        stats.add(bmi_values(weights, heights, units))
+    result = stats.summary()
+    result["file"] = path
+    return result
+
+
+# Run the server; pick the transport with --transport stdio|sse|streamable-http (or MCP_TRANSPORT)
+if __name__ == "__main__":
+    run_server(mcp)
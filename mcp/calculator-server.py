@@ -1,10 +1,15 @@
+import os
+import sys
+from typing import Dict, List
+
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 
-load_dotenv()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common import vector_ops
+from common.mcp_server import ToolRuntime, run_server
 
-transport = "stdio"
-#transport = "sse"
+load_dotenv()
 
 # Create an MCP server
 mcp = FastMCP(
@@ -13,21 +18,58 @@ mcp = FastMCP(
     #port=8000, 
 )
 
+# Pure tools are memoized; CPU-heavy ones run in a process pool so they never block other clients.
+# Cache hit rates and the pool's queue depth are published as the stats://tools resource.
+runtime = ToolRuntime(cache_size=1024, max_queue=64, timeout=30)
+runtime.register_stats_resource(mcp)
+
 
 # Add a simple calculator tool
 @mcp.tool()
+@runtime.pure
 def add(a: int, b: int) -> int:
     """Add two numbers"""
     return a + b
 
 
-# Run the server
+# Batch tools: one call computes a whole array in NumPy instead of one round trip per scalar.
+# Results are returned as objects so they travel as a single JSON payload;
+# non-finite results (e.g. division by zero) come back as null.
+@mcp.tool()
+def add_batch(a: List[float], b: List[float]) -> Dict:
+    """Add two arrays element-wise (b may have one element to add a constant). Returns {"values": [...]}"""
+    return {"values": vector_ops.elementwise("add", a, b)}
+
+
+@mcp.tool()
+def calculate_batch(operation: str, a: List[float], b: List[float]) -> Dict:
+    """Apply add, subtract, multiply, divide, power, minimum or maximum element-wise to two arrays.
+
+    b may have one element to apply the same operand to every element of a. Returns {"values": [...]}
+    """
+    return {"values": vector_ops.elementwise(operation, a, b)}
+
+
+@mcp.tool()
+@runtime.pure
+def reduce_batch(operation: str, values: List[float]) -> Dict:
+    """Reduce an array with sum, mean, min, max, prod, std, var or median. Returns {"value": ...}"""
+    return {"value": vector_ops.reduce(operation, values)}
+
+
+@mcp.tool()
+@runtime.pure
+@runtime.cpu_bound
+def evaluate_batch(expression: str, variables: Dict[str, List[float]]) -> Dict:
+    """Evaluate an arithmetic expression element-wise over named arrays, e.g. "sqrt(x**2 + y**2)".
+
+    Supports + - * / ** % //, comparisons (< <= > >=, giving 1.0/0.0) and the functions
+    abs, sqrt, exp, log, log10, sin, cos, tan, floor, ceil, round, minimum, maximum, where.
+    Arrays must have equal length or one element. Returns {"values": [...]}
+    """
+    return {"values": vector_ops.evaluate(expression, variables)}
+
+
+# Run the server; pick the transport with --transport stdio|sse|streamable-http (or MCP_TRANSPORT)
 if __name__ == "__main__":
-    if transport == "stdio":
-        print("Running server with stdio transport")
-        mcp.run(transport="stdio")
-    elif transport == "sse":
-        print("Running server with SSE transport")
-        mcp.run(transport="sse")
-    else:
-        raise ValueError(f"Unknown transport: {transport}")
\ No newline at end of file
+    run_server(mcp)
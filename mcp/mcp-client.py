@@ -1,30 +1,44 @@
+import argparse
 import asyncio
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.mcp_pool import McpSessionPool, sse_transport, stdio_transport
 
 async def main():
+    parser = argparse.ArgumentParser(description="MCP calculator client.")
+    parser.add_argument("--sessions", type=int, default=2, help="long-lived server sessions in the pool")
+    parser.add_argument("--in-flight", type=int, default=32, help="maximum pipelined calls across the pool")
+    parser.add_argument("--calls", type=int, default=1000, help="add calls in the pipelined run")
+    parser.add_argument("--sse-url", help="connect to a running SSE server (e.g. http://localhost:8000/sse) instead of stdio")
+    args = parser.parse_args()
+
     # Define server parameters
-    server_params = StdioServerParameters(
-        command="python",  # The command to run your server
-        args=["calculator-server.py"],  # Arguments to the command
-    )
+    if args.sse_url:
+        transport = sse_transport(args.sse_url)
+    else:
+        server = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calculator-server.py")
+        transport = stdio_transport("python", [server])  # one server process per session
 
-    # Connect to the server
-    async with stdio_client(server_params) as (read_stream, write_stream):
-        async with ClientSession(read_stream, write_stream) as session:
-            # Initialize the connection
-            await session.initialize()
+    # Connect to the server; every session is initialized once and reused for all calls
+    async with McpSessionPool(transport, size=args.sessions, max_in_flight=args.in_flight) as pool:
+        # List available tools (cached for the life of the pool)
+        tools = await pool.list_tools()
+        print("Available tools:")
+        for tool in tools:
+            print(f"  - {tool.name}: {tool.description}")
 
-            # List available tools
-            tools_result = await session.list_tools()
-            print("Available tools:")
-            for tool in tools_result.tools:
-                print(f"  - {tool.name}: {tool.description}")
+        # Call our calculator tool
+        result = await pool.call_tool("add", arguments={"a": 2, "b": 3})
+        print(f"2 + 3 = {result.content[0].text}")
 
-            # Call our calculator tool
-            result = await session.call_tool("add", arguments={"a": 2, "b": 3})
-            print(f"2 + 3 = {result.content[0].text}")
+        # Pipeline many calls over the pooled sessions
+        pool.reset_stats()
+        results = await pool.map("add", [{"a": i, "b": i} for i in range(args.calls)])
+        assert [int(r.content[0].text) for r in results] == [2 * i for i in range(args.calls)]
+        print(pool.report())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,164 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.rate_limit import RateLimiter
+
+# Throughput, 429s and latency of a burst of chat requests against a simulated deployment quota, with and
+# without common.rate_limit in front. The deployment enforces its RPM/TPM in 10-second windows, counts
+# prompt + max_tokens per request and answers overflow with 429 + Retry-After, as Azure OpenAI does.
+# Service time runs --time-scale times faster; reported figures are in service time.
+#
+#   sdk      no limiter: honour Retry-After, give up after 2 retries (the openai SDK default)
+#   limiter  RateLimiter configured with the quota; the SDK's 2 retries of a 429 wait behind the queue
+#   headers  RateLimiter without a quota, slowed only by Retry-After and the remaining-* headers
+
+WINDOW = 10.0
+STRATEGIES = ("sdk", "limiter", "headers")
+
+
+class SimulatedDeployment:
+    def __init__(self, rpm: float, tpm: float, time_scale: float):
+        self.rpm, self.tpm, self.time_scale = rpm, tpm, time_scale
+        self.window = WINDOW * time_scale
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._requests = self._tokens = 0
+        self.accepted = self.throttled = 0
+        self.tokens_served = 0
+
+    def send(self, tokens: int, completion: int):
+        """Returns ``(status, headers)`` after the request's latency."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start += self.window * math.floor((now - self._window_start) / self.window)
+                self._requests = self._tokens = 0
+            request_quota, token_quota = self.rpm * WINDOW / 60, self.tpm * WINDOW / 60
+            if self._requests + 1 > request_quota or self._tokens + tokens > token_quota:
+                self.throttled += 1
+                retry_after = self._window_start + self.window - now
+                return 429, {"retry-after-ms": f"{retry_after * 1000:.0f}"}
+            self._requests += 1
+            self._tokens += tokens
+            self.accepted += 1
+            self.tokens_served += tokens
+            headers = {
+                "x-ratelimit-remaining-requests": f"{request_quota - self._requests:.0f}",
+                "x-ratelimit-remaining-tokens": f"{token_quota - self._tokens:.0f}",
+            }
+        time.sleep((0.3 + completion * 0.01) * self.time_scale)
+        return 200, headers
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def benchmark(strategy: str, args) -> dict:
+    deployment = SimulatedDeployment(args.rpm, args.tpm, args.time_scale)
+    limiter = None
+    if strategy == "limiter":
+        # The limiter runs on the wall clock, so give it the quota per real minute
+        limiter = RateLimiter("gpt-4o", args.rpm / args.time_scale, args.tpm / args.time_scale)
+    elif strategy == "headers":
+        limiter = RateLimiter("gpt-4o")
+    rng = random.Random(args.seed)
+    workload = [(rng.randint(200, 2000), args.max_tokens) for _ in range(args.requests)]
+    latencies, failed, per_worker = [], 0, [0] * args.workers
+
+    def one(i: int):
+        prompt, max_tokens = workload[i]
+        tokens = prompt + max_tokens
+        started = time.perf_counter()
+        # The openai SDK default; with the limiter a retry waits its turn instead of the bare Retry-After
+        retries = 2
+        for attempt in range(retries + 1):
+            if limiter:
+                limiter.acquire(tokens)
+            status, headers = deployment.send(tokens, rng.randint(50, max_tokens))
+            if limiter:
+                limiter.observe(status, headers)
+            if status == 200:
+                return (time.perf_counter() - started) / args.time_scale
+            if not limiter and attempt < retries:
+                time.sleep(float(headers["retry-after-ms"]) / 1000)
+        return None
+
+    def worker(w: int):
+        nonlocal failed
+        for i in range(w, args.requests, args.workers):
+            latency = one(i)
+            if latency is None:
+                failed += 1
+            else:
+                latencies.append(latency)
+                per_worker[w] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(worker, range(args.workers)))
+    elapsed = (time.perf_counter() - started) / args.time_scale
+
+    latencies.sort()
+    return {
+        "strategy": strategy,
+        "requests": args.requests,
+        "completed": len(latencies),
+        "failed": failed,
+        "throttled": deployment.throttled,
+        "tpm": deployment.tokens_served / elapsed * 60,
+        "tpm_share": deployment.tokens_served / elapsed * 60 / args.tpm,
+        "rpm": deployment.accepted / elapsed * 60,
+        "latency_p50_s": percentile(latencies, 50),
+        "latency_p95_s": percentile(latencies, 95),
+        "worker_spread": (max(per_worker) - min(per_worker)) if per_worker else 0,
+        "limiter": limiter.report() if limiter else None,
+    }
+
+
+def print_table(results):
+    header = f"{'strategy':<9} {'done':>5} {'failed':>6} {'429s':>5} {'TPM':>8} {'of quota':>8} {'RPM':>6} {'p50 s':>7} {'p95 s':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['strategy']:<9} {r['completed']:>5} {r['failed']:>6} {r['throttled']:>5} {r['tpm']:>8.0f} "
+            f"{r['tpm_share']:>8.0%} {r['rpm']:>6.0f} {r['latency_p50_s']:>7.1f} {r['latency_p95_s']:>7.1f}"
+        )
+    for r in results:
+        if r["limiter"]:
+            print(f"{r['strategy']}: {r['limiter']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark common.rate_limit against a simulated deployment quota.")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=32, help="concurrent callers, all sending as fast as they can")
+    parser.add_argument("--rpm", type=float, default=300, help="deployment requests-per-minute quota")
+    parser.add_argument("--tpm", type=float, default=150000, help="deployment tokens-per-minute quota")
+    parser.add_argument("--max-tokens", type=int, default=500)
+    parser.add_argument("--time-scale", type=float, default=0.02, help="multiply service time by this")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = [benchmark(strategy, args) for strategy in args.strategies]
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
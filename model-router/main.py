@@ -1,10 +1,16 @@
 import os
+import sys
+import uuid
 import asyncio
 import streamlit as st
 from dotenv import load_dotenv
 from openai import AzureOpenAI
 import time
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.rate_limit import get_limiter, http_client
+from common.token_usage import get_ledger
+
 # ──────────────────────────────────────────────────────────────
 # Environment Setup
 # ──────────────────────────────────────────────────────────────
@@ -38,7 +44,9 @@ def get_ai_response(messages, client):
             top_p=0.95,
             frequency_penalty=0.0,
             presence_penalty=0.0,
-            stream=True
+            stream=True,
+            # The last chunk then carries the token usage of the routed model
+            stream_options={"include_usage": True},
         )
 
         full_reply = ""
@@ -48,6 +56,16 @@ def get_ai_response(messages, client):
         response_placeholder = st.empty()
         
         for chunk in response:
+            # Capture model info once
+            if model_used == "unknown" and getattr(chunk, "model", None):
+                model_used = chunk.model
+
+            # The usage chunk arrives after the finish reason, with no choices
+            if getattr(chunk, "usage", None):
+                get_ledger().record(
+                    chunk.usage, model=model_used, agent=DEPLOYMENT, session=st.session_state.get("usage_session")
+                )
+
             # Skip heartbeat / empty-choice events
             if not getattr(chunk, "choices", []):
                 continue
@@ -61,14 +79,6 @@ def get_ai_response(messages, client):
                 full_reply += token
                 # Update the response in real-time
                 response_placeholder.markdown(f"**Response:** {full_reply}▌")
-
-            # Capture model info once
-            if model_used == "unknown" and hasattr(chunk, 'model'):
-                model_used = chunk.model
-
-            # Check for completion
-            if choice.finish_reason is not None:
-                break
         
         # Final update without cursor
         response_placeholder.markdown(f"**Response:** {full_reply}")
@@ -103,6 +113,7 @@ def main():
         st.info(f"**Endpoint:** {ENDPOINT if ENDPOINT else 'Not set'}")
         st.info(f"**Deployment:** {DEPLOYMENT}")
         st.info(f"**API Version:** {API_VERSION}")
+        st.caption(get_limiter(DEPLOYMENT).report())
         
         st.header("📝 About")
         st.markdown("""
@@ -130,12 +141,17 @@ def main():
     if "model_history" not in st.session_state:
         st.session_state.model_history = []
 
+    if "usage_session" not in st.session_state:
+        st.session_state.usage_session = uuid.uuid4().hex
+
     # Initialize client (using synchronous client like in your reference)
     if "client" not in st.session_state:
         st.session_state.client = AzureOpenAI(
             api_version=API_VERSION,
             azure_endpoint=ENDPOINT,
             api_key=API_KEY,
+            # Requests wait for the deployment's quota (AGENT_RATE_LIMITS) instead of failing with 429
+            http_client=http_client(),
         )
 
     # Main chat interface
@@ -203,6 +219,10 @@ def main():
             recent_models = st.session_state.model_history[-5:]
             for i, model in enumerate(reversed(recent_models)):
                 st.text(f"{len(recent_models)-i}. {model}")
+
+            st.subheader("Token Usage")
+            st.caption(f"This session: {get_ledger().session_usage(st.session_state.usage_session).describe()}")
+            st.caption(get_ledger().report(by="model").replace("\n", "  \n"))
         else:
             st.info("No conversations yet. Start chatting to see model usage!")
 
@@ -1,10 +1,15 @@
-import asyncio
+import time
 import streamlit as st
 
-from semantic_kernel.agents import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from dotenv import load_dotenv
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.jobs import DONE, get_job_runner
+from common.sk_services import get_agent
+from common.sk_streaming import StreamMeter, Throttle, stream_agent
+from common.token_usage import get_ledger, scope
 
 load_dotenv()
 
@@ -20,10 +25,11 @@ def log_step(step: str):
     if "sidebar_placeholder" in st.session_state:
         st.session_state["sidebar_placeholder"].markdown("\n".join(st.session_state.log_steps))
 
-async def get_agent_response(topic: str):
-    log_step("Initializing agent...")
-    agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+# Runs on the background job loop, so it reports progress through the job instead of st.*
+async def get_agent_response(job, topic: str):
+    job.log("Initializing agent...")
+    # The agent and its chat service are cached per process; each call starts a fresh chat history.
+    agent = get_agent(
         name="CoursePlanner",
         instructions=(
             "You are an educational planning assistant. "
@@ -31,14 +37,28 @@ async def get_agent_response(topic: str):
             "Include different course titles, subtitles, and a planner for one or more semesters."
         )
     )
-    log_step(f"Agent initialized. Processing input: {topic}")
-    response = await agent.get_response(messages=topic)
-    log_step("Received response from agent.")
+    job.log(f"Agent initialized. Processing input: {topic}")
+    # Stream tokens into the job's partial output so the page can render the plan as it is written.
+    meter = StreamMeter()
+    parts = []
+    throttle = Throttle(job.set_partial, interval=0.1)
+
+    def on_token(text):
+        parts.append(text)
+        throttle.update("".join(parts))
+
+    with scope(run=True) as usage_tags:
+        response = await stream_agent(agent, topic, on_token=on_token, meter=meter)
+    throttle.close()
+    job.log("Received response from agent.")
+    job.log(meter.report())
+    job.log(f"Token usage: {get_ledger().run_usage(usage_tags['run']).describe()}")
     return response
 
 def reset_chat():
     st.session_state.chat_history = []
     st.session_state.log_steps = []
+    st.session_state.pop("job_id", None)
     log_step("Chat history and logs have been reset.")
 
 def main():
@@ -115,29 +135,55 @@ def main():
         else:
             st.write("Please refresh your browser to restart the chat.")
     
-    # Process response if Submit is clicked and topic provided.
+    # Submit starts a background job; the page polls it instead of blocking the session.
+    runner = get_job_runner()
     if submit_clicked and topic:
+        st.session_state.chat_history.append(f"User: {topic}")
+        st.session_state.job_id = runner.submit(get_agent_response, topic, name=f"Course plan: {topic}")
+        st.session_state.job_topic = topic
+        log_step(f"Submitted job {st.session_state.job_id}")
+
+    job = runner.get(st.session_state.job_id) if st.session_state.get("job_id") else None
+    if job:
         # Display user message with avatar :male-office-worker:
         user_avatar = ":male-office-worker:"
-        st.markdown(f"{user_avatar} **User:** {topic}")
-        st.session_state.chat_history.append(f"User: {topic}")
-        
-        # Synchronously run the async agent call
-        response = asyncio.run(get_agent_response(topic))
-        agent_response_md = str(response)
-        
-        # Display assistant response in Markdown with avatar :robot_face:
-        assistant_avatar = ":robot_face:"
-        st.markdown(f"{assistant_avatar} **CoursePlanner:**\n\n{agent_response_md}")
-        st.session_state.chat_history.append(f"CoursePlanner: {agent_response_md}")
-        
-        # Provide a download button for the response
-        st.download_button(
-            label="Download Response",
-            data=agent_response_md,
-            file_name="course_plan.md",
-            mime="text/markdown"
-        )
+        st.markdown(f"{user_avatar} **User:** {st.session_state.job_topic}")
+        sidebar_placeholder.markdown("\n".join(st.session_state.log_steps + job.progress))
+
+        if job.active:
+            status_placeholder = st.empty()
+            if st.button("Cancel"):
+                runner.cancel(job.id)
+            # Redraw the streamed text in place a few times per second before rerunning the script.
+            response_placeholder = st.empty()
+            for _ in range(8):
+                job = runner.get(job.id)
+                status_placeholder.info(f"CoursePlanner is working... ({job.elapsed:.0f}s)")
+                if job.partial:
+                    response_placeholder.markdown(f":robot_face: **CoursePlanner:**\n\n{job.partial}▌")
+                if not job.active:
+                    break
+                time.sleep(0.25)
+            st.rerun()
+        elif job.status == DONE:
+            agent_response_md = job.result
+
+            # Display assistant response in Markdown with avatar :robot_face:
+            assistant_avatar = ":robot_face:"
+            st.markdown(f"{assistant_avatar} **CoursePlanner:**\n\n{agent_response_md}")
+            if st.session_state.get("recorded_job_id") != job.id:
+                st.session_state.chat_history.append(f"CoursePlanner: {agent_response_md}")
+                st.session_state.recorded_job_id = job.id
+
+            # Provide a download button for the response
+            st.download_button(
+                label="Download Response",
+                data=agent_response_md,
+                file_name="course_plan.md",
+                mime="text/markdown"
+            )
+        else:
+            st.error(f"Job {job.status}: {job.error}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,15 +1,33 @@
+import argparse
 import asyncio
+import os
+import sys
+import time
 
 from semantic_kernel.agents import ChatCompletionAgent
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.sk_batch import read_topics, run_batch, summarize
+from common.sk_streaming import StreamMeter, stream_agent
+from common.sk_services import get_async_client
+from common.sk_usage import MeteredChatCompletion
+from common.token_usage import get_ledger, scope
+
 load_dotenv()
 
 async def main():
+    parser = argparse.ArgumentParser(description="Course planner agent (Semantic Kernel).")
+    parser.add_argument("--no-stream", action="store_true", help="wait for the complete response instead of streaming tokens")
+    parser.add_argument("--batch", metavar="TOPICS_FILE", help="plan every topic in the file (one per line) instead of prompting")
+    parser.add_argument("--out", default="course-plans", help="batch output folder for the Markdown plans and manifest.jsonl")
+    parser.add_argument("--concurrency", type=int, default=8, help="batch requests in flight at once")
+    args = parser.parse_args()
+    meter = StreamMeter()
+
     # 1. Create the agent by specifying the service and detailed educational instructions
     agent = ChatCompletionAgent(
-        service=AzureChatCompletion(),
+        service=MeteredChatCompletion(async_client=get_async_client()),
         name="CoursePlanner",
         instructions=(
             "You are an educational planning assistant. "
@@ -18,20 +36,40 @@ async def main():
         )
     )
 
+    if args.batch:
+        # Batch mode: all topics share the one agent and service; rerunning resumes from the manifest.
+        started = time.perf_counter()
+        records, rate_limit_hits = await run_batch(
+            agent, read_topics(args.batch), args.out, concurrency=args.concurrency, progress=print
+        )
+        print(summarize(records, time.perf_counter() - started, rate_limit_hits))
+        print(get_ledger().report())
+        return
+
     # Loop to allow user input repeatedly until "exit" is entered
     while True:
         # Get user input asynchronously
         user_input = await asyncio.get_event_loop().run_in_executor(None, input, "Enter your topic to create the course plan (or type 'exit' to quit): ")
         if user_input.strip().lower() == "exit":
+            print(get_ledger().report())
             break
 
         print(f"# User: {user_input}")
-        # 2. Invoke the agent for a response
-        response = await agent.get_response(
-            messages=user_input,
-        )
-        # 3. Print the response
-        print(f"# {response.name}: {response}")
+        if args.no_stream:
+            # 2. Invoke the agent for a response
+            with scope(agent=agent.name):
+                response = await agent.get_response(
+                    messages=user_input,
+                )
+            # 3. Print the response
+            print(f"# {response.name}: {response}")
+            continue
+
+        # 2./3. Stream the response, printing tokens as they arrive
+        print(f"# {agent.name}: ", end="", flush=True)
+        await stream_agent(agent, user_input, on_token=lambda text: print(text, end="", flush=True), meter=meter)
+        print()
+        print(meter.report().splitlines()[-1])
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from semantic_kernel.agents import ChatCompletionAgent
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.sk_services import get_agent
+
+load_dotenv()
+
+# Compares building a new ChatCompletionAgent + AzureChatCompletion per request (the old UI behaviour)
+# with the process-wide cached agent and shared connection pool from common.sk_services.
+# Without --live only construction time is measured; with --live every request also calls the model.
+
+INSTRUCTIONS = (
+    "You are an educational planning assistant. "
+    "Please help the user by creating detailed course and study plans based on the topic provided. "
+    "Include different course titles, subtitles, and a planner for one or more semesters."
+)
+TOPIC = "Reply with the single word OK."
+
+
+def new_agent():
+    return ChatCompletionAgent(service=AzureChatCompletion(), name="CoursePlanner", instructions=INSTRUCTIONS)
+
+
+def cached_agent():
+    return get_agent(name="CoursePlanner", instructions=INSTRUCTIONS)
+
+
+async def measure(make_agent, requests: int, live: bool):
+    setup, total = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        agent = make_agent()
+        built = time.perf_counter()
+        if live:
+            await agent.get_response(messages=TOPIC)
+        setup.append(built - started)
+        total.append(time.perf_counter() - started)
+    return setup, total
+
+
+def describe(label: str, values):
+    ms = sorted(v * 1000 for v in values)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    return f"{label:<22} first (startup) {values[0] * 1000:8.2f} ms | p50 {statistics.median(ms):8.2f} ms | p95 {p95:8.2f} ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached vs. per-request Semantic Kernel services.")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="also send a short prompt to the model on every request")
+    args = parser.parse_args()
+
+    for label, factory in (("per-request service", new_agent), ("cached service", cached_agent)):
+        setup, total = await measure(factory, args.requests, args.live)
+        print(f"# {label}")
+        print(describe("  construction", setup))
+        if args.live:
+            print(describe("  end-to-end", total))
+
+if __name__ == "__main__":
+    asyncio.run(main())
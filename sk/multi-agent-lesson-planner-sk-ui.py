@@ -1,24 +1,39 @@
-import asyncio
+import os
+import sys
+import time
 import streamlit as st
 
 from semantic_kernel import Kernel
-from semantic_kernel.agents import AgentGroupChat, ChatCompletionAgent
-from semantic_kernel.agents.strategies import TerminationStrategy
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+from semantic_kernel.agents import AgentGroupChat
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.budget import RunBudget
+from common.context_policy import ContextMeter, LastK, RoleFilter, current_meter
+from common.jobs import DONE, get_job_runner
+from common.plan_store import PlanStore
+from common.sk_budget import BudgetTerminationStrategy
+from common.sk_services import get_agent, get_kernel
+from common.sk_streaming import StreamMeter, Throttle, stream_group_chat
+from common.token_usage import get_ledger, scope
+from common.verdict import APPROVED, VERDICT_INSTRUCTIONS, VerdictWatcher, parse_verdict
 
 #######################
 # Helper functions and class definitions
 #######################
 
-def _create_kernel_with_chat_completion(service_id: str) -> Kernel:
-    kernel = Kernel()
-    kernel.add_service(AzureChatCompletion(service_id=service_id))
-    return kernel
+def _create_kernel_with_chat_completion(service_id: str, agent_name: str) -> Kernel:
+    # Kernels are cached per process and share one HTTP connection pool.
+    # Each agent only sees the part of the group history its context policy allows.
+    return get_kernel(service_id, agent_name, CONTEXT_POLICIES.get(agent_name))
 
-class ApprovedTerminationStrategy(TerminationStrategy):
-    """Terminates when 'approved' is found in Educator's response (case-insensitive)."""
+class ApprovedTerminationStrategy(BudgetTerminationStrategy):
+    """Terminates when Educator's verdict is APPROVED (or 'approved' appears in an unmarked review), or when the run budget is spent."""
     async def should_agent_terminate(self, agent, history):
-        return "approved" in history[-1].content.lower()
+        # Terminate on a "VERDICT: APPROVED" marker, or "approved" anywhere in an unmarked review
+        approved = parse_verdict(history[-1].content or "", final=True) == APPROVED
+        if approved and self.budget is not None:
+            self.budget.stop("approved by Educator")
+        return approved
 
 # Define agent names and instructions
 LESSON_PLANNER_NAME = "LessonPlanner"
@@ -34,8 +49,16 @@ EDUCATOR_INSTRUCTIONS = (
     "You are an experienced educator. Your role is to review the lesson plan provided by the LessonPlanner and suggest modifications "
     "appropriate to various grade levels (elementary, high school, or college) or other relevant changes. The goal is to determine "
     "if the provided lesson plan is acceptable. If so, state that it is approved; if not, provide insight on how to refine the plan. "
+    + VERDICT_INSTRUCTIONS
 )
 
+# Per-agent context policies: the LessonPlanner needs the task, its last draft and the latest feedback;
+# the Educator only needs the task and the latest plan.
+CONTEXT_POLICIES = {
+    LESSON_PLANNER_NAME: LastK(2),
+    EDUCATOR_NAME: RoleFilter(latest_from={LESSON_PLANNER_NAME}),
+}
+
 #######################
 # Streamlit App UI
 #######################
@@ -85,6 +108,15 @@ user_input = st.text_input(
     placeholder="e.g. Incorporating Technology in the Classroom - high school"
 )
 
+# Plans already generated for a topic + grade (or a near duplicate) are served from the local plan store unless regenerated.
+regenerate = st.checkbox("Regenerate (ignore stored plan)")
+
+@st.cache_resource
+def get_plan_store():
+    return PlanStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), "plans.sqlite3"), min_similarity=0.75)
+
+plan_store = get_plan_store()
+
 # Sidebar placeholder for logging conversation steps.
 log_placeholder = st.sidebar.empty()
 if "conversation_logs" not in st.session_state:
@@ -97,53 +129,126 @@ def log_message(msg: str):
 # Placeholder for final result.
 result_placeholder = st.empty()
 
-# Function to run the multi-agent conversation asynchronously.
-async def run_group_chat(task: str):
-    # 1. Create agents.
-    agent_lesson_planner = ChatCompletionAgent(
-        kernel=_create_kernel_with_chat_completion("lessonplanner"),
-        name=LESSON_PLANNER_NAME,
-        instructions=LESSON_PLANNER_INSTRUCTIONS,
+# Function to run the multi-agent conversation on the background job loop.
+# It must not call st.*; progress goes through job.log and the page polls the job.
+async def run_group_chat(job, task: str, user_input: str):
+    started = time.perf_counter()
+    # Per-request meter and budget; the cached services record into the meter set for this task.
+    context_meter = ContextMeter()
+    current_meter.set(context_meter)
+    # Stop on a wall-clock deadline, a cumulative token budget, or once LessonPlanner drafts stop changing.
+    run_budget = RunBudget(deadline_seconds=300, max_tokens=60000, convergence_source=LESSON_PLANNER_NAME)
+
+    # 1. Get the cached agents; the conversation state lives only in this request's group chat.
+    agent_lesson_planner = get_agent(
+        LESSON_PLANNER_NAME,
+        LESSON_PLANNER_INSTRUCTIONS,
+        kernel=_create_kernel_with_chat_completion("lessonplanner", LESSON_PLANNER_NAME),
     )
-    agent_educator = ChatCompletionAgent(
-        kernel=_create_kernel_with_chat_completion("educator"),
-        name=EDUCATOR_NAME,
-        instructions=EDUCATOR_INSTRUCTIONS,
+    agent_educator = get_agent(
+        EDUCATOR_NAME,
+        EDUCATOR_INSTRUCTIONS,
+        kernel=_create_kernel_with_chat_completion("educator", EDUCATOR_NAME),
     )
 
-    # 2. Create a group chat with a termination strategy based on Educator's "approved" reply.
+    # 2. Create a group chat with a termination strategy based on Educator's verdict.
     group_chat = AgentGroupChat(
         agents=[agent_lesson_planner, agent_educator],
         termination_strategy=ApprovedTerminationStrategy(
             agents=[agent_educator],
             maximum_iterations=10,
+            budget=run_budget,
         ),
     )
 
     # 3. Add the task to the group chat.
     await group_chat.add_chat_message(message=task)
-    log_message(f"# Educator provided task: {task}")
+    job.log(f"# Educator provided task: {task}")
 
     final_result = None
-    # 4. Invoke the group chat and log all conversation messages.
-    async for content in group_chat.invoke():
-        log_message(f"# {content.name}: {content.content}")
-        if content.name == LESSON_PLANNER_NAME:
-            final_result = content.content
-
+    # 4. Stream the group chat: the current turn is published as partial output, finished turns are logged.
+    run_budget.start()
+    stream_meter = StreamMeter()
+    throttle = Throttle(job.set_partial, interval=0.1)
+    turn = {"agent": None, "parts": []}
+
+    def on_token(agent, text):
+        if agent != turn["agent"]:
+            turn["agent"], turn["parts"] = agent, []
+        turn["parts"].append(text)
+        throttle.update(f"**{agent}:** " + "".join(turn["parts"]))
+
+    def on_turn(agent, text):
+        nonlocal final_result
+        job.log(f"# {agent}: {text}")
+        if agent == LESSON_PLANNER_NAME:
+            final_result = text
+
+    # The Educator's stream is cut short as soon as its verdict line reads APPROVED.
+    verdict_watcher = VerdictWatcher(EDUCATOR_NAME, stream_meter)
+
+    def on_stop(turn):
+        verdict_watcher.record(turn)
+        run_budget.stop("approved by Educator (early verdict)")
+
+    with scope(run=True) as usage_tags:
+        await stream_group_chat(
+            group_chat, on_token=on_token, on_turn=on_turn, meter=stream_meter,
+            stop_when=verdict_watcher.should_stop, on_stop=on_stop,
+        )
+    throttle.close()
+    job.set_partial("")
+    job.log(stream_meter.report().replace("\n", "  \n"))
+    job.log(verdict_watcher.report())
+
+    # 5. Log prompt tokens per turn with and without context windowing.
+    job.log(context_meter.report().replace("\n", "  \n"))
+    job.log(run_budget.report(None if run_budget.stop_reason else "maximum iterations reached"))
+    job.log(f"Token usage: {get_ledger().run_usage(usage_tags['run']).describe()}")
+
+    # 6. Keep the plan for the next request on this topic.
+    if final_result:
+        version = plan_store.save(user_input, "sk", final_result, time.perf_counter() - started, run_budget.tokens)
+        job.log(f"Stored plan v{version}")
+    job.log(plan_store.report("sk"))
     return final_result
 
-# When the user clicks Submit, run the conversation.
+runner = get_job_runner()
+
+# When the user clicks Submit, serve a stored plan or start the conversation as a background job.
 if st.button("Submit") and user_input:
     # Clear previous logs and result.
     st.session_state.conversation_logs = []
+    st.session_state.pop("job_id", None)
     log_message("### Conversation Started")
-    result_placeholder.markdown("Processing...")
-    # Build TASK using the user input.
-    TASK = f"Design a lesson plan on {user_input}."
-    # Run the async conversation.
-    final_output = asyncio.run(run_group_chat(TASK))
-    if final_output:
-        result_placeholder.markdown(f"### Final Lesson Plan (from {LESSON_PLANNER_NAME}):\n\n{final_output}")
+    stored = None if regenerate else plan_store.lookup(user_input, framework="sk")
+    if stored:
+        log_message(f"Served stored plan v{stored.version} for '{stored.topic}' ({stored.similarity:.0%} match)")
+        log_message(plan_store.report("sk"))
+        result_placeholder.markdown(f"### Final Lesson Plan (from {LESSON_PLANNER_NAME}, stored v{stored.version}):\n\n{stored.plan}")
+    else:
+        # Build TASK using the user input.
+        TASK = f"Design a lesson plan on {user_input}."
+        st.session_state.job_id = runner.submit(run_group_chat, TASK, user_input, name=f"Lesson plan: {user_input}")
+
+# Poll the running job, if any.
+job = runner.get(st.session_state.job_id) if st.session_state.get("job_id") else None
+if job:
+    log_placeholder.markdown("\n".join(st.session_state.conversation_logs + job.progress))
+    if job.active:
+        if st.button("Cancel"):
+            runner.cancel(job.id)
+        # Redraw the streaming turn in place a few times per second before rerunning the script.
+        for _ in range(4):
+            job = runner.get(job.id)
+            result_placeholder.markdown(f"Processing... ({job.elapsed:.0f}s)\n\n{job.partial}▌" if job.partial else f"Processing... ({job.elapsed:.0f}s)")
+            if not job.active:
+                break
+            time.sleep(0.25)
+        st.rerun()
+    elif job.status == DONE and job.result:
+        result_placeholder.markdown(f"### Final Lesson Plan (from {LESSON_PLANNER_NAME}):\n\n{job.result}")
+    elif job.status == DONE:
+        result_placeholder.markdown("No final output received.")
     else:
-        result_placeholder.markdown("No final output received.")
\ No newline at end of file
+        result_placeholder.markdown(f"Job {job.status}: {job.error}")
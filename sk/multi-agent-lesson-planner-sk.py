@@ -1,22 +1,49 @@
+import argparse
 import asyncio
+import os
+import sys
+import time
 
 from semantic_kernel import Kernel
 from semantic_kernel.agents import AgentGroupChat, ChatCompletionAgent
-from semantic_kernel.agents.strategies import TerminationStrategy
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.budget import RunBudget
+from common.context_policy import ContextMeter, LastK, RoleFilter
+from common.plan_revision import (
+    EDIT_INSTRUCTIONS, IterationStats, PlanDocument, apply_edits, compare_report, parse_edits, render_diff,
+)
+from common.sk_budget import BudgetTerminationStrategy
+from common.sk_context import ContextWindowedChatCompletion
+from common.sk_services import get_async_client
+from common.sk_streaming import StreamMeter, stream_agent, stream_group_chat
+from common.sk_usage import MeteredChatCompletion
+from common.token_usage import get_ledger, scope
+from common.verdict import APPROVED, VERDICT_INSTRUCTIONS, VerdictWatcher, parse_verdict
 
 
-def _create_kernel_with_chat_completion(service_id: str) -> Kernel:
+def _create_kernel_with_chat_completion(service_id: str, agent_name: str) -> Kernel:
     kernel = Kernel()
-    kernel.add_service(AzureChatCompletion(service_id=service_id))
+    service = ContextWindowedChatCompletion(service_id=service_id, async_client=get_async_client())
+    # Each agent only sees the part of the group history its context policy allows
+    service.context_agent = agent_name
+    service.context_policy = CONTEXT_POLICIES.get(agent_name)
+    service.context_meter = context_meter
+    kernel.add_service(service)
     return kernel
 
 
-class ApprovedTerminationStrategy(TerminationStrategy):
-    """A termination strategy that terminates the conversation when "approved" is found in Educator's response."""
+class ApprovedTerminationStrategy(BudgetTerminationStrategy):
+    """A termination strategy that terminates the conversation when Educator's response approves the plan.
+
+    The run budget (deadline, tokens, convergence) is checked for every message first.
+    """
     async def should_agent_terminate(self, agent, history):
-        # Terminate if the last message contains "approved" (case insensitive)
-        return "approved" in history[-1].content.lower()
+        # Terminate on a "VERDICT: APPROVED" marker, or "approved" anywhere in an unmarked review
+        approved = parse_verdict(history[-1].content or "", final=True) == APPROVED
+        if approved and self.budget is not None:
+            self.budget.stop("approved by Educator")
+        return approved
 
 
 # Define agent names and instructions
@@ -35,23 +62,64 @@ EDUCATOR_INSTRUCTIONS = (
     "appropriate to various grade levels (elementary, high school, or college) or other relevant changes. "
     "The goal is to determine if the provided lesson plan is acceptable to use."
     "If so, state that it is approved."
-    "If not, provide insight on how to refine suggested copy without example."
+    "If not, provide insight on how to refine suggested copy without example. "
+    + VERDICT_INSTRUCTIONS
 )
 
+# Per-agent context policies: the LessonPlanner needs the task, its last draft and the latest feedback;
+# the Educator only needs the task and the latest plan.
+CONTEXT_POLICIES = {
+    LESSON_PLANNER_NAME: LastK(2),
+    EDUCATOR_NAME: RoleFilter(latest_from={LESSON_PLANNER_NAME}),
+}
+context_meter = ContextMeter()
+
+# Stop on a wall-clock deadline, a cumulative token budget, or once LessonPlanner drafts stop changing.
+run_budget = RunBudget(deadline_seconds=300, max_tokens=60000, convergence_source=LESSON_PLANNER_NAME)
+
 # The topic or task that the educator provides.
 TASK = "Design a lesson plan on Incorporating Technology in the Classroom."
 
-async def main():
+MAX_ITERATIONS = 5
+
+
+def _print_token(text):
+    print(text, end="", flush=True)
+
+
+def _iterations(turns, finished: float):
+    """Pair each LessonPlanner turn with the Educator review that follows it.
+
+    Both compare modes time an iteration the same way: wall-clock from the start of its
+    LessonPlanner turn to the start of the next one (or ``finished``), so whatever runs
+    between the turns (group-chat selection, applying edits) is counted too.
+    """
+    iterations, starts = [], []
+    for turn in turns:
+        if turn.agent == LESSON_PLANNER_NAME:
+            iterations.append(IterationStats(len(iterations) + 1, turn.tokens, 0, 0.0))
+            starts.append(turn.started)
+        elif iterations:
+            iterations[-1].educator_tokens += turn.tokens
+    for index, iteration in enumerate(iterations):
+        iteration.seconds = (starts[index + 1] if index + 1 < len(starts) else finished) - starts[index]
+    return iterations
+
+
+async def run_full_conversation():
+    """The LessonPlanner rewrites the whole plan every turn; returns per-iteration stats."""
+    context_meter.reset()
+
     # 1. Create the LessonPlanner agent
     agent_lesson_planner = ChatCompletionAgent(
-        kernel=_create_kernel_with_chat_completion("lessonplanner"),
+        kernel=_create_kernel_with_chat_completion("lessonplanner", LESSON_PLANNER_NAME),
         name=LESSON_PLANNER_NAME,
         instructions=LESSON_PLANNER_INSTRUCTIONS,
     )
 
     # 2. Create the Educator agent
     agent_educator = ChatCompletionAgent(
-        kernel=_create_kernel_with_chat_completion("educator"),
+        kernel=_create_kernel_with_chat_completion("educator", EDUCATOR_NAME),
         name=EDUCATOR_NAME,
         instructions=EDUCATOR_INSTRUCTIONS,
     )
@@ -61,7 +129,8 @@ async def main():
         agents=[agent_lesson_planner, agent_educator],
         termination_strategy=ApprovedTerminationStrategy(
             agents=[agent_educator],  # termination is based solely on Educator's response.
-            maximum_iterations=10,
+            maximum_iterations=2 * MAX_ITERATIONS,
+            budget=run_budget,
         ),
     )
 
@@ -69,9 +138,142 @@ async def main():
     await group_chat.add_chat_message(message=TASK)
     print(f"# Educator provided task: {TASK}")
 
-    # 5. Invoke the group chat and print the conversation.
-    async for content in group_chat.invoke():
-        print(f"# {content.name}: {content.content}")
+    # 5. Stream the group chat, printing each agent's tokens as they arrive.
+    run_budget.start()
+    stream_meter = StreamMeter()
+    speaker = None
+
+    def on_token(agent, text):
+        nonlocal speaker
+        if agent != speaker:
+            print(f"\n# {agent}: ", end="")
+            speaker = agent
+        print(text, end="", flush=True)
+
+    # The Educator's stream is cut short as soon as its verdict line reads APPROVED.
+    verdict_watcher = VerdictWatcher(EDUCATOR_NAME, stream_meter)
+
+    def on_stop(turn):
+        verdict_watcher.record(turn)
+        run_budget.stop("approved by Educator (early verdict)")
+
+    await stream_group_chat(
+        group_chat, on_token=on_token, meter=stream_meter, stop_when=verdict_watcher.should_stop, on_stop=on_stop
+    )
+    finished = time.perf_counter()
+    print()
+    print(stream_meter.report())
+    print(verdict_watcher.report())
+
+    # 6. Compare prompt tokens per turn with and without context windowing.
+    print(context_meter.report())
+
+    # 7. Report why the conversation stopped and what it cost up to that point.
+    print(run_budget.report(None if run_budget.stop_reason else "maximum iterations reached"))
+    return _iterations(stream_meter.turns, finished)
+
+
+async def run_revision_conversation():
+    """The LessonPlanner drafts once, then only emits section edits that are applied to a local plan document.
+
+    The Educator reviews the diff plus a compact outline instead of the whole plan.
+    """
+    # Prompts are assembled here from the plan document, so plain services without context policies are used.
+    planner_service = MeteredChatCompletion(service_id="lessonplanner", async_client=get_async_client())
+    educator_service = MeteredChatCompletion(service_id="educator", async_client=get_async_client())
+    agent_lesson_planner = ChatCompletionAgent(
+        service=planner_service,
+        name=LESSON_PLANNER_NAME,
+        instructions=LESSON_PLANNER_INSTRUCTIONS,
+    )
+    agent_reviser = ChatCompletionAgent(
+        service=planner_service,
+        name=LESSON_PLANNER_NAME,
+        instructions=LESSON_PLANNER_INSTRUCTIONS + " " + EDIT_INSTRUCTIONS,
+    )
+    agent_educator = ChatCompletionAgent(
+        service=educator_service,
+        name=EDUCATOR_NAME,
+        instructions=EDUCATOR_INSTRUCTIONS,
+    )
+
+    print(f"# Educator provided task: {TASK}")
+    run_budget.start()
+    stream_meter = StreamMeter()
+    verdict_watcher = VerdictWatcher(EDUCATOR_NAME, stream_meter)
+    document, feedback, stop_reason = None, "", None
+
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        print(f"\n# {LESSON_PLANNER_NAME}: ", end="")
+        if document is None:
+            plan_text = await stream_agent(agent_lesson_planner, TASK, on_token=_print_token, meter=stream_meter)
+            document = PlanDocument.parse(plan_text)
+            review = f"{TASK}\n\nLesson plan:\n{document.render()}"
+        else:
+            prompt = f"{TASK}\n\nCurrent lesson plan:\n{document.render()}\n\nEducator feedback:\n{feedback}"
+            edit_text = await stream_agent(agent_reviser, prompt, on_token=_print_token, meter=stream_meter)
+            edits = parse_edits(edit_text)
+            if edits:
+                revised, problems = apply_edits(document, edits)
+                for problem in problems:
+                    print(f"\n[edit skipped] {problem}")
+            else:
+                # The planner ignored the edit format and sent a whole plan; take it as the new draft
+                revised = PlanDocument.parse(edit_text)
+            diff = render_diff(document, revised)
+            document = revised
+            review = (
+                f"{TASK}\n\nOutline of the revised lesson plan:\n{document.outline()}\n\n"
+                f"Changes made for your previous feedback:\n{diff}\n\nYour previous feedback:\n{feedback}"
+            )
+        planner_turn = stream_meter.turns[-1]
+        if run_budget.observe(LESSON_PLANNER_NAME, document.render(), planner_turn.tokens):
+            break
+
+        print(f"\n# {EDUCATOR_NAME}: ", end="")
+        feedback = await stream_agent(
+            agent_educator, review, on_token=_print_token, meter=stream_meter,
+            stop_when=lambda text: verdict_watcher.should_stop(EDUCATOR_NAME, text),
+        )
+        educator_turn = stream_meter.turns[-1]
+        if educator_turn.truncated:
+            verdict_watcher.record(educator_turn)
+        if parse_verdict(feedback, final=True) == APPROVED:
+            stop_reason = run_budget.stop("approved by Educator")
+            break
+        if run_budget.observe(EDUCATOR_NAME, feedback, educator_turn.tokens):
+            break
+
+    finished = time.perf_counter()
+    print()
+    print(f"# Final lesson plan:\n{document.render()}")
+    print(stream_meter.report())
+    print(verdict_watcher.report())
+    print(run_budget.report(stop_reason or (None if run_budget.stop_reason else "maximum iterations reached")))
+    return _iterations(stream_meter.turns, finished)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LessonPlanner / Educator group chat (Semantic Kernel).")
+    parser.add_argument(
+        "--mode", choices=("full", "revise", "compare"), default="full",
+        help="full: the planner rewrites the whole plan each turn; revise: it emits section edits only; "
+             "compare: run both and compare output tokens and wall-clock per iteration",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    # Each mode is one usage run, so compare mode also shows what each costs
+    if args.mode in ("full", "compare"):
+        with scope(run="full"):
+            results["full"] = await run_full_conversation()
+    if args.mode in ("revise", "compare"):
+        with scope(run="revise"):
+            results["revise"] = await run_revision_conversation()
+    print(compare_report(results))
+    for mode in results:
+        print(f"Token usage ({mode}): {get_ledger().run_usage(mode).describe()}")
+    print(get_ledger().report())
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file